@@ -18,9 +18,19 @@ def create_app(config_name='dev'):
     app = Flask(__name__)
     app.config.from_object(config_by_name[config_name])
     
+    # Encode responses, and decode JSON columns, with orjson when it is installed
+    from app.services.json_service import FastJSONProvider, engine_options
+    app.json = FastJSONProvider(app)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(engine_options(), **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    
     # Initialize extensions
     db.init_app(app)
     
+    # Tune SQLite connections (WAL, busy timeout, cache) where the config asks for it
+    from app.services.database_service import apply_sqlite_pragmas
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, app.config.get('SQLITE_PRAGMAS'))
+    
     # Register blueprints
     from app.controllers.challenge_controller import challenge_bp
     from app.controllers.upload_controller import upload_bp
@@ -10,9 +10,49 @@ class Config:
     DEBUG = False
     TESTING = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLITE_PRAGMAS = {}  # PRAGMA name -> value run on every new SQLite connection
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+    BLOB_FOLDER = os.path.join(UPLOAD_FOLDER, 'blobs')  # Content-addressed store for uploaded files
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max upload size
     ALLOWED_EXTENSIONS = {'nbt'}  # Minecraft NBT files
+    PAGE_SIZE = 50  # Default number of rows per page in list endpoints
+    MAX_PAGE_SIZE = 500  # Largest page a client may request
+    STREAM_CHUNK_SIZE = 500  # Rows fetched and written at a time by streaming list endpoints
+    DASHBOARD_RECENT_SUBMISSIONS = 5  # Latest submissions shown on a student's dashboard
+    CATALOGUE_MAX_AGE = 60  # Seconds clients may reuse the challenge list without revalidating
+    CATALOGUE_REVALIDATE_INTERVAL = 30  # Seconds between checks for challenge changes made by other workers
+    PROGRESS_SYNC_MAX_RECORDS = 10000  # Records accepted by one bulk progress request
+    PROGRESS_SYNC_BATCH_SIZE = 500  # Records written per upsert statement
+    LEADERBOARD_REBUILD_INTERVAL = int(os.getenv('LEADERBOARD_REBUILD_INTERVAL', 300))  # Seconds between in-memory leaderboard rebuilds
+    RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', 1024))  # Validation results kept in memory
+    ASYNC_VALIDATION = os.getenv('ASYNC_VALIDATION', 'false').lower() == 'true'  # Validate uploads in the background
+    VALIDATION_WORKERS = int(os.getenv('VALIDATION_WORKERS', 2))  # Worker processes for background validation
+    VALIDATION_QUEUE_SIZE = int(os.getenv('VALIDATION_QUEUE_SIZE', 64))  # Queued jobs before uploads get 429
+    VALIDATION_JOB_TIMEOUT = int(os.getenv('VALIDATION_JOB_TIMEOUT', 60))  # Seconds a background validation may run
+    UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB chunks for resumable uploads
+    UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', 24 * 3600))  # Seconds an unfinished upload is kept after its last chunk
+    UPLOAD_SESSION_SWEEP_INTERVAL = 600  # Seconds between checks for abandoned uploads
+    BATCH_MAX_CONTENT_LENGTH = 256 * 1024 * 1024  # 256 MB max batch upload size
+    BATCH_MAX_FILES = 500  # Builds accepted in one batch upload
+    MAX_BUILD_VOXELS = int(os.getenv('MAX_BUILD_VOXELS', 256 ** 3))  # Largest structure volume (width x height x depth) accepted
+    
+    # External AI validation service
+    USE_EXTERNAL_AI_VALIDATION = os.getenv('USE_EXTERNAL_AI_VALIDATION', 'false').lower() == 'true'
+    AI_VALIDATION_SERVICE_URL = os.getenv('AI_VALIDATION_SERVICE_URL', 'http://localhost:5000/api/validate')
+    AI_VALIDATION_CONNECT_TIMEOUT = float(os.getenv('AI_VALIDATION_CONNECT_TIMEOUT', 3.05))  # Seconds
+    AI_VALIDATION_READ_TIMEOUT = float(os.getenv('AI_VALIDATION_READ_TIMEOUT', 10))  # Seconds
+    AI_VALIDATION_RETRIES = int(os.getenv('AI_VALIDATION_RETRIES', 2))  # Extra attempts after a failure
+    AI_VALIDATION_BACKOFF = float(os.getenv('AI_VALIDATION_BACKOFF', 0.2))  # Base of the jittered backoff
+    AI_VALIDATION_DEADLINE = float(os.getenv('AI_VALIDATION_DEADLINE', 15))  # Seconds for all attempts of one call
+    AI_VALIDATION_RETRY_READ_TIMEOUTS = os.getenv('AI_VALIDATION_RETRY_READ_TIMEOUTS', 'false').lower() == 'true'
+    AI_VALIDATION_POOL_SIZE = int(os.getenv('AI_VALIDATION_POOL_SIZE', 10))  # Keep-alive connections
+    AI_VALIDATION_BREAKER_THRESHOLD = int(os.getenv('AI_VALIDATION_BREAKER_THRESHOLD', 5))  # Failures before opening
+    AI_VALIDATION_BREAKER_RESET = float(os.getenv('AI_VALIDATION_BREAKER_RESET', 30))  # Seconds before a trial call
+    AI_VALIDATION_BATCHING = os.getenv('AI_VALIDATION_BATCHING', 'false').lower() == 'true'  # Send builds in batches
+    AI_VALIDATION_BATCH_URL = os.getenv('AI_VALIDATION_BATCH_URL', 'http://localhost:5000/api/validate/batch')
+    AI_VALIDATION_BATCH_WINDOW = float(os.getenv('AI_VALIDATION_BATCH_WINDOW', 0.05))  # Seconds to collect a batch
+    AI_VALIDATION_BATCH_MAX = int(os.getenv('AI_VALIDATION_BATCH_MAX', 32))  # Builds per batch request
+    AI_VALIDATION_BATCH_SENDERS = int(os.getenv('AI_VALIDATION_BATCH_SENDERS', 4))  # Batch requests in flight at once
 
 class DevelopmentConfig(Config):
     """Development configuration settings"""
@@ -28,6 +68,21 @@ class TestingConfig(Config):
 class ProductionConfig(Config):
     """Production configuration settings"""
     SQLALCHEMY_DATABASE_URI = os.getenv('PROD_DATABASE_URI', 'sqlite:///mathcraft_prod.db')
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),  # Connections kept open per worker process
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),  # Extra connections allowed under load
+        'pool_timeout': 30,  # Seconds to wait for a free connection
+        'pool_recycle': 1800,  # Replace connections older than 30 minutes
+        'pool_pre_ping': True  # Check connections before use (server databases drop idle ones)
+    }
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',  # Readers no longer block the writer, and the writer no longer blocks readers
+        'synchronous': 'NORMAL',  # Safe with WAL; fsync at checkpoints instead of every commit
+        'busy_timeout': 15000,  # Milliseconds a writer waits for the lock before "database is locked"
+        'cache_size': -65536,  # 64 MB page cache per connection
+        'mmap_size': 268435456,  # Read the first 256 MB of the file through memory mapping
+        'temp_store': 'MEMORY'
+    }
     # In production, ensure a proper secret key is set
     SECRET_KEY = os.getenv('SECRET_KEY')
 
@@ -1,5 +1,9 @@
 from flask import Blueprint, request, jsonify, current_app
 from app.models.challenge import Challenge
+from app.services.criteria_service import plan_cache
+from app.services.streaming_service import NDJSON_MIMETYPES, wants_ndjson
+from app.services.achievement_service import achievement_engine
+from app.services.catalogue_service import catalogue_cache
 from app import db
 
 # Create a Blueprint for challenge-related routes
@@ -9,14 +13,32 @@ challenge_bp = Blueprint('challenge', __name__)
 def get_all_challenges():
     """
     Get all available challenges
+    
+    The list is a JSON array, or NDJSON (one challenge per line) when the
+    client accepts application/x-ndjson. The body comes from the catalogue
+    cache and carries a strong ETag, so a matching If-None-Match gets a
+    304 without touching the database.
     """
     try:
-        challenges = Challenge.query.all()
-        return jsonify([challenge.to_dict() for challenge in challenges]), 200
+        ndjson = wants_ndjson()
+        body, etag = catalogue_cache.get(ndjson)
+        response = current_app.response_class(body, mimetype=NDJSON_MIMETYPES[0] if ndjson else 'application/json')
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config['CATALOGUE_MAX_AGE']
+        response.vary.add('Accept')
+        return response.make_conditional(request)
     except Exception as e:
         current_app.logger.error(f"Error fetching challenges: {str(e)}")
         return jsonify({"error": "Failed to fetch challenges"}), 500
 
+@challenge_bp.route('/plan-cache', methods=['GET'])
+def get_plan_cache_stats():
+    """
+    Get hit/miss counters of the compiled validation plan cache
+    """
+    return jsonify(plan_cache.stats()), 200
+
 @challenge_bp.route('/<int:challenge_id>', methods=['GET'])
 def get_challenge(challenge_id):
     """
@@ -57,6 +79,8 @@ def create_challenge():
         
         db.session.add(new_challenge)
         db.session.commit()
+        achievement_engine.invalidate_catalogue()
+        catalogue_cache.bump()
         
         return jsonify(new_challenge.to_dict()), 201
     except Exception as e:
@@ -91,6 +115,9 @@ def update_challenge(challenge_id):
             challenge.image_url = data['image_url']
         
         db.session.commit()
+        plan_cache.invalidate(challenge_id)
+        achievement_engine.invalidate_catalogue()
+        catalogue_cache.bump()
         
         return jsonify(challenge.to_dict()), 200
     except Exception as e:
@@ -110,6 +137,9 @@ def delete_challenge(challenge_id):
         
         db.session.delete(challenge)
         db.session.commit()
+        plan_cache.invalidate(challenge_id)
+        achievement_engine.invalidate_catalogue()
+        catalogue_cache.bump()
         
         return jsonify({"message": "Challenge deleted successfully"}), 200
     except Exception as e:
@@ -1,5 +1,15 @@
+from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import Row, func
+from app.models.challenge import Challenge
 from app.models.progress import UserProgress, Achievement
+from app.services.streaming_service import stream_query
+from app.services.leaderboard_service import record_progress, top, around
+from app.services.ranking_service import WINDOWS, leaderboards
+from app.services.achievement_service import achievement_engine
+from app.services.progress_sync_service import SYNC_FIELDS, ProgressSyncError, parse_records, apply_progress
+from app.services.dashboard_service import build_dashboard
+from app.services.pagination_service import PaginationError, encode_cursor, decode_cursor, parse_limit
 from app import db
 
 # Create a Blueprint for progress tracking routes
@@ -9,23 +19,45 @@ progress_bp = Blueprint('progress', __name__)
 def get_user_progress(user_id):
     """
     Get a user's progress across all challenges
+    
+    The totals are computed in the database and the per-challenge records
+    are streamed after them. With Accept: application/x-ndjson the first
+    line holds the totals and each following line one challenge.
     """
     try:
-        progress = UserProgress.query.filter_by(user_id=user_id).all()
+        challenges_completed, total_score = db.session.query(
+            func.count(UserProgress.id).filter(UserProgress.is_completed == True),
+            func.coalesce(func.sum(UserProgress.score), 0)
+        ).filter(UserProgress.user_id == user_id).one()
         
-        # Format results
-        results = {
+        summary = {
             "user_id": user_id,
-            "challenges_completed": len([p for p in progress if p.is_completed]),
-            "total_score": sum(p.score for p in progress if p.score),
-            "challenges": [p.to_dict() for p in progress]
+            "challenges_completed": challenges_completed,
+            "total_score": total_score
         }
-        
-        return jsonify(results), 200
+        query = db.session.query(*UserProgress.columns()).filter(
+            UserProgress.user_id == user_id
+        ).order_by(UserProgress.challenge_id)
+        return stream_query(query, Row._asdict, envelope=summary, key="challenges")
     except Exception as e:
         current_app.logger.error(f"Error fetching progress for user {user_id}: {str(e)}")
         return jsonify({"error": "Failed to fetch user progress"}), 500
 
+@progress_bp.route('/user/<user_id>/dashboard', methods=['GET'])
+def get_user_dashboard(user_id):
+    """
+    Get everything a student's page shows in one response
+    
+    Returns the user's totals, their progress with each challenge's title
+    and difficulty, their achievements and their latest submissions, read
+    with a fixed number of queries.
+    """
+    try:
+        return jsonify(build_dashboard(user_id, current_app.config['DASHBOARD_RECENT_SUBMISSIONS'])), 200
+    except Exception as e:
+        current_app.logger.error(f"Error fetching dashboard for user {user_id}: {str(e)}")
+        return jsonify({"error": "Failed to fetch dashboard"}), 500
+
 @progress_bp.route('/user/<user_id>/challenge/<int:challenge_id>', methods=['GET'])
 def get_challenge_progress(user_id, challenge_id):
     """
@@ -49,9 +81,25 @@ def get_challenge_progress(user_id, challenge_id):
 def update_challenge_progress(user_id, challenge_id):
     """
     Update a user's progress for a specific challenge
+    
+    The fields sent are checked like those of a bulk progress record.
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        for field, valid in SYNC_FIELDS.items():
+            if field in data and not valid(data[field]):
+                return jsonify({"error": f"Invalid {field}"}), 400
+        last_attempt_date = None
+        if 'last_attempt_date' in data:
+            try:
+                last_attempt_date = datetime.fromisoformat(data['last_attempt_date'])
+            except ValueError:
+                return jsonify({"error": "Invalid last_attempt_date"}), 400
+        
+        if Challenge.query.with_entities(Challenge.id).filter_by(id=challenge_id).first() is None:
+            return jsonify({"error": f"Challenge with ID {challenge_id} not found"}), 404
         
         # Check if a progress record already exists
         progress = UserProgress.query.filter_by(
@@ -72,6 +120,9 @@ def update_challenge_progress(user_id, challenge_id):
                 challenge_id=challenge_id
             )
             db.session.add(progress)
+            old_score, was_completed, old_updated_at = 0, False, None
+        else:
+            old_score, was_completed, old_updated_at = progress.score or 0, bool(progress.is_completed), progress.updated_at
         
         # Update fields if provided
         if 'attempts' in data:
@@ -81,15 +132,26 @@ def update_challenge_progress(user_id, challenge_id):
         if 'is_completed' in data:
             progress.is_completed = data['is_completed']
         if 'last_attempt_date' in data:
-            progress.last_attempt_date = data['last_attempt_date']
+            progress.last_attempt_date = last_attempt_date
+        
+        # Stamp the update explicitly so the in-memory leaderboards know which version they saw
+        now = datetime.utcnow()
+        progress.updated_at = now
+        
+        # Keep the leaderboard totals in step, in the same transaction
+        new_score = progress.score or 0
+        completed_delta = int(bool(progress.is_completed)) - int(was_completed)
+        record_progress(user_id, new_score - old_score, completed_delta, now)
         
         db.session.commit()
+        leaderboards.record(user_id, challenge_id, old_score, old_updated_at, new_score, now)
         
-        # Check for achievements that might be unlocked with this progress update
-        if progress.is_completed:
-            # This could trigger achievement unlock logic
-            # For now, we'll leave it as a placeholder
-            pass
+        # Unlock any achievements this update earned; the progress is already saved
+        try:
+            achievement_engine.process(user_id, challenge_id, completed_delta, new_score - old_score)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error unlocking achievements for user {user_id}: {str(e)}")
         
         return jsonify(progress.to_dict()), 200 if request.method == 'PUT' else 201
     except Exception as e:
@@ -97,14 +159,34 @@ def update_challenge_progress(user_id, challenge_id):
         current_app.logger.error(f"Error updating progress for user {user_id} on challenge {challenge_id}: {str(e)}")
         return jsonify({"error": "Failed to update challenge progress"}), 500
 
+@progress_bp.route('/bulk', methods=['POST'])
+def bulk_update_progress():
+    """
+    Create or update many progress records at once
+    
+    Expects ``{"records": [{"user_id": ..., "challenge_id": ..., "score": ...}, ...]}``.
+    Each record may set attempts, score, is_completed and last_attempt_date;
+    fields left out keep their current value (or the default for a new
+    record). Records are applied as upserts, so clients need not know
+    whether a record exists.
+    """
+    try:
+        records = parse_records(request.get_json(silent=True))
+        return jsonify(apply_progress(records)), 200
+    except ProgressSyncError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error applying bulk progress update: {str(e)}")
+        return jsonify({"error": "Failed to apply progress records"}), 500
+
 @progress_bp.route('/achievements/<user_id>', methods=['GET'])
 def get_user_achievements(user_id):
     """
     Get all achievements for a user
     """
     try:
-        achievements = Achievement.query.filter_by(user_id=user_id).all()
-        return jsonify([achievement.to_dict() for achievement in achievements]), 200
+        achievements = db.session.query(*Achievement.columns()).filter(Achievement.user_id == user_id)
+        return jsonify([achievement._asdict() for achievement in achievements]), 200
     except Exception as e:
         current_app.logger.error(f"Error fetching achievements for user {user_id}: {str(e)}")
         return jsonify({"error": "Failed to fetch achievements"}), 500
@@ -113,21 +195,58 @@ def get_user_achievements(user_id):
 def get_leaderboard():
     """
     Get a leaderboard of users based on their progress
+    
+    Returns the top ``limit`` users; when more follow, the X-Next-Cursor
+    header holds the cursor for the next page. With ``user_id`` the user's
+    own entry is returned with ``around`` users on each side instead
+    (404 if the user is not on the leaderboard).
+    
+    ``window=weekly|monthly`` ranks the scores of progress updated this
+    week or month, and ``challenge_id`` ranks the scores on one challenge.
+    Those leaderboards are served from memory; the all-time leaderboard is
+    read from the user_stats table. There the first page is an index seek,
+    but ranks on later pages and with ``user_id`` come from counting the
+    users ahead on the rank index, so those requests cost O(rank).
     """
     try:
-        # This would typically be a more complex query that aggregates user progress
-        # For simplicity, we'll use a placeholder that returns mock data
-        
-        # In a real implementation, you'd query the database for this information
-        leaderboard = [
-            {"user_id": "user1", "username": "MathWizard", "total_score": 850, "challenges_completed": 8, "rank": 1},
-            {"user_id": "user2", "username": "BlockBuilder", "total_score": 720, "challenges_completed": 7, "rank": 2},
-            {"user_id": "user3", "username": "MinecraftMaster", "total_score": 650, "challenges_completed": 6, "rank": 3},
-            # More entries would be here
-        ]
-        
-        return jsonify(leaderboard), 200
+        window = request.args.get('window', 'all')
+        challenge_id = request.args.get('challenge_id', type=int)
+        if window != 'all' and window not in WINDOWS:
+            return jsonify({"error": f"window must be one of: all, {', '.join(WINDOWS)}"}), 400
+        if window != 'all' and challenge_id is not None:
+            return jsonify({"error": "window and challenge_id cannot be combined"}), 400
+        
+        in_memory = window != 'all' or challenge_id is not None
+        board = {"window": window if window != 'all' else None, "challenge_id": challenge_id}
+        if in_memory:
+            leaderboards.ensure_current(current_app.config['LEADERBOARD_REBUILD_INTERVAL'])
+        
+        user_id = request.args.get('user_id')
+        if user_id:
+            neighbours = request.args.get('around', '5')
+            if not neighbours.isdigit():
+                return jsonify({"error": "around must be a non-negative integer"}), 400
+            neighbours = min(int(neighbours), current_app.config['MAX_PAGE_SIZE'] // 2)
+            entries = leaderboards.around(user_id, neighbours, **board) if in_memory else around(user_id, neighbours)
+            if entries is None:
+                return jsonify({"error": "User is not on the leaderboard"}), 404
+            return jsonify(entries), 200
+        
+        limit = parse_limit(request.args.get('limit'), 10, current_app.config['MAX_PAGE_SIZE'])
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor, int, str) if cursor else None
+        if in_memory:
+            entries, has_more = leaderboards.top(limit, after, **board)
+        else:
+            entries, has_more = top(limit, after)
+        
+        response = jsonify(entries)
+        if has_more:
+            last = entries[-1]
+            response.headers['X-Next-Cursor'] = encode_cursor(last["score" if in_memory else "total_score"], last["user_id"])
+        return response, 200
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Error generating leaderboard: {str(e)}")
         return jsonify({"error": "Failed to generate leaderboard"}), 500
-
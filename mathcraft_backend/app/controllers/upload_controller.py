@@ -1,9 +1,21 @@
-import os
-import uuid
-from flask import Blueprint, request, jsonify, current_app, send_from_directory
+from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, current_app, send_from_directory, send_file, \
+    stream_with_context, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
+from sqlalchemy import Row, tuple_
 from werkzeug.utils import secure_filename
-from app.services.validation_service import validate_minecraft_build
+from app.services.storage_service import BLOB_NAME, get_blob_store, blob_name, add_reference
+from app.services.result_cache_service import result_cache
+from app.services.criteria_service import plan_cache
+from app.services.job_service import validation_queue
+from app.services.batch_service import BatchError, store_batch, stream_batch_results
+from app.services.chunked_upload_service import ChunkedUploadError, chunk_assembler
+from app.services.ai_client_service import get_validation_client
+from app.services.pagination_service import PaginationError, encode_cursor, decode_cursor, parse_limit, parse_fields
+from app.services.streaming_service import stream_query
 from app.models.submission import Submission
+from app.models.validation_job import ValidationJob
+from app.models.upload_session import UploadSession
 from app import db
 
 # Create a Blueprint for file upload routes
@@ -16,6 +28,90 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
+def use_async_validation():
+    """
+    Check if this upload should be validated in the background
+
+    Background jobs run local validation only, so uploads are validated in
+    the request when the external validation service is enabled.
+    """
+    if current_app.config.get('USE_EXTERNAL_AI_VALIDATION', False):
+        return False
+    return current_app.config['ASYNC_VALIDATION'] or \
+           request.values.get('async', '').lower() in ('1', 'true')
+
+def submit_stored_build(stored, original_filename, challenge_id, user_id, use_async):
+    """
+    Validate a build that is already in the blob store and record the submission
+    
+    Args:
+        stored (tuple): (content hash, size, stored size, blob path) from the blob store
+        original_filename (str): Name of the uploaded file
+        challenge_id: ID of the challenge to validate against
+        user_id (str): ID of the submitting user
+        use_async (bool): Queue the validation (a queue slot must be reserved)
+        
+    Returns:
+        tuple: (Flask response, True if a background job was queued)
+    """
+    content_hash, size, stored_size, filepath = stored
+    stored_filename = blob_name(content_hash)
+    
+    # Hand the build to the worker pool unless an identical upload was already validated
+    if use_async:
+        plan = plan_cache.get(challenge_id)
+        if plan and result_cache.get(content_hash, plan.criteria_hash) is None:
+            submission = Submission(
+                file_path=stored_filename,
+                original_filename=original_filename,
+                challenge_id=challenge_id,
+                user_id=user_id,
+                content_hash=content_hash
+            )
+            db.session.add(submission)
+            add_reference(content_hash, size, stored_size)
+            db.session.flush()
+            
+            job = ValidationJob(submission.id)
+            db.session.add(job)
+            db.session.commit()
+            
+            validation_queue.submit(current_app._get_current_object(), job.id, filepath, plan, content_hash)
+            return (jsonify({
+                "message": "File successfully uploaded and queued for validation",
+                "filename": stored_filename,
+                "job_id": job.id,
+                "status_url": url_for('upload.get_job', job_id=job.id)
+            }), 202), True
+    
+    # Validate the Minecraft build against the challenge requirements
+    # (an identical earlier upload returns its cached result); the NumPy
+    # validation stack is only imported once a worker validates a build
+    from app.services.validation_service import validate_upload
+    validation_result, criteria_hash = validate_upload(filepath, challenge_id, content_hash)
+    
+    # Save submission to database
+    submission = Submission(
+        file_path=stored_filename,
+        original_filename=original_filename,
+        challenge_id=challenge_id,
+        user_id=user_id,
+        validation_result=validation_result,
+        content_hash=content_hash,
+        criteria_hash=criteria_hash
+    )
+    
+    db.session.add(submission)
+    add_reference(content_hash, size, stored_size)
+    db.session.commit()
+    
+    # Return validation results
+    return (jsonify({
+        "message": "File successfully uploaded and validated",
+        "filename": stored_filename,
+        "validation_result": validation_result
+    }), 201), False
+
 @upload_bp.route('/', methods=['POST'])
 def upload_file():
     """
@@ -34,11 +130,15 @@ def upload_file():
     if not allowed_file(file.filename):
         return jsonify({"error": "File type not allowed. Only .nbt files are accepted"}), 400
     
+    # Refuse new background work while the validation queue is full
+    use_async = use_async_validation()
+    if use_async and not validation_queue.reserve(current_app):
+        return jsonify({"error": "Too many builds are waiting for validation. Please try again shortly"}), 429
+    queued = False
+    
     try:
-        # Secure the filename and generate a unique name to prevent overwrites
+        # Secure the filename; the stored file is named after its content
         original_filename = secure_filename(file.filename)
-        file_extension = original_filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
         
         # Get challenge ID from form data
         challenge_id = request.form.get('challenge_id')
@@ -48,35 +148,210 @@ def upload_file():
         # Get user ID from form data (or use a placeholder for now)
         user_id = request.form.get('user_id', 'anonymous')
         
-        # Save the file to the upload folder
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(filepath)
+        # Save the file to the blob store, hashing it as it is written
+        # (identical content is only stored once)
+        stored = get_blob_store().save(file.stream)
+        response, queued = submit_stored_build(stored, original_filename, challenge_id, user_id, use_async)
+        return response
         
-        # Validate the Minecraft build against the challenge requirements
-        validation_result = validate_minecraft_build(filepath, challenge_id)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error uploading file: {str(e)}")
+        return jsonify({"error": "Failed to upload and process file"}), 500
+    finally:
+        if use_async and not queued:
+            validation_queue.release()
+
+@upload_bp.route('/batch', methods=['POST'])
+def upload_batch():
+    """
+    Handle a whole class's builds at once, as many .nbt files and/or zip archives
+    
+    Results are streamed as NDJSON, one line per file as its validation
+    completes, followed by a summary line once all submissions are saved.
+    """
+    request.max_content_length = current_app.config['BATCH_MAX_CONTENT_LENGTH']
+    
+    files = request.files.getlist('files')
+    if not files:
+        return jsonify({"error": "No files in the request"}), 400
+    
+    challenge_id = request.form.get('challenge_id')
+    if not challenge_id:
+        return jsonify({"error": "Challenge ID is required"}), 400
+    
+    try:
+        plan = plan_cache.get(challenge_id)
+        if not plan:
+            return jsonify({"error": f"Challenge with ID {challenge_id} not found"}), 404
         
-        # Save submission to database
-        submission = Submission(
-            file_path=unique_filename,
-            original_filename=original_filename,
-            challenge_id=challenge_id,
-            user_id=user_id,
-            validation_result=validation_result
-        )
+        entries = store_batch(files, request.form.get('user_id'))
+    except BatchError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error storing batch upload: {str(e)}")
+        return jsonify({"error": "Failed to upload batch"}), 500
+    
+    app = current_app._get_current_object()
+    
+    def generate():
+        for record in stream_batch_results(app, entries, plan, int(challenge_id)):
+            yield app.json.dumps(record) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@upload_bp.route('/sessions', methods=['POST'])
+def start_upload_session():
+    """
+    Start a resumable upload that is sent in numbered chunks
+    """
+    try:
+        data = request.get_json() or {}
+        
+        # Validate required fields
+        for field in ('challenge_id', 'filename'):
+            if field not in data:
+                return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        db.session.add(submission)
-        db.session.commit()
+        if not allowed_file(data['filename']):
+            return jsonify({"error": "File type not allowed. Only .nbt files are accepted"}), 400
         
-        # Return validation results
-        return jsonify({
-            "message": "File successfully uploaded and validated",
-            "filename": unique_filename,
-            "validation_result": validation_result
-        }), 201
+        session = chunk_assembler.start(
+            int(data['challenge_id']),
+            data.get('user_id', 'anonymous'),
+            secure_filename(data['filename']),
+            data.get('total_size')
+        )
         
+        result = session.to_dict()
+        result['chunk_size'] = current_app.config['UPLOAD_CHUNK_SIZE']
+        return jsonify(result), 201
+    except ChunkedUploadError as e:
+        return jsonify({"error": str(e)}), e.status_code
     except Exception as e:
-        current_app.logger.error(f"Error uploading file: {str(e)}")
+        db.session.rollback()
+        current_app.logger.error(f"Error starting upload session: {str(e)}")
+        return jsonify({"error": "Failed to start upload"}), 500
+
+@upload_bp.route('/sessions/<session_id>', methods=['GET'])
+def get_upload_session(session_id):
+    """
+    Get the progress of a resumable upload, e.g. to find the chunk to resume from
+    """
+    session = UploadSession.query.get(session_id)
+    if not session:
+        return jsonify({"error": "Upload session not found"}), 404
+    
+    return jsonify(session.to_dict()), 200
+
+@upload_bp.route('/sessions/<session_id>/chunks/<int:number>', methods=['PUT'])
+def upload_chunk(session_id, number):
+    """
+    Append one chunk to a resumable upload
+    
+    The raw chunk is the request body and its SHA-256 hex digest is sent in
+    the X-Chunk-Checksum header.
+    """
+    request.max_content_length = current_app.config['UPLOAD_CHUNK_SIZE']
+    
+    checksum = request.headers.get('X-Chunk-Checksum', '').lower()
+    if not checksum:
+        return jsonify({"error": "X-Chunk-Checksum header is required"}), 400
+    
+    try:
+        session = UploadSession.query.get(session_id)
+        if not session:
+            return jsonify({"error": "Upload session not found"}), 404
+        
+        session = chunk_assembler.write_chunk(session, number, request.get_data(), checksum)
+        return jsonify(session.to_dict()), 200
+    except ChunkedUploadError as e:
+        return jsonify({"error": str(e)}), e.status_code
+    except RequestEntityTooLarge:
+        return jsonify({"error": f"Chunks may be at most {current_app.config['UPLOAD_CHUNK_SIZE']} bytes"}), 413
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error uploading chunk {number} of {session_id}: {str(e)}")
+        return jsonify({"error": "Failed to upload chunk"}), 500
+
+@upload_bp.route('/sessions/<session_id>/complete', methods=['POST'])
+def complete_upload_session(session_id):
+    """
+    Finish a resumable upload and validate the assembled build like a normal upload
+    """
+    session = UploadSession.query.get(session_id)
+    if not session:
+        return jsonify({"error": "Upload session not found"}), 404
+    
+    # Refuse new background work while the validation queue is full
+    use_async = use_async_validation()
+    if use_async and not validation_queue.reserve(current_app):
+        return jsonify({"error": "Too many builds are waiting for validation. Please try again shortly"}), 429
+    queued = False
+    
+    try:
+        stored = chunk_assembler.finish(session)
+        response, queued = submit_stored_build(
+            stored, session.original_filename, session.challenge_id, session.user_id, use_async
+        )
+        return response
+    except ChunkedUploadError as e:
+        return jsonify({"error": str(e)}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error completing upload {session_id}: {str(e)}")
         return jsonify({"error": "Failed to upload and process file"}), 500
+    finally:
+        if use_async and not queued:
+            validation_queue.release()
+
+@upload_bp.route('/sessions/<session_id>', methods=['DELETE'])
+def abort_upload_session(session_id):
+    """
+    Abandon a resumable upload and discard its chunks
+    """
+    try:
+        session = UploadSession.query.get(session_id)
+        if not session:
+            return jsonify({"error": "Upload session not found"}), 404
+        
+        chunk_assembler.abort(session)
+        return jsonify({"message": "Upload cancelled"}), 200
+    except ChunkedUploadError as e:
+        return jsonify({"error": str(e)}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error cancelling upload {session_id}: {str(e)}")
+        return jsonify({"error": "Failed to cancel upload"}), 500
+
+@upload_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Get the status of a background validation job, with its result once finished
+    """
+    try:
+        job = ValidationJob.query.get(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        
+        return jsonify(job.to_dict()), 200
+    except Exception as e:
+        current_app.logger.error(f"Error fetching job {job_id}: {str(e)}")
+        return jsonify({"error": "Failed to fetch job"}), 500
+
+@upload_bp.route('/cache-stats', methods=['GET'])
+def get_result_cache_stats():
+    """
+    Get hit/miss counters of the validation result cache
+    """
+    return jsonify(result_cache.stats()), 200
+
+@upload_bp.route('/validator-stats', methods=['GET'])
+def get_validator_stats():
+    """
+    Get the circuit breaker state and latency histograms of the external validation client
+    """
+    return jsonify(get_validation_client(current_app._get_current_object()).stats()), 200
 
 @upload_bp.route('/<filename>', methods=['GET'])
 def get_uploaded_file(filename):
@@ -84,6 +359,14 @@ def get_uploaded_file(filename):
     Retrieve an uploaded file
     """
     try:
+        match = BLOB_NAME.match(filename)
+        if match:
+            blob = get_blob_store().open(match.group(1))
+            if blob is None:
+                return jsonify({"error": "File not found"}), 404
+            return send_file(blob, mimetype='application/octet-stream', download_name=filename)
+        
+        # Files uploaded before the blob store was introduced
         return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
     except Exception as e:
         current_app.logger.error(f"Error retrieving file {filename}: {str(e)}")
@@ -92,24 +375,54 @@ def get_uploaded_file(filename):
 @upload_bp.route('/submissions', methods=['GET'])
 def get_submissions():
     """
-    Get all submissions, possibly filtered by user or challenge
+    Get submissions, possibly filtered by user or challenge, one page at a time
+    
+    Pages are ordered by (submitted_at, id), oldest first unless order=desc.
+    The page is streamed as a JSON list, or as NDJSON when the client
+    accepts application/x-ndjson; when more rows exist, the X-Next-Cursor
+    header holds the cursor for the next page. ``fields`` selects a
+    comma-separated subset of the submission fields (e.g. to leave out
+    validation_result).
     """
     try:
         user_id = request.args.get('user_id')
         challenge_id = request.args.get('challenge_id')
+        descending = request.args.get('order', 'asc') == 'desc'
+        limit = parse_limit(request.args.get('limit'), current_app.config['PAGE_SIZE'], current_app.config['MAX_PAGE_SIZE'])
+        fields = parse_fields(request.args.get('fields'), Submission.FIELDS)
         
-        query = Submission.query
+        # Select only the columns behind the requested fields, as rows rather than Submission objects
+        query = db.session.query(*Submission.columns(fields))
         
         if user_id:
-            query = query.filter_by(user_id=user_id)
+            query = query.filter(Submission.user_id == user_id)
         
         if challenge_id:
-            query = query.filter_by(challenge_id=challenge_id)
+            query = query.filter(Submission.challenge_id == challenge_id)
+        
+        # Continue after the last row of the previous page
+        sort_key = tuple_(Submission.submitted_at, Submission.id)
+        cursor = request.args.get('cursor')
+        if cursor:
+            submitted_at, submission_id = decode_cursor(cursor, datetime, int)
+            query = query.filter(sort_key < (submitted_at, submission_id) if descending
+                                 else sort_key > (submitted_at, submission_id))
         
-        submissions = query.all()
+        if descending:
+            query = query.order_by(Submission.submitted_at.desc(), Submission.id.desc())
+        else:
+            query = query.order_by(Submission.submitted_at, Submission.id)
         
-        return jsonify([submission.to_dict() for submission in submissions]), 200
+        # The headers go out before the rows, so look up the sort keys of the
+        # page's last row and the one after it from the index alone
+        headers = {}
+        boundary = query.with_entities(Submission.submitted_at, Submission.id).offset(limit - 1).limit(2).all()
+        if len(boundary) > 1:
+            headers['X-Next-Cursor'] = encode_cursor(*boundary[0])
+        
+        return stream_query(query.limit(limit), Row._asdict, headers=headers)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Error fetching submissions: {str(e)}")
         return jsonify({"error": "Failed to fetch submissions"}), 500
-
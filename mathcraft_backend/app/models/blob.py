@@ -0,0 +1,22 @@
+from datetime import datetime
+from app import db
+
+class Blob(db.Model):
+    """Model for one physically stored upload, shared by every submission with the same content"""
+    __tablename__ = 'blobs'
+
+    content_hash = db.Column(db.String(64), primary_key=True)  # BLAKE2b hex digest of the original bytes
+    size = db.Column(db.Integer, nullable=False)  # Size of the original upload in bytes
+    stored_size = db.Column(db.Integer, nullable=False)  # Size on disk after compression
+    refcount = db.Column(db.Integer, default=0)  # Number of submissions pointing at this blob
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __init__(self, content_hash, size, stored_size, refcount=0):
+        self.content_hash = content_hash
+        self.size = size
+        self.stored_size = stored_size
+        self.refcount = refcount
+        self.created_at = datetime.utcnow()
+    
+    def __repr__(self):
+        return f'<Blob: {self.content_hash[:12]} referenced {self.refcount} times>'
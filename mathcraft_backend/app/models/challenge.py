@@ -1,6 +1,6 @@
 from datetime import datetime
 from app import db
-from sqlalchemy.dialects.sqlite import JSON
+from app.models.types import JSON
 
 class Challenge(db.Model):
     """Model for math challenge cards"""
@@ -44,4 +44,10 @@ class Challenge(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+    
+    @classmethod
+    def columns(cls):
+        """Columns holding the to_dict fields, in order, for queries that return rows rather than challenges"""
+        return [cls.id, cls.title, cls.description, cls.difficulty, cls.criteria, cls.hints,
+                cls.image_url, cls.created_at, cls.updated_at]
 
@@ -1,6 +1,6 @@
 from datetime import datetime
 from app import db
-from sqlalchemy.dialects.sqlite import JSON
+from app.models.types import JSON
 
 class UserProgress(db.Model):
     """Model for tracking user progress on challenges"""
@@ -45,6 +45,45 @@ class UserProgress(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+    
+    @classmethod
+    def columns(cls):
+        """Columns giving the to_dict fields as row values, for queries that skip loading whole objects"""
+        return [cls.id, cls.user_id, cls.challenge_id, cls.attempts, cls.score, cls.is_completed,
+                cls.last_attempt_date, cls.created_at, cls.updated_at]
+
+
+class UserStats(db.Model):
+    """Model for a user's running totals across all challenges, used by the leaderboard"""
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.String(50), primary_key=True)
+    total_score = db.Column(db.Integer, nullable=False, default=0)
+    challenges_completed = db.Column(db.Integer, nullable=False, default=0)
+    last_activity = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Leaderboard order: highest score first, ties broken by user ID
+    __table_args__ = (
+        db.Index('ix_user_stats_rank', total_score.desc(), user_id),
+    )
+    
+    def __init__(self, user_id, total_score=0, challenges_completed=0, last_activity=None):
+        self.user_id = user_id
+        self.total_score = total_score
+        self.challenges_completed = challenges_completed
+        self.last_activity = last_activity or datetime.utcnow()
+    
+    def __repr__(self):
+        return f'<UserStats: User {self.user_id} with {self.total_score} points>'
+    
+    def to_dict(self):
+        """Convert stats to dictionary for JSON serialization"""
+        return {
+            'user_id': self.user_id,
+            'total_score': self.total_score,
+            'challenges_completed': self.challenges_completed,
+            'last_activity': self.last_activity.isoformat() if self.last_activity else None
+        }
 
 
 class Achievement(db.Model):
@@ -86,4 +125,9 @@ class Achievement(db.Model):
             'criteria': self.criteria,
             'date_earned': self.date_earned.isoformat() if self.date_earned else None
         }
+    
+    @classmethod
+    def columns(cls):
+        """Columns holding the to_dict fields, in order"""
+        return [cls.id, cls.user_id, cls.name, cls.description, cls.badge_url, cls.criteria, cls.date_earned]
 
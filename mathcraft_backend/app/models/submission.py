@@ -1,6 +1,6 @@
 from datetime import datetime
 from app import db
-from sqlalchemy.dialects.sqlite import JSON
+from app.models.types import JSON
 
 class Submission(db.Model):
     """Model for tracking user file submissions"""
@@ -13,30 +13,76 @@ class Submission(db.Model):
     original_filename = db.Column(db.String(255), nullable=False)  # Original file name
     validation_result = db.Column(JSON, nullable=True)  # Store validation results as JSON
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    content_hash = db.Column(db.String(64), nullable=True)  # BLAKE2b digest of the file content
+    criteria_hash = db.Column(db.String(64), nullable=True)  # With content_hash, the key of the cached validation result
     
-    def __init__(self, user_id, challenge_id, file_path, original_filename, validation_result=None):
+    # Composite indexes so filtered, time-ordered pages are index range scans
+    __table_args__ = (
+        db.Index('ix_submissions_user_submitted', 'user_id', 'submitted_at'),
+        db.Index('ix_submissions_challenge_submitted', 'challenge_id', 'submitted_at'),
+        db.Index('ix_submissions_submitted', 'submitted_at'),
+    )
+    
+    # Fields available to to_dict, and the columns each one reads
+    FIELDS = {
+        'id': ('id',),
+        'user_id': ('user_id',),
+        'challenge_id': ('challenge_id',),
+        'file_path': ('file_path',),
+        'original_filename': ('original_filename',),
+        'content_hash': ('content_hash',),
+        'validation_result': ('validation_result',),
+        'submitted_at': ('submitted_at',),
+        'is_successful': ('validation_result',),
+    }
+    
+    def __init__(self, user_id, challenge_id, file_path, original_filename, validation_result=None,
+                 content_hash=None, criteria_hash=None):
         self.user_id = user_id
         self.challenge_id = challenge_id
         self.file_path = file_path
         self.original_filename = original_filename
         self.validation_result = validation_result or {}
+        self.content_hash = content_hash
+        self.criteria_hash = criteria_hash
         self.submitted_at = datetime.utcnow()
     
     def __repr__(self):
         return f'<Submission: User {self.user_id} for Challenge {self.challenge_id} at {self.submitted_at}>'
     
-    def to_dict(self):
-        """Convert submission to dictionary for JSON serialization"""
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'challenge_id': self.challenge_id,
-            'file_path': self.file_path,
-            'original_filename': self.original_filename,
-            'validation_result': self.validation_result,
-            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
-            'is_successful': self.is_successful()
-        }
+    def to_dict(self, fields=None):
+        """
+        Convert submission to dictionary for JSON serialization
+        
+        Args:
+            fields (iterable): Names from FIELDS to include (default: all of them)
+        """
+        data = {}
+        for field in fields or self.FIELDS:
+            if field == 'submitted_at':
+                data[field] = self.submitted_at.isoformat() if self.submitted_at else None
+            elif field == 'is_successful':
+                data[field] = self.is_successful()
+            else:
+                data[field] = getattr(self, field)
+        return data
+    
+    @classmethod
+    def columns(cls, fields=None):
+        """
+        Columns giving the to_dict fields as row values, for queries that skip loading whole objects
+        
+        Args:
+            fields (iterable): Names from FIELDS to include (default: all of them)
+        """
+        columns = []
+        for field in fields or cls.FIELDS:
+            if field == 'is_successful':
+                success = cls.validation_result['success'].as_boolean()
+                columns.append(db.func.coalesce(success, False).label(field))
+            else:
+                columns.append(getattr(cls, field))
+        return columns
     
     def is_successful(self):
         """
@@ -0,0 +1,6 @@
+from sqlalchemy import JSON as GenericJSON
+from sqlalchemy.dialects.postgresql import JSONB
+
+# JSON column type that works on every backend: stored as JSON text on
+# SQLite and as JSONB on PostgreSQL
+JSON = GenericJSON().with_variant(JSONB(), 'postgresql')
@@ -0,0 +1,48 @@
+import uuid
+from datetime import datetime
+from app import db
+
+class UploadSession(db.Model):
+    """Model for a resumable upload sent in numbered chunks"""
+    __tablename__ = 'upload_sessions'
+
+    id = db.Column(db.String(32), primary_key=True)  # Random hex id handed to the client
+    challenge_id = db.Column(db.Integer, db.ForeignKey('challenges.id'), nullable=False)
+    user_id = db.Column(db.String(50), nullable=False)
+    original_filename = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.Integer, nullable=True)  # Size announced by the client, if any
+    received_bytes = db.Column(db.Integer, default=0)
+    next_chunk = db.Column(db.Integer, default=0)  # Number of the next chunk expected
+    last_chunk_checksum = db.Column(db.String(64), nullable=True)  # Lets a retried last chunk be acknowledged
+    status = db.Column(db.String(20), nullable=False, default='open')  # open or complete
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __init__(self, challenge_id, user_id, original_filename, total_size=None):
+        self.id = uuid.uuid4().hex
+        self.challenge_id = challenge_id
+        self.user_id = user_id
+        self.original_filename = original_filename
+        self.total_size = total_size
+        self.received_bytes = 0
+        self.next_chunk = 0
+        self.status = 'open'
+        self.created_at = datetime.utcnow()
+    
+    def __repr__(self):
+        return f'<UploadSession {self.id}: {self.received_bytes} bytes, next chunk {self.next_chunk}>'
+    
+    def to_dict(self):
+        """Convert upload session to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'challenge_id': self.challenge_id,
+            'user_id': self.user_id,
+            'original_filename': self.original_filename,
+            'total_size': self.total_size,
+            'received_bytes': self.received_bytes,
+            'next_chunk': self.next_chunk,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,40 @@
+import uuid
+from datetime import datetime
+from app import db
+
+class ValidationJob(db.Model):
+    """Model for tracking a submission validated in the background"""
+    __tablename__ = 'validation_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)  # Random hex id handed to the client
+    submission_id = db.Column(db.Integer, db.ForeignKey('submissions.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, done or failed
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    # Relationship
+    submission = db.relationship('Submission', lazy=True)
+    
+    def __init__(self, submission_id):
+        self.id = uuid.uuid4().hex
+        self.submission_id = submission_id
+        self.status = 'queued'
+        self.created_at = datetime.utcnow()
+    
+    def __repr__(self):
+        return f'<ValidationJob {self.id}: {self.status}>'
+    
+    def to_dict(self):
+        """Convert job to dictionary for JSON serialization"""
+        data = {
+            'id': self.id,
+            'submission_id': self.submission_id,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+        if self.status != 'queued':
+            data['validation_result'] = self.submission.validation_result
+        return data
@@ -0,0 +1,27 @@
+from datetime import datetime
+from app import db
+from app.models.types import JSON
+
+class ValidationResult(db.Model):
+    """Model for validation results memoised by file content and challenge criteria"""
+    __tablename__ = 'validation_results'
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False)  # BLAKE2b hex digest of the uploaded file
+    criteria_hash = db.Column(db.String(64), nullable=False)  # BLAKE2b hex digest of the challenge criteria
+    result = db.Column(JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # One cached result per file content per criteria version
+    __table_args__ = (
+        db.UniqueConstraint('content_hash', 'criteria_hash', name='unique_content_criteria'),
+    )
+    
+    def __init__(self, content_hash, criteria_hash, result):
+        self.content_hash = content_hash
+        self.criteria_hash = criteria_hash
+        self.result = result
+        self.created_at = datetime.utcnow()
+    
+    def __repr__(self):
+        return f'<ValidationResult: {self.content_hash[:12]} for criteria {self.criteria_hash[:12]}>'
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Benchmark for worker cold start
+Starts fresh Python processes that load the development entry point (run.py)
+or the WSGI module (wsgi.py) against the same scratch SQLite database and
+reports the time until the app is ready and the first request is answered
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+# Directory holding run.py and wsgi.py
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Run in each fresh process; the last line of output holds its timings
+PROBE = """
+import sys, json, time
+started = time.perf_counter()
+import {module} as entry
+ready = time.perf_counter()
+modules = len(sys.modules)
+response = entry.app.test_client().get('/api/challenges/')
+assert response.status_code == 200, response.status_code
+answered = time.perf_counter()
+loaded = sorted(name for name in ('numpy', 'scipy', 'requests') if name in sys.modules)
+import requests, app.services.validation_service, app.services.shape_service, app.services.symmetry_service
+import app.services.fraction_service, app.services.relationship_service
+deferred = time.perf_counter()
+print(json.dumps({{"ready": ready - started, "first_request": answered - ready,
+                  "deferred": deferred - answered, "modules": modules, "loaded": loaded}}))
+"""
+
+def prepare(env):
+    """Create the schema and sample data in the scratch database"""
+    script = ("from app import create_app, db\n"
+              "from app.scripts import init_db\n"
+              "app = create_app('prod')\n"
+              "with app.app_context():\n"
+              "    db.create_all()\n"
+              "    init_db.add_sample_challenges()\n"
+              "    init_db.add_sample_users_and_progress()\n")
+    subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def start(module, env):
+    """Time one cold start of ``module`` in a new interpreter"""
+    output = subprocess.run([sys.executable, '-c', PROBE.format(module=module)], cwd=BACKEND_DIR, env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, FLASK_ENV='prod', PROD_DATABASE_URI=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        prepare(env)
+
+        results = {label: [start(module, env) for _ in range(args.runs)]
+                   for label, module in (('run.py', 'run'), ('wsgi.py', 'wsgi'))}
+
+    print(f"median of {args.runs} cold starts (ms)")
+    print(f"{'entry point':12s} {'ready':>8s} {'first req':>10s} {'modules':>8s}  heavy modules loaded")
+    for label, runs in results.items():
+        ready = statistics.median(run['ready'] for run in runs)
+        first_request = statistics.median(run['first_request'] for run in runs)
+        print(f"{label:12s} {ready * 1000:8.0f} {first_request * 1000:10.1f} "
+              f"{runs[0]['modules']:8d}  {', '.join(runs[0]['loaded']) or '-'}")
+    deferred = statistics.median(run['deferred'] for run in results['wsgi.py'])
+    print(f"wsgi.py defers {deferred * 1000:.0f} ms of imports (validation stack, HTTP client) to the first upload")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Benchmark for list responses
+Fills a scratch SQLite database with 10,000 challenges, submissions and
+progress rows and compares building their JSON the old way (whole ORM
+objects, to_dict and the standard library encoder) with column-projected
+rows and the orjson provider
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path so we can import app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+def populate(db, Challenge, Submission, UserProgress, rows):
+    """Insert ``rows`` challenges, then a submission and a progress record for each of them"""
+    now = datetime.utcnow()
+    db.session.execute(Challenge.__table__.insert(), [{
+        "title": f"Challenge {number}", "description": "Build a structure whose area is twice its perimeter",
+        "difficulty": ("easy", "medium", "hard")[number % 3],
+        "criteria": {"min_blocks": 20, "required_blocks": {"minecraft:stone": 10}},
+        "hints": ["Start with the base", "Count the edge blocks"], "image_url": f"/static/images/challenges/{number}.png",
+        "created_at": now, "updated_at": now
+    } for number in range(rows)])
+    db.session.execute(Submission.__table__.insert(), [{
+        "user_id": "bench", "challenge_id": 1 + number, "file_path": f"{number:064x}.nbt",
+        "original_filename": f"build{number}.nbt", "content_hash": f"{number:064x}",
+        "validation_result": {
+            "success": number % 3 == 0, "score": number % 101,
+            "feedback": ["Not enough minecraft:glass blocks. Required: 10, Found: 4", "Build is symmetric"],
+            "details": {"build_size": {"width": 9, "height": 6, "depth": 9}}
+        },
+        "submitted_at": now - timedelta(seconds=number)
+    } for number in range(rows)])
+    db.session.execute(UserProgress.__table__.insert(), [{
+        "user_id": "bench", "challenge_id": 1 + number, "attempts": number % 7, "score": number % 101,
+        "is_completed": number % 2 == 0, "last_attempt_date": now, "created_at": now, "updated_at": now
+    } for number in range(rows)])
+    db.session.commit()
+
+def timed(function, repeat):
+    """Best time of ``repeat`` calls, in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e3
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The test configuration reads its database URI when the app package is imported
+        os.environ['TEST_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from flask.json.provider import DefaultJSONProvider
+        from app import create_app, db
+        from app.models.challenge import Challenge
+        from app.models.submission import Submission
+        from app.models.progress import UserProgress
+        from app.services import json_service
+
+        app = create_app('test')
+        app.config['MAX_PAGE_SIZE'] = args.rows
+        stdlib = DefaultJSONProvider(app)
+        fast = app.json
+        client = app.test_client()
+
+        with app.app_context():
+            db.create_all()
+            populate(db, Challenge, Submission, UserProgress, args.rows)
+
+            def objects(model):
+                # Expire the identity map so every run loads the objects afresh
+                db.session.expire_all()
+                return [item.to_dict() for item in model.query.order_by(model.id)]
+
+            def rows(model):
+                return [row._asdict() for row in db.session.query(*model.columns()).order_by(model.id)]
+
+            results = []
+            for label, model in (('challenges', Challenge), ('submissions', Submission), ('progress', UserProgress)):
+                results.append((label, {
+                    'before': timed(lambda: stdlib.dumps(objects(model)), args.repeat),
+                    'objects + orjson': timed(lambda: fast.dumps(objects(model)), args.repeat),
+                    'rows + stdlib': timed(lambda: DefaultJSONProvider.dumps(fast, rows(model)), args.repeat),
+                    'after': timed(lambda: fast.dumps(rows(model)), args.repeat)
+                }))
+
+        # Whole requests; the catalogue is served from its cache after the first one
+        requests = {
+            'GET /api/challenges/': '/api/challenges/',
+            'GET /api/uploads/submissions': f'/api/uploads/submissions?limit={args.rows}',
+            'GET /api/progress/user/<id>': '/api/progress/user/bench'
+        }
+        endpoints = {path: timed(lambda: client.get(url).get_data(), args.repeat) for path, url in requests.items()}
+
+    print(f"rows per response: {args.rows:,}; encoder: {'orjson' if json_service.orjson else 'standard library'}")
+    for label, timings in results:
+        before = timings['before']
+        print(f"{label}:")
+        for name, elapsed in timings.items():
+            print(f"  {name:18s} {elapsed:8.1f} ms  ({before / elapsed:4.1f}x)")
+    for path, elapsed in endpoints.items():
+        print(f"{path:30s} {elapsed:8.1f} ms end to end")
+
+if __name__ == "__main__":
+    main()
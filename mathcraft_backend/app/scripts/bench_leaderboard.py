@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Benchmark for the in-memory leaderboards
+Fills a scratch SQLite database with synthetic UserProgress rows and reports
+rebuild time, peak Python memory and the latency of top-K and rank queries
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path so we can import app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+def populate(db, UserProgress, users, challenges, seed=0):
+    """
+    Insert one progress row per user and challenge
+
+    Scores are random and about a third of the rows were updated within the
+    last two weeks, so the windowed leaderboards are not empty.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    table = UserProgress.__table__
+    batch = []
+    for user in range(users):
+        user_id = f"user{user:06d}"
+        for challenge in range(1, challenges + 1):
+            score = rng.randrange(0, 101)
+            updated_at = now - timedelta(days=rng.random() * 42)
+            batch.append({
+                "user_id": user_id, "challenge_id": challenge, "attempts": 1, "score": score,
+                "is_completed": score >= 50, "last_attempt_date": updated_at,
+                "created_at": updated_at, "updated_at": updated_at
+            })
+        if len(batch) >= 50000:
+            db.session.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+    db.session.commit()
+
+def timed(function, repeat):
+    """Best time of ``repeat`` calls, in microseconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--challenges', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The test configuration reads its database URI when the app package is imported
+        os.environ['TEST_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from app import create_app, db
+        from app.models.progress import UserProgress
+        from app.services.ranking_service import Leaderboards
+
+        app = create_app('test')
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            populate(db, UserProgress, args.users, args.challenges)
+            populate_time = time.perf_counter() - start
+
+            boards = Leaderboards()
+            start = time.perf_counter()
+            rows = boards.rebuild()
+            rebuild_time = time.perf_counter() - start
+
+            tracemalloc.start()
+            boards = Leaderboards()
+            boards.rebuild()
+            resident, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            db.session.remove()
+
+        user_ids = [f"user{random.randrange(args.users):06d}" for _ in range(args.repeat)]
+        picks = iter(user_ids * 4)
+        top_time = timed(lambda: boards.top(10, challenge_id=1), args.repeat)
+        first_page, _ = boards.top(50, window='monthly')
+        after = (first_page[-1]["score"], first_page[-1]["user_id"])
+        page_time = timed(lambda: boards.top(50, after=after, window='monthly'), args.repeat)
+        around_time = timed(lambda: boards.around(next(picks), 5, challenge_id=25), args.repeat)
+        update_time = timed(lambda: boards.record(next(picks), 7, 10, None, random.randrange(101), datetime.utcnow()), args.repeat)
+
+    print(f"progress rows:      {rows:,} ({args.users:,} users x {args.challenges} challenges)")
+    print(f"populate:           {populate_time:.1f} s")
+    print(f"rebuild:            {rebuild_time:.2f} s")
+    print(f"memory:             {resident / 2**20:.0f} MiB held, {peak / 2**20:.0f} MiB peak during rebuild")
+    print(f"top 10:             {top_time:.0f} us")
+    print(f"page of 50:         {page_time:.0f} us")
+    print(f"rank + neighbours:  {around_time:.0f} us")
+    print(f"progress update:    {update_time:.0f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Microbenchmark for the streaming NBT structure decoder
+Generates a synthetic structure file close to the upload size limit and
+reports parse time and peak Python/NumPy memory
+"""
+
+import os
+import sys
+import gzip
+import time
+import struct
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+
+# Add the parent directory to the path so we can import app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.services.nbt_service import read_structure_file
+
+def _name(value):
+    encoded = value.encode('utf-8')
+    return struct.pack('>H', len(encoded)) + encoded
+
+def write_structure(path, palette, states, positions, size, entity_count=0, tile_entity_every=0):
+    """
+    Write a gzip compressed structure file
+
+    Args:
+        path (str): Destination file
+        palette (list): Block ids
+        states (np.ndarray): Palette index per block
+        positions (np.ndarray): (n, 3) block positions
+        size (tuple): (x, y, z) structure size
+        entity_count (int): Number of dummy entities to include
+        tile_entity_every (int): Attach dummy tile entity data to every n-th block
+    """
+    with gzip.open(path, 'wb', compresslevel=6) as out:
+        out.write(b'\x0a' + _name(''))
+        out.write(b'\x03' + _name('DataVersion') + struct.pack('>i', 3465))
+        out.write(b'\x09' + _name('size') + struct.pack('>bi3i', 3, 3, *size))
+
+        out.write(b'\x09' + _name('palette') + struct.pack('>bi', 10, len(palette)))
+        for block_id in palette:
+            out.write(b'\x08' + _name('Name') + _name(block_id) + b'\x00')
+
+        count = len(states)
+        out.write(b'\x09' + _name('blocks') + struct.pack('>bi', 10, count))
+        head = b'\x09' + _name('pos') + struct.pack('>bi', 3, 3)
+        tail = b'\x03' + _name('state')
+        records = np.empty((count, len(head) + 12 + len(tail) + 4 + 1), dtype=np.uint8)
+        records[:, :len(head)] = np.frombuffer(head, dtype=np.uint8)
+        records[:, len(head):len(head) + 12] = positions.astype('>i4').view(np.uint8).reshape(count, 12)
+        offset = len(head) + 12
+        records[:, offset:offset + len(tail)] = np.frombuffer(tail, dtype=np.uint8)
+        records[:, offset + len(tail):offset + len(tail) + 4] = \
+            states.astype('>i4').view(np.uint8).reshape(count, 4)
+        records[:, -1] = 0
+        tile_entity = (b'\x0a' + _name('nbt') + b'\x08' + _name('id') + _name('minecraft:chest')
+                       + b'\x09' + _name('Items') + struct.pack('>bi', 1, 27) + bytes(27) + b'\x00')
+        previous = 0
+        if tile_entity_every:
+            # Every n-th block carries tile entity data and takes the slow decode path
+            for index in range(tile_entity_every - 1, count, tile_entity_every):
+                out.write(records[previous:index].tobytes())
+                out.write(records[index, :-1].tobytes() + tile_entity + b'\x00')
+                previous = index + 1
+        out.write(records[previous:].tobytes())
+        out.write(b'\x09' + _name('entities') + struct.pack('>bi', 10, entity_count))
+        for _ in range(entity_count):
+            out.write(b'\x0a' + _name('nbt') + b'\x08' + _name('id') + _name('minecraft:pig')
+                      + b'\x09' + _name('Motion') + struct.pack('>bi3d', 6, 3, 0, 0, 0) + b'\x00\x00')
+        out.write(b'\x00')
+
+def make_build(width, height, depth, palette_size=64, seed=0):
+    """Create a dense random build of the given dimensions"""
+    rng = np.random.default_rng(seed)
+    y, z, x = np.indices((height, depth, width)).reshape(3, -1)
+    positions = np.stack([x, y, z], axis=1).astype(np.int32)
+    states = rng.integers(0, palette_size, size=len(positions), dtype=np.int32)
+    palette = [f'minecraft:block_{i}' for i in range(palette_size)]
+    return palette, states, positions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--width', type=int, default=160)
+    parser.add_argument('--height', type=int, default=96)
+    parser.add_argument('--depth', type=int, default=160)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    palette, states, positions = make_build(args.width, args.height, args.depth)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.nbt')
+        write_structure(path, palette, states, positions, (args.width, args.height, args.depth),
+                        entity_count=2000, tile_entity_every=5000)
+        del states, positions
+        file_size = os.path.getsize(path)
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            structure = read_structure_file(path)
+            timings.append(time.perf_counter() - start)
+            del structure
+
+        tracemalloc.start()
+        structure = read_structure_file(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"file size:     {file_size / 2**20:.1f} MiB (gzip)")
+    print(f"blocks:        {len(structure.states):,}")
+    print(f"entities:      {structure.entity_count:,}")
+    print(f"best parse:    {min(timings) * 1000:.0f} ms")
+    print(f"peak memory:   {peak / 2**20:.1f} MiB "
+          f"(output arrays {(structure.states.nbytes + structure.positions.nbytes) / 2**20:.1f} MiB)")
+
+if __name__ == "__main__":
+    main()
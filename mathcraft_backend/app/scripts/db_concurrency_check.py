@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Concurrency check for the SQLite database settings
+Runs parallel writers and readers against a scratch database, once with
+SQLite's defaults and once with the production pragmas and pool options,
+and reports how many requests failed (e.g. with "database is locked")
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+# Add the parent directory to the path so we can import app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import create_app, db
+from app.config import config_by_name, TestingConfig, ProductionConfig
+from app.models.challenge import Challenge
+from app.models.submission import Submission
+
+def make_config(name, database_uri, tuned):
+    """Testing configuration on a scratch database, with or without the production tuning"""
+    # Small streaming chunks keep the reader's cursor open across many writes
+    settings = {'SQLALCHEMY_DATABASE_URI': database_uri, 'STREAM_CHUNK_SIZE': 50}
+    if tuned:
+        settings['SQLITE_PRAGMAS'] = ProductionConfig.SQLITE_PRAGMAS
+        settings['SQLALCHEMY_ENGINE_OPTIONS'] = ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS
+    config_by_name[name] = type(name, (TestingConfig,), settings)
+    return name
+
+def worker(config_name, worker_id, requests, results):
+    """
+    One client process: writes progress while streaming submissions
+
+    Each process runs its own app and connection pool, as a WSGI worker
+    would, with a slow streaming reader alongside the writer, like a
+    client downloading a long submission list over a slow connection.
+    """
+    # Failures are counted below; the application's error logs would only repeat them
+    logging.disable(logging.CRITICAL)
+    app = create_app(config_name)
+    client = app.test_client()
+    failures = []
+
+    def write():
+        for number in range(requests):
+            user_id = f"w{worker_id}-{number % 5}"
+            challenge_id = 1 + number % 4
+            method = client.put if number >= 20 else client.post
+            response = method(f'/api/progress/user/{user_id}/challenge/{challenge_id}',
+                              json={'score': number, 'attempts': number, 'is_completed': number % 3 == 0})
+            if response.status_code >= 500:
+                failures.append(('write', response.status_code))
+            records = [{'user_id': f"b{worker_id}-{user}", 'challenge_id': 1 + user % 4, 'score': number}
+                       for user in range(20)]
+            response = client.post('/api/progress/bulk', json={'records': records})
+            if response.status_code >= 500:
+                failures.append(('bulk', response.status_code))
+
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            response = client.get('/api/uploads/submissions?limit=500', buffered=False)
+            rows = 0
+            for chunk in response.response:
+                rows += chunk.count(b'"id"')
+                time.sleep(0.05)
+            response.close()
+            if response.status_code >= 500 or rows < 500:
+                failures.append(('read', response.status_code))
+
+    writer = threading.Thread(target=write)
+    reader = threading.Thread(target=read)
+    writer.start()
+    reader.start()
+    writer.join()
+    done.set()
+    reader.join()
+    results.put(failures)
+
+def run(config_name, workers, requests):
+    """Run the workers in parallel and collect their failures"""
+    # Forked workers inherit the scratch configurations registered by make_config
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(config_name, index, requests, results))
+                 for index in range(workers)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    failures = [failure for _ in processes for failure in results.get()]
+    for process in processes:
+        process.join()
+    return failures, time.perf_counter() - start
+
+def prepare(config_name):
+    """Create the schema, the challenges progress refers to and submissions to stream"""
+    app = create_app(config_name)
+    with app.app_context():
+        db.create_all()
+        for number in range(4):
+            db.session.add(Challenge(f"Challenge {number}", "Concurrency check", "easy", {"min_blocks": 1}))
+        db.session.add_all(
+            Submission(f"user{number}", 1 + number % 4, f"build{number}.nbt", f"build{number}.nbt",
+                       {"success": True, "feedback": ["Looks good"]})
+            for number in range(1000)
+        )
+        db.session.commit()
+        db.engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    exit_code = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, tuned in (('sqlite defaults', False), ('production profile', True)):
+            name = 'concurrency-tuned' if tuned else 'concurrency-defaults'
+            make_config(name, f"sqlite:///{os.path.join(tmp, name + '.db')}", tuned)
+            prepare(name)
+            failures, elapsed = run(name, args.workers, args.requests)
+            kinds = {}
+            for kind, status in failures:
+                kinds[kind] = kinds.get(kind, 0) + 1
+            print(f"{label:20s} {len(failures):5d} failed requests {kinds or ''} in {elapsed:.1f} s")
+            if tuned and failures:
+                exit_code = 1
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Blob store maintenance script for MathCraft AI Challenge System
+Recounts blob references from Submission.file_path and deletes unreferenced blobs
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+# Add the parent directory to the path so we can import app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sqlalchemy import func
+from app import create_app, db
+from app.models.blob import Blob
+from app.models.submission import Submission
+from app.services.storage_service import BLOB_NAME, get_blob_store
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def recount_references():
+    """
+    Set every blob's refcount to the number of submissions pointing at it
+
+    Returns:
+        list: Content hashes of blobs that are no longer referenced
+    """
+    counts = {}
+    rows = db.session.query(Submission.file_path, func.count(Submission.id)).group_by(Submission.file_path)
+    for file_path, count in rows:
+        match = BLOB_NAME.match(file_path)
+        if match:
+            counts[match.group(1)] = count
+    
+    unreferenced = []
+    for blob in Blob.query.all():
+        blob.refcount = counts.get(blob.content_hash, 0)
+        if not blob.refcount:
+            unreferenced.append(blob.content_hash)
+    db.session.commit()
+    return unreferenced
+
+def delete_blobs(content_hashes, min_age):
+    """
+    Delete unreferenced blobs from the blobs table and from disk
+
+    Each row is deleted only while its refcount is still 0, and the file is
+    removed before that delete is committed, while the transaction keeps
+    uploads from adding a reference. A blob an upload stored or reused in
+    the last ``min_age`` seconds is kept along with its row: that upload may
+    not have committed its reference yet.
+
+    Args:
+        content_hashes (list): Blobs found unreferenced by the recount
+        min_age (float): Seconds since a blob was last stored or reused
+
+    Returns:
+        int: Number of blobs deleted
+    """
+    store = get_blob_store()
+    deleted = 0
+    for content_hash in content_hashes:
+        removed = Blob.query.filter_by(content_hash=content_hash, refcount=0).delete(synchronize_session=False)
+        if removed == 1 and store.delete(content_hash, min_age):
+            db.session.commit()
+            deleted += 1
+        else:
+            db.session.rollback()
+    return deleted
+
+def main():
+    """Main entry point for the script"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--min-age', type=float, default=3600,
+                        help="seconds since a blob was last stored or reused before it may be deleted")
+    args = parser.parse_args()
+    
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'dev'))
+        with app.app_context():
+            unreferenced = recount_references()
+            deleted = delete_blobs(unreferenced, args.min_age)
+        logger.info(f"Deleted {deleted} of {len(unreferenced)} unreferenced blobs")
+        return 0
+    except Exception as e:
+        logger.error(f"Blob garbage collection failed: {str(e)}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,6 +16,8 @@ from app import create_app, db
 from app.models.challenge import Challenge
 from app.models.progress import UserProgress, Achievement
 from app.models.submission import Submission
+from app.services.database_service import upgrade_schema
+from app.services.leaderboard_service import rebuild_user_stats, backfill_user_stats
 
 # Configure logging
 logging.basicConfig(
@@ -25,10 +27,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 def create_tables():
-    """Create all database tables"""
+    """Create all database tables, and upgrade tables made by older versions"""
     logger.info("Creating database tables...")
     try:
-        db.create_all()
+        upgrade_schema()
         logger.info("Database tables created successfully!")
     except Exception as e:
         logger.error(f"Error creating tables: {str(e)}")
@@ -241,6 +243,7 @@ def add_sample_users_and_progress():
             db.session.add(achievement)
         
         db.session.commit()
+        rebuild_user_stats()
         logger.info(f"Added sample progress data for {len(users)} users across {len(challenges)} challenges")
         logger.info(f"Added {len(achievements)} achievements for the first user")
     except Exception as e:
@@ -259,6 +262,7 @@ def main():
             create_tables()
             add_sample_challenges()
             add_sample_users_and_progress()
+            backfill_user_stats()
             
         logger.info("Database initialization completed successfully!")
         return 0
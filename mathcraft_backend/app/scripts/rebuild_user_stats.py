@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""
+Leaderboard maintenance script for MathCraft AI Challenge System
+Recomputes the user_stats totals from every UserProgress record
+"""
+
+import os
+import sys
+import logging
+
+# Add the parent directory to the path so we can import app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import create_app
+from app.services.database_service import upgrade_schema
+from app.services.leaderboard_service import rebuild_user_stats
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Main entry point for the script"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'dev'))
+        with app.app_context():
+            upgrade_schema()
+            users = rebuild_user_stats()
+        logger.info(f"Rebuilt leaderboard totals for {users} users")
+        return 0
+    except Exception as e:
+        logger.error(f"Leaderboard rebuild failed: {str(e)}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Stub of the external AI validation service for MathCraft AI Challenge System
+Answers POST requests with a canned validation result, optionally slowly or with errors,
+so the validation client's timeouts, retries and circuit breaker can be exercised locally
+"""
+
+import sys
+import gzip
+import json
+import time
+import random
+import logging
+import argparse
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def make_handler(delay=0.0, failure_rate=0.0, failure_status=503):
+    """
+    Build a request handler class with the given behaviour
+    
+    Args:
+        delay (float): Seconds to wait before answering
+        failure_rate (float): Share of requests answered with ``failure_status``
+        failure_status (int): HTTP status used for failed requests
+    """
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like a real service
+        
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(delay)
+            if random.random() < failure_rate:
+                self._reply(failure_status, {"error": "Stub failure"})
+                return
+            
+            if self.path.rstrip('/').endswith('/batch'):
+                self._reply(200, {"results": self._batch_results(body)})
+                return
+            
+            build = json.loads(body or b'{}').get("nbt_data", {})
+            self._reply(200, {
+                "success": True,
+                "feedback": ["Validated by the stub service."],
+                "score": 100,
+                "details": {"stub": True, "build_size": build.get("size")}
+            })
+        
+        def _batch_results(self, body):
+            """Answer a multipart batch: a JSON manifest plus one gzipped grid per build"""
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode('latin-1') + body
+            )
+            parts = {part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+                     for part in message.iter_parts()}
+            manifest = json.loads(parts['manifest'])
+            results = []
+            for build in manifest["builds"]:
+                grid = gzip.decompress(parts[f"grid-{build['id']}"])
+                itemsize = int(build["dtype"][-1])
+                solid = sum(1 for i in range(0, len(grid), itemsize) if any(grid[i:i + itemsize]))
+                results.append({
+                    "id": build["id"],
+                    "success": True,
+                    "feedback": ["Validated by the stub service."],
+                    "score": 100,
+                    "details": {"stub": True, "build_size": build["size"], "solid_blocks": solid,
+                                "criteria_received": build["criteria"] in manifest["criteria"]}
+                })
+            return results
+        
+        def _reply(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+    
+    return StubHandler
+
+def main():
+    """Main entry point for the script"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--delay', type=float, default=0.0, help="seconds before each answer")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="share of requests that fail")
+    parser.add_argument('--failure-status', type=int, default=503)
+    args = parser.parse_args()
+    
+    server = ThreadingHTTPServer(
+        ('127.0.0.1', args.port),
+        make_handler(args.delay, args.failure_rate, args.failure_status)
+    )
+    logger.info(f"Stub validation service listening on http://127.0.0.1:{args.port}/api/validate")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
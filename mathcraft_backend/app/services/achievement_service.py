@@ -0,0 +1,298 @@
+import time
+import logging
+import threading
+from datetime import datetime
+from collections import OrderedDict, defaultdict
+from flask import current_app
+from sqlalchemy import func
+from app.models.challenge import Challenge
+from app.models.progress import Achievement, UserProgress, UserStats
+from app.services.database_service import upsert_insert
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Progress events that can unlock achievements
+CHALLENGE_COMPLETED = 'challenge_completed'
+SCORE_CHANGED = 'score_changed'
+
+# Achievement rules; ``criteria`` is stored on the Achievement when it is unlocked
+ACHIEVEMENT_RULES = [
+    {
+        "name": "MathCraft Beginner",
+        "description": "Completed your first MathCraft challenge",
+        "badge_url": "/static/images/badges/beginner.png",
+        "criteria": {"type": "challenges_completed", "count": 1}
+    },
+    {
+        "name": "Challenge Enthusiast",
+        "description": "Completed 5 MathCraft challenges",
+        "badge_url": "/static/images/badges/enthusiast.png",
+        "criteria": {"type": "challenges_completed", "count": 5}
+    },
+    {
+        "name": "Easy Does It",
+        "description": "Completed every easy challenge",
+        "badge_url": "/static/images/badges/easy.png",
+        "criteria": {"type": "difficulty_completed", "difficulty": "easy"}
+    },
+    {
+        "name": "Middle Ground",
+        "description": "Completed every medium challenge",
+        "badge_url": "/static/images/badges/medium.png",
+        "criteria": {"type": "difficulty_completed", "difficulty": "medium"}
+    },
+    {
+        "name": "Hard Hitter",
+        "description": "Completed every hard challenge",
+        "badge_url": "/static/images/badges/hard.png",
+        "criteria": {"type": "difficulty_completed", "difficulty": "hard"}
+    },
+    {
+        "name": "High Scorer",
+        "description": "Scored 500 points across all challenges",
+        "badge_url": "/static/images/badges/high_scorer.png",
+        "criteria": {"type": "total_score", "points": 500}
+    }
+]
+
+
+def _challenges_completed(rule, counters, catalogue):
+    return counters.completed >= rule["criteria"]["count"]
+
+
+def _difficulty_completed(rule, counters, catalogue):
+    difficulty = rule["criteria"]["difficulty"]
+    total = catalogue.totals.get(difficulty, 0)
+    return total > 0 and counters.by_difficulty.get(difficulty, 0) >= total
+
+
+def _total_score(rule, counters, catalogue):
+    return counters.total_score >= rule["criteria"]["points"]
+
+
+# Rule type -> (events that can satisfy it, evaluator)
+RULE_TYPES = {
+    "challenges_completed": ((CHALLENGE_COMPLETED,), _challenges_completed),
+    "difficulty_completed": ((CHALLENGE_COMPLETED,), _difficulty_completed),
+    "total_score": ((SCORE_CHANGED,), _total_score)
+}
+
+
+class UserCounters:
+    """Per-user totals the achievement rules are evaluated against"""
+
+    def __init__(self, completed, total_score, by_difficulty, earned):
+        self.completed = completed
+        self.total_score = total_score
+        self.by_difficulty = by_difficulty
+        self.earned = earned
+
+
+class Catalogue:
+    """Difficulty of every challenge and the number of challenges per difficulty"""
+
+    def __init__(self, difficulties):
+        self.difficulties = difficulties
+        self.totals = defaultdict(int)
+        for difficulty in difficulties.values():
+            self.totals[difficulty] += 1
+
+
+class AchievementEngine:
+    """
+    Evaluates achievement rules on progress events
+
+    Rules are indexed by the events that can satisfy them, so an update only
+    evaluates the rules its events touch and skips those the user already
+    holds. Rules are checked against per-user counters kept in a bounded
+    LRU and updated from each event, completions per difficulty included
+    (the difficulty is looked up in the cached catalogue). A cached entry
+    is reloaded when its totals plus the change no longer agree with the
+    user's row in user_stats, e.g. after a write in another process.
+
+    The catalogue is cached like ``CatalogueCache``: writes through this
+    process invalidate it straight away, and changes made by other
+    processes are noticed by comparing the challenge table's fingerprint
+    at most every ``CATALOGUE_REVALIDATE_INTERVAL`` seconds. A changed
+    catalogue drops every cached user, since their difficulty counts may
+    refer to changed challenges.
+    """
+
+    def __init__(self, rules, max_users=10000):
+        self.rules = {rule["name"]: rule for rule in rules}
+        self._by_event = defaultdict(list)
+        for rule in rules:
+            events, _ = RULE_TYPES[rule["criteria"]["type"]]
+            for event in events:
+                self._by_event[event].append(rule)
+        self.max_users = max_users
+        self._counters = OrderedDict()
+        self._catalogue = None
+        self._fingerprint = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def invalidate_catalogue(self):
+        """Forget the cached challenge catalogue after challenges change"""
+        with self._lock:
+            self._catalogue = None
+            self._checked_at = None
+            # Difficulty counts of cached users may refer to changed challenges
+            self._counters.clear()
+
+    def _get_catalogue(self, interval):
+        now = time.monotonic()
+        if self._catalogue is not None and self._checked_at is not None and now - self._checked_at < interval:
+            return self._catalogue
+        fingerprint = tuple(db.session.query(func.count(Challenge.id), func.max(Challenge.updated_at)).one())
+        if self._catalogue is None or fingerprint != self._fingerprint:
+            if self._catalogue is not None:
+                self._counters.clear()
+            self._catalogue = Catalogue(dict(db.session.query(Challenge.id, Challenge.difficulty)))
+            self._fingerprint = fingerprint
+        self._checked_at = now
+        return self._catalogue
+
+    def _load(self, stats):
+        """
+        Read the counters of several users from the database
+
+        Args:
+            stats (dict): user_id -> ``UserStats`` row
+
+        Returns:
+            dict: user_id -> ``UserCounters``
+        """
+        user_ids = list(stats)
+        counters = {
+            user_id: UserCounters(row.challenges_completed, row.total_score, {}, set())
+            for user_id, row in stats.items()
+        }
+        by_difficulty = db.session.query(UserProgress.user_id, Challenge.difficulty, func.count(UserProgress.id)) \
+            .join(Challenge, Challenge.id == UserProgress.challenge_id) \
+            .filter(UserProgress.user_id.in_(user_ids), UserProgress.is_completed == True) \
+            .group_by(UserProgress.user_id, Challenge.difficulty)
+        for user_id, difficulty, count in by_difficulty:
+            counters[user_id].by_difficulty[difficulty] = count
+        earned = db.session.query(Achievement.user_id, Achievement.name).filter(Achievement.user_id.in_(user_ids))
+        for user_id, name in earned:
+            counters[user_id].earned.add(name)
+        return counters
+
+    def _get_counters(self, changes, stats, catalogue):
+        """
+        Counters of the changed users with the committed changes applied
+
+        A cached entry is reused only if its completed count and total score
+        plus the change match user_stats and the challenge is in the
+        catalogue; other users are reloaded.
+        """
+        counters = {}
+        for user_id, (challenge_id, completed_delta, score_delta) in changes.items():
+            cached = self._counters.get(user_id) if challenge_id is not None else None
+            row = stats[user_id]
+            if cached is None or cached.completed + completed_delta != row.challenges_completed \
+                    or cached.total_score + score_delta != row.total_score:
+                continue
+            difficulty = catalogue.difficulties.get(challenge_id)
+            if difficulty is None:
+                continue
+            if completed_delta:
+                cached.by_difficulty[difficulty] = cached.by_difficulty.get(difficulty, 0) + completed_delta
+            cached.completed = row.challenges_completed
+            cached.total_score = row.total_score
+            self._counters.move_to_end(user_id)
+            counters[user_id] = cached
+
+        missing = {user_id: row for user_id, row in stats.items() if user_id not in counters}
+        if missing:
+            loaded = self._load(missing)
+            counters.update(loaded)
+            self._counters.update(loaded)
+            while len(self._counters) > self.max_users:
+                self._counters.popitem(last=False)
+        return counters
+
+    def process(self, user_id, challenge_id, completed_delta, score_delta):
+        """
+        Unlock the achievements a committed progress update earned
+
+        Args:
+            user_id (str): ID of the user
+            challenge_id (int): ID of the challenge that was updated
+            completed_delta (int): 1 if the challenge was just completed,
+                -1 if it was marked incomplete again, otherwise 0
+            score_delta (int): Change in the user's score on the challenge
+
+        Returns:
+            list: Names of the achievements unlocked
+        """
+        return self.process_many({user_id: (challenge_id, completed_delta, score_delta)}).get(user_id, [])
+
+    def process_many(self, changes):
+        """
+        Unlock the achievements committed progress updates earned
+
+        Args:
+            changes (dict): user_id -> (challenge_id, completed_delta, score_delta).
+                After changes to several challenges of a user, pass None as
+                the challenge and the number of challenges newly completed;
+                that user's counters are then reloaded.
+
+        Returns:
+            dict: user_id -> names of the achievements unlocked
+        """
+        events = {}
+        for user_id, (_, completed_delta, score_delta) in changes.items():
+            user_events = []
+            if completed_delta > 0:
+                user_events.append(CHALLENGE_COMPLETED)
+            if score_delta:
+                user_events.append(SCORE_CHANGED)
+            if user_events:
+                events[user_id] = user_events
+        if not events:
+            # Cached counters that missed these changes are reloaded on the next event
+            return {}
+
+        with self._lock:
+            catalogue = self._get_catalogue(current_app.config['CATALOGUE_REVALIDATE_INTERVAL'])
+            stats = {row.user_id: row for row in UserStats.query.filter(UserStats.user_id.in_(list(events)))}
+            counters = self._get_counters({user_id: changes[user_id] for user_id in stats}, stats, catalogue)
+            unlocked = {}
+            for user_id, user_counters in counters.items():
+                for event in events[user_id]:
+                    for rule in self._by_event[event]:
+                        if rule["name"] in user_counters.earned or rule in unlocked.get(user_id, ()):
+                            continue
+                        _, evaluate = RULE_TYPES[rule["criteria"]["type"]]
+                        if evaluate(rule, user_counters, catalogue):
+                            unlocked.setdefault(user_id, []).append(rule)
+            if not unlocked:
+                return {}
+
+            # One statement for every unlock; the unique constraint makes repeats a no-op
+            now = datetime.utcnow()
+            statement = upsert_insert(Achievement).on_conflict_do_nothing(index_elements=['user_id', 'name'])
+            db.session.execute(statement, [{
+                "user_id": user_id,
+                "name": rule["name"],
+                "description": rule["description"],
+                "badge_url": rule["badge_url"],
+                "criteria": rule["criteria"],
+                "date_earned": now
+            } for user_id, rules in unlocked.items() for rule in rules])
+            db.session.commit()
+            for user_id, rules in unlocked.items():
+                counters[user_id].earned.update(rule["name"] for rule in rules)
+
+        names = {user_id: [rule["name"] for rule in rules] for user_id, rules in unlocked.items()}
+        logger.info(f"Unlocked {sum(len(user_names) for user_names in names.values())} achievements "
+                    f"for {len(names)} users")
+        return names
+
+
+# Shared engine used by the progress controller
+achievement_engine = AchievementEngine(ACHIEVEMENT_RULES)
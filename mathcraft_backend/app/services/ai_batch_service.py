@@ -0,0 +1,189 @@
+import gzip
+import json
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from app.services.ai_client_service import ExternalValidationError, get_validation_client
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def encode_volume(volume):
+    """
+    Compact binary encoding of a build for the external validator
+
+    The grid is cropped to the build's bounding box, stored as uint8 when
+    the palette allows it and gzip-compressed; only the palette and the
+    array layout travel as JSON.
+
+    Args:
+        volume (BuildVolume): Parsed build
+
+    Returns:
+        tuple: (JSON-serialisable header, compressed grid bytes)
+    """
+    import numpy as np
+    bounds = volume.bounding_box()
+    if bounds is None:
+        grid = np.zeros((0, 0, 0), dtype=np.uint8)
+        origin = (0, 0, 0)
+    else:
+        (y0, z0, x0), (y1, z1, x1) = bounds
+        grid = volume.grid[y0:y1, z0:z1, x0:x1]
+        origin = (y0, z0, x0)
+    if len(volume.palette) <= 256:
+        grid = grid.astype(np.uint8)
+
+    header = {
+        "size": volume.size,
+        "origin": {"x": origin[2], "y": origin[0], "z": origin[1]},
+        "shape": list(grid.shape),  # (height, depth, width)
+        "dtype": grid.dtype.str,  # e.g. "|u1" or "<u2"
+        "encoding": "gzip",
+        "palette": volume.palette,
+        "metadata": volume.metadata
+    }
+    return header, gzip.compress(np.ascontiguousarray(grid).tobytes(), compresslevel=6)
+
+
+class ValidationBatcher:
+    """
+    Coalesces external validation requests into batches
+
+    Builds submitted within ``window`` seconds of the first one (up to
+    ``max_batch``) are sent in one multipart request: a JSON ``manifest``
+    part listing every build and the criteria of each challenge once,
+    followed by one binary ``grid-<n>`` part per build. The service answers
+    with ``{"results": [{"id": ..., ...}]}``.
+
+    Up to ``senders`` batches are in flight at once, so a slow batch does
+    not hold up the ones collected after it. Each request must be over
+    ``max_wait`` seconds after its oldest build was queued, when that
+    build's caller stops waiting; builds whose callers cancelled their
+    futures are left out of the request.
+    """
+
+    def __init__(self, client, url, window, max_batch, senders=4):
+        self.client = client
+        self.url = url
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._senders = ThreadPoolExecutor(max_workers=senders, thread_name_prefix='validation-batch')
+
+    def submit(self, volume, plan):
+        """
+        Queue a build for the next batch
+
+        Args:
+            volume (BuildVolume): Parsed build
+            plan (ValidationPlan): Compiled criteria of the challenge
+
+        Returns:
+            Future: Resolves to the service's result for this build; cancel
+            it to drop the build if it has not been sent yet
+        """
+        future = Future()
+        header, grid = encode_volume(volume)
+        with self._condition:
+            self._pending.append((future, header, grid, plan, time.monotonic()))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='validation-batcher', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def max_wait(self):
+        """Longest time a caller should wait for a batched result, retries included"""
+        return self.window + self.client.deadline
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                self._pending = self._pending[self.max_batch:]
+            try:
+                self._senders.submit(self._send, batch)
+            except Exception as e:
+                self._fail(batch, e)
+
+    def _send(self, batch):
+        """Post one batch and resolve the futures of its builds"""
+        # Callers that stopped waiting cancelled their futures; their builds are not sent
+        batch = [entry for entry in batch if entry[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            manifest = {"criteria": {}, "builds": []}
+            files = []
+            for index, (_, header, grid, plan, _) in enumerate(batch):
+                manifest["criteria"].setdefault(plan.criteria_hash, plan.criteria)
+                manifest["builds"].append(dict(header, id=str(index), criteria=plan.criteria_hash))
+                files.append((f'grid-{index}', (f'{index}.bin', grid, 'application/octet-stream')))
+            files.insert(0, ('manifest', ('manifest.json', json.dumps(manifest), 'application/json')))
+
+            response = self.client.post(files=files, url=self.url, deadline=batch[0][4] + self.max_wait())
+            results = {str(result.get("id")): result for result in response.get("results", [])}
+            for index, (future, _, _, _, _) in enumerate(batch):
+                result = results.get(str(index))
+                if result is None:
+                    future.set_exception(ExternalValidationError("External validation service returned no result"))
+                else:
+                    result.pop("id", None)
+                    future.set_result(result)
+        except Exception as e:
+            self._fail(batch, e)
+
+    @staticmethod
+    def _fail(batch, error):
+        """Resolve the futures of a batch that still wait with an error"""
+        if not isinstance(error, ExternalValidationError):
+            logger.error(f"Error sending validation batch: {str(error)}")
+            error = ExternalValidationError(f"External validation batch failed: {str(error)}")
+        for future, _, _, _, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_validation_batcher(app):
+    """
+    Batcher shared by every request of an application in this process
+
+    Args:
+        app (Flask): Application whose configuration describes the service
+
+    Returns:
+        ValidationBatcher: The shared batcher
+    """
+    with _batchers_lock:
+        batcher = _batchers.get(id(app))
+        if batcher is None:
+            batcher = _batchers[id(app)] = ValidationBatcher(
+                get_validation_client(app),
+                app.config['AI_VALIDATION_BATCH_URL'],
+                app.config['AI_VALIDATION_BATCH_WINDOW'],
+                app.config['AI_VALIDATION_BATCH_MAX'],
+                app.config['AI_VALIDATION_BATCH_SENDERS']
+            )
+        return batcher
+
+
+def reset_validation_batchers():
+    """Forget the batchers inherited from a parent process, whose flush threads did not survive the fork"""
+    _batchers.clear()
@@ -0,0 +1,282 @@
+import time
+import random
+import bisect
+import logging
+import threading
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Responses worth retrying: the service is overloaded or briefly unavailable
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+class ExternalValidationError(Exception):
+    """Raised when the external validation service gives no usable answer"""
+
+
+class CircuitOpenError(ExternalValidationError):
+    """Raised without calling the service while the circuit breaker is open"""
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed buckets"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """Record one latency measurement"""
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self._sum += seconds
+
+    def snapshot(self):
+        """
+        Current state of the histogram
+
+        Returns:
+            dict: Count, total seconds and the number of observations per bucket upper bound
+        """
+        with self._lock:
+            labels = [str(bound) for bound in self.buckets] + ['+Inf']
+            return {
+                "count": sum(self._counts),
+                "sum": round(self._sum, 6),
+                "buckets": dict(zip(labels, self._counts))
+            }
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing service for a while
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    every call is refused for ``reset_timeout`` seconds. The first call after
+    that is let through as a trial: success closes the breaker, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        """Check if a call may go ahead (at most one trial call while half open)"""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f"Opening circuit breaker after {self._failures} failures")
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class ValidationServiceClient:
+    """
+    Client for the external AI validation service
+
+    One pooled ``requests.Session`` keeps connections alive between calls.
+    Connection errors and overload responses are retried with full-jitter
+    exponential backoff, and a circuit breaker stops calling the service
+    after repeated failures so callers can fall back right away.
+
+    A call blocks the request thread, so all of its attempts share one
+    ``deadline``: each attempt may only wait for the time that is left, and
+    no retry is started once the backoff would use it up. Read timeouts are
+    not retried unless ``retry_read_timeouts`` is set, since the service
+    may still be working on the first request.
+    """
+
+    def __init__(self, url, connect_timeout=3.05, read_timeout=10.0, retries=2, backoff=0.2,
+                 deadline=15.0, retry_read_timeouts=False, pool_size=10, failure_threshold=5,
+                 reset_timeout=30.0):
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.deadline = deadline
+        self.retry_read_timeouts = retry_read_timeouts
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = {
+            "success": LatencyHistogram(),
+            "failure": LatencyHistogram()
+        }
+        # Imported here so processes that never call the service skip loading the HTTP stack
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @classmethod
+    def from_config(cls, config):
+        """Create a client from the application configuration"""
+        return cls(
+            config['AI_VALIDATION_SERVICE_URL'],
+            connect_timeout=config['AI_VALIDATION_CONNECT_TIMEOUT'],
+            read_timeout=config['AI_VALIDATION_READ_TIMEOUT'],
+            retries=config['AI_VALIDATION_RETRIES'],
+            backoff=config['AI_VALIDATION_BACKOFF'],
+            deadline=config['AI_VALIDATION_DEADLINE'],
+            retry_read_timeouts=config['AI_VALIDATION_RETRY_READ_TIMEOUTS'],
+            pool_size=config['AI_VALIDATION_POOL_SIZE'],
+            failure_threshold=config['AI_VALIDATION_BREAKER_THRESHOLD'],
+            reset_timeout=config['AI_VALIDATION_BREAKER_RESET']
+        )
+
+    def _post_once(self, url, body, remaining):
+        """One HTTP attempt of at most ``remaining`` seconds; returns the decoded response or raises with a retry hint"""
+        import requests
+        connect_timeout, read_timeout = self.timeout
+        started = time.perf_counter()
+        try:
+            response = self.session.post(
+                url, timeout=(min(connect_timeout, remaining), min(read_timeout, remaining)), **body
+            )
+        except requests.ReadTimeout as e:
+            self.latency["failure"].observe(time.perf_counter() - started)
+            error = ExternalValidationError(f"External validation service timed out: {str(e)}")
+            error.retryable = self.retry_read_timeouts
+            raise error
+        except requests.RequestException as e:
+            self.latency["failure"].observe(time.perf_counter() - started)
+            raise ExternalValidationError(f"Unable to reach external validation service: {str(e)}")
+
+        elapsed = time.perf_counter() - started
+        if response.status_code == 200:
+            try:
+                result = response.json()
+            except ValueError:
+                self.latency["failure"].observe(elapsed)
+                raise ExternalValidationError("External validation service returned invalid JSON")
+            self.latency["success"].observe(elapsed)
+            return result
+        self.latency["failure"].observe(elapsed)
+        error = ExternalValidationError(f"External validation service error: {response.status_code}")
+        error.retryable = response.status_code in RETRY_STATUS_CODES or response.status_code >= 500
+        error.answered = True
+        raise error
+
+    def post(self, payload=None, files=None, url=None, deadline=None):
+        """
+        Send a payload to the service
+
+        Args:
+            payload (dict): JSON body of the request
+            files (list): Multipart parts to send instead of a JSON body
+            url (str): Endpoint to call instead of the default one
+            deadline (float): ``time.monotonic()`` time by which every
+                attempt must be over; defaults to ``deadline`` seconds from now
+
+        Returns:
+            dict: Decoded JSON response
+
+        Raises:
+            CircuitOpenError: If the breaker is open and the service was not called
+            ExternalValidationError: If every attempt failed or the deadline passed
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.deadline
+        elif deadline <= time.monotonic():
+            raise ExternalValidationError("External validation deadline passed before the call")
+        if not self.breaker.allow():
+            raise CircuitOpenError("External validation service is unavailable (circuit open)")
+
+        body = {"json": payload} if files is None else {"files": files}
+        for attempt in range(self.retries + 1):
+            try:
+                result = self._post_once(url or self.url, body, deadline - time.monotonic())
+            except ExternalValidationError as e:
+                retryable = getattr(e, 'retryable', True)
+                if not retryable and getattr(e, 'answered', False):
+                    # The service answered; the request itself was refused
+                    self.breaker.record_success()
+                    raise
+                delay = random.uniform(0, self.backoff * (2 ** attempt))
+                if not retryable or attempt == self.retries or delay >= deadline - time.monotonic():
+                    self.breaker.record_failure()
+                    raise
+                logger.warning(f"{str(e)}; retrying in {delay:.2f}s")
+                time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    def stats(self):
+        """
+        Breaker state and latency histograms for monitoring
+
+        Returns:
+            dict: Circuit state plus one histogram per outcome
+        """
+        return {
+            "url": self.url,
+            "circuit": self.breaker.state,
+            "latency": {outcome: histogram.snapshot() for outcome, histogram in self.latency.items()}
+        }
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_validation_client(app):
+    """
+    Client shared by every request of an application in this process
+
+    Args:
+        app (Flask): Application whose configuration describes the service
+
+    Returns:
+        ValidationServiceClient: The shared client
+    """
+    with _clients_lock:
+        client = _clients.get(id(app))
+        if client is None:
+            client = _clients[id(app)] = ValidationServiceClient.from_config(app.config)
+        return client
+
+
+def reset_validation_clients():
+    """Forget the clients inherited from a parent process, so each process opens its own connections"""
+    _clients.clear()
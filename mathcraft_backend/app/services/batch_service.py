@@ -0,0 +1,229 @@
+import os
+import zipfile
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, as_completed, wait
+from flask import current_app
+from werkzeug.utils import secure_filename
+from app.models.submission import Submission
+from app.services.storage_service import get_blob_store, blob_name, add_reference
+from app.services.result_cache_service import result_cache
+from app.services.job_service import validation_queue
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class BatchError(ValueError):
+    """Raised when a batch upload cannot be accepted as a whole"""
+
+
+def iter_members(files):
+    """
+    Yield every build in a batch upload
+
+    Zip archives are read member by member from the spooled upload, so an
+    archive is never held in memory.
+
+    Args:
+        files (list): ``FileStorage`` objects from the request
+
+    Yields:
+        tuple: (original filename, readable stream or None if the file type is not allowed)
+    """
+    for upload in files:
+        filename = secure_filename(upload.filename or '')
+        if filename.lower().endswith('.zip'):
+            try:
+                archive = zipfile.ZipFile(upload.stream)
+            except zipfile.BadZipFile:
+                raise BatchError(f"{filename} is not a valid zip archive")
+            with archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    member_name = secure_filename(os.path.basename(info.filename))
+                    if not member_name.lower().endswith('.nbt'):
+                        yield member_name, None
+                        continue
+                    if info.file_size > current_app.config['MAX_CONTENT_LENGTH']:
+                        raise BatchError(f"{member_name} in {filename} is too large")
+                    with archive.open(info) as member:
+                        yield member_name, member
+        elif filename.lower().endswith('.nbt'):
+            yield filename, upload.stream
+        else:
+            yield filename, None
+
+
+def store_batch(files, user_id=None):
+    """
+    Store every build of a batch upload in the blob store
+
+    Args:
+        files (list): ``FileStorage`` objects from the request
+        user_id (str): User for all submissions; defaults to each file's name
+            without its extension (e.g. ``alice.nbt`` is submitted by ``alice``)
+
+    Returns:
+        list: One dict per file with its name, user and either the stored blob or an error
+    """
+    store = get_blob_store()
+    max_files = current_app.config['BATCH_MAX_FILES']
+    entries = []
+    for filename, stream in iter_members(files):
+        if len(entries) >= max_files:
+            raise BatchError(f"A batch may contain at most {max_files} files")
+        entry = {"filename": filename, "user_id": user_id or filename.rsplit('.', 1)[0] or 'anonymous'}
+        if stream is None:
+            entry["error"] = "File type not allowed. Only .nbt files are accepted"
+        else:
+            entry["content_hash"], entry["size"], entry["stored_size"], entry["path"] = store.save(stream)
+        entries.append(entry)
+    return entries
+
+
+def stream_batch_results(app, entries, plan, challenge_id):
+    """
+    Validate stored builds in parallel and yield each result as it completes
+
+    Each distinct content is validated once, in the shared worker pool, and
+    cached results are reported straight away. Every content sent to the
+    pool claims a slot of the validation queue like a single upload does;
+    when the queue is full the batch waits for its own builds to finish
+    before sending more, and reports a file as not validated if it has
+    none in flight. The submissions of each content are committed as soon
+    as its result is in, so a dropped connection keeps what was finished.
+
+    Args:
+        app (Flask): Application that owns the worker pool
+        entries (list): Output of ``store_batch``
+        plan (ValidationPlan): Compiled criteria of the challenge
+        challenge_id (int): ID of the challenge
+
+    Yields:
+        dict: One record per file, then a final ``summary`` record
+    """
+    by_hash = {}
+    for entry in entries:
+        if "error" in entry:
+            yield {"filename": entry["filename"], "user_id": entry["user_id"], "error": entry["error"]}
+        else:
+            by_hash.setdefault(entry["content_hash"], []).append(entry)
+
+    submissions = []
+    pending = {}
+    released = set()
+    released_lock = threading.Lock()
+
+    def release(future):
+        # Both the done callback and _collect give back the slot; only the first call counts
+        with released_lock:
+            if future in released:
+                return
+            released.add(future)
+        validation_queue.release()
+
+    for content_hash, group in by_hash.items():
+        cached = result_cache.get(content_hash, plan.criteria_hash)
+        if cached is not None:
+            yield from _complete(group, cached, plan, challenge_id, submissions)
+            continue
+
+        # Wait for this batch's own builds while the queue is full
+        while not validation_queue.reserve(app):
+            if not pending:
+                yield from _unvalidated(group, "Too many builds are waiting for validation. Please try again shortly")
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from _collect(future, pending, release, plan, challenge_id, submissions)
+        else:
+            try:
+                future = validation_queue.validate(app, group[0]["path"], plan)
+            except Exception as e:
+                validation_queue.release()
+                logger.error(f"Could not queue batch validation of {content_hash}: {str(e)}")
+                yield from _unvalidated(group, f"Validation error: {str(e)}")
+                continue
+            future.add_done_callback(release)
+            pending[future] = (content_hash, group)
+
+    for future in as_completed(list(pending)):
+        yield from _collect(future, pending, release, plan, challenge_id, submissions)
+
+    yield {"summary": {
+        "files": len(entries),
+        "saved": len(submissions),
+        "passed": sum(1 for submission in submissions if submission.is_successful()),
+        "submission_ids": [submission.id for submission in submissions]
+    }}
+
+
+def _collect(future, pending, release, plan, challenge_id, submissions):
+    """
+    Store and report the result of a finished validation, removing it from ``pending``
+
+    The future's queue slot is given back first: ``wait`` can return before
+    the done callback has run, and the caller may reserve again right away.
+    """
+    release(future)
+    content_hash, group = pending.pop(future)
+    try:
+        validation_result = future.result()
+    except Exception as e:
+        validation_result = {"success": False, "error": f"Validation error: {str(e)}"}
+    if "error" not in validation_result:
+        result_cache.put(content_hash, plan.criteria_hash, validation_result)
+    yield from _complete(group, validation_result, plan, challenge_id, submissions)
+
+
+def _complete(group, validation_result, plan, challenge_id, submissions):
+    """
+    Save the submissions of every file sharing one content, then report them
+
+    The submissions and the blob reference are committed together; saved
+    submissions are appended to ``submissions``.
+    """
+    content_hash = group[0]["content_hash"]
+    try:
+        saved = [
+            Submission(
+                user_id=entry["user_id"],
+                challenge_id=challenge_id,
+                file_path=blob_name(content_hash),
+                original_filename=entry["filename"],
+                validation_result=validation_result,
+                content_hash=content_hash,
+                criteria_hash=plan.criteria_hash
+            )
+            for entry in group
+        ]
+        db.session.add_all(saved)
+        add_reference(content_hash, group[0]["size"], group[0]["stored_size"], len(group))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error saving batch submissions for {content_hash}: {str(e)}")
+        yield from _unvalidated(group, "Failed to save submission")
+        return
+    submissions.extend(saved)
+    yield from _records(group, validation_result)
+
+
+def _unvalidated(group, error):
+    """Error records for every file of a batch that shares one content"""
+    for entry in group:
+        yield {"filename": entry["filename"], "user_id": entry["user_id"], "error": error}
+
+
+def _records(group, validation_result):
+    """Result records for every file of a batch that shares one content"""
+    for entry in group:
+        yield {
+            "filename": entry["filename"],
+            "user_id": entry["user_id"],
+            "stored_filename": blob_name(entry["content_hash"]),
+            "validation_result": validation_result
+        }
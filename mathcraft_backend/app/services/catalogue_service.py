@@ -0,0 +1,79 @@
+import time
+import hashlib
+import logging
+import threading
+from flask import current_app
+from sqlalchemy import func
+from app.models.challenge import Challenge
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class CatalogueCache:
+    """
+    Pre-serialised challenge list, ready to send
+
+    Bodies are built once per catalogue version and format, with a strong
+    ETag derived from their content so every worker process hands out the
+    same tag for the same catalogue. Writes through this process bump the
+    version straight away; changes made by other processes are noticed by
+    comparing a cheap fingerprint of the table (row count and latest
+    ``updated_at``) at most every ``CATALOGUE_REVALIDATE_INTERVAL`` seconds.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._entries = {}
+        self._fingerprint = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def bump(self):
+        """Invalidate the cached bodies after a challenge is created, updated or deleted"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._checked_at = None
+
+    def _revalidate(self, interval):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < interval:
+            return
+        fingerprint = tuple(db.session.query(func.count(Challenge.id), func.max(Challenge.updated_at)).one())
+        if fingerprint != self._fingerprint:
+            if self._fingerprint is not None:
+                self.version += 1
+            self._entries.clear()
+            self._fingerprint = fingerprint
+        self._checked_at = now
+
+    def get(self, ndjson=False):
+        """
+        Cached catalogue body
+
+        Args:
+            ndjson (bool): One challenge per line instead of a JSON array
+
+        Returns:
+            tuple: (body bytes, ETag value)
+        """
+        with self._lock:
+            self._revalidate(current_app.config['CATALOGUE_REVALIDATE_INTERVAL'])
+            entry = self._entries.get(ndjson)
+            if entry is None:
+                dumps = current_app.json.dumps
+                challenges = [row._asdict() for row in db.session.query(*Challenge.columns()).order_by(Challenge.id)]
+                if ndjson:
+                    body = ''.join(dumps(challenge) + '\n' for challenge in challenges)
+                else:
+                    body = dumps(challenges)
+                body = body.encode('utf-8')
+                entry = self._entries[ndjson] = (body, hashlib.blake2b(body, digest_size=16).hexdigest())
+                logger.info(f"Cached challenge catalogue version {self.version} ({len(body)} bytes)")
+            return entry
+
+
+# Shared cache used by the challenge controller
+catalogue_cache = CatalogueCache()
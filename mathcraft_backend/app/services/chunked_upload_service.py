@@ -0,0 +1,270 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from collections import OrderedDict
+from contextlib import contextmanager
+from flask import current_app
+from app.models.upload_session import UploadSession
+from app.services.storage_service import CHUNK_SIZE, content_hasher, get_blob_store
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class ChunkedUploadError(ValueError):
+    """Raised when a chunk or a finalize request cannot be accepted"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def chunk_checksum(data):
+    """Checksum clients send with each chunk (SHA-256 hex, available in every browser)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ChunkAssembler:
+    """
+    Assembles resumable uploads chunk by chunk
+
+    Chunks must arrive in order and are appended to a temporary file in the
+    blob store, so earlier data is never read again. The session's progress
+    lives in its database row, and requests for one upload are serialised
+    by locking that row, so chunks may reach any worker process.
+
+    The running content hash of the most recently used sessions is kept in
+    memory (at most ``max_sessions``) with the number of bytes it covers.
+    If it is missing (after a restart or eviction) or covers a different
+    number of bytes than the session has received (chunks of the same
+    upload were handled by another worker process), it is rebuilt from the
+    bytes already on disk.
+
+    Sessions that received nothing for ``UPLOAD_SESSION_TTL`` seconds are
+    deleted with their partial data by ``expire_sessions``, which runs at
+    most every ``UPLOAD_SESSION_SWEEP_INTERVAL`` seconds when an upload
+    starts.
+    """
+
+    def __init__(self, max_sessions=256):
+        self.max_sessions = max_sessions
+        self._hashers = OrderedDict()
+        self._lock = threading.Lock()
+        self._swept_at = None
+
+    @contextmanager
+    def _locked(self, session):
+        """
+        Hold a session's row lock until the block commits, or roll back if it raises
+
+        The row is updated before it is read again, which takes the database
+        write lock on SQLite and a row lock elsewhere, so a request for the
+        same upload in another worker process waits for this one.
+        """
+        locked = UploadSession.query.filter_by(id=session.id).update(
+            {UploadSession.updated_at: datetime.utcnow()}, synchronize_session=False
+        )
+        try:
+            if not locked:
+                raise ChunkedUploadError("Upload session has expired, please start again", 410)
+            db.session.refresh(session)
+            yield session
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _forget(self, session_id):
+        with self._lock:
+            self._hashers.pop(session_id, None)
+
+    def _remember(self, session_id, hasher, offset):
+        with self._lock:
+            self._hashers[session_id] = (hasher, offset)
+            self._hashers.move_to_end(session_id)
+            while len(self._hashers) > self.max_sessions:
+                self._hashers.popitem(last=False)
+
+    def _temp_path(self, session):
+        return get_blob_store().temp_path(f"upload-{session.id}")
+
+    def _hasher(self, session, path):
+        """Running content hash of a session, rebuilt from disk unless it covers every byte received"""
+        with self._lock:
+            hasher, offset = self._hashers.get(session.id, (None, None))
+        if hasher is None or offset != session.received_bytes:
+            hasher = content_hasher()
+            if session.received_bytes:
+                with open(path, 'rb') as partial:
+                    remaining = session.received_bytes
+                    while remaining:
+                        chunk = partial.read(min(CHUNK_SIZE, remaining))
+                        if not chunk:
+                            raise ChunkedUploadError("Upload data is missing, please start again", 410)
+                        hasher.update(chunk)
+                        remaining -= len(chunk)
+            self._remember(session.id, hasher, session.received_bytes)
+        return hasher
+
+    def expire_sessions(self, ttl):
+        """
+        Delete unfinished uploads that received nothing for a while, with their partial data
+
+        Each row is deleted only while it is still open and idle, so an
+        upload that received a chunk in the meantime is kept.
+
+        Args:
+            ttl (int): Seconds since the last chunk after which an upload is abandoned
+
+        Returns:
+            int: Number of sessions deleted
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=ttl)
+        idle = UploadSession.query.with_entities(UploadSession.id).filter(
+            UploadSession.status == 'open', UploadSession.updated_at < cutoff
+        ).all()
+        deleted = 0
+        for (session_id,) in idle:
+            removed = UploadSession.query.filter(
+                UploadSession.id == session_id, UploadSession.status == 'open', UploadSession.updated_at < cutoff
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            if removed:
+                path = get_blob_store().temp_path(f"upload-{session_id}")
+                if os.path.exists(path):
+                    os.remove(path)
+                self._forget(session_id)
+                deleted += 1
+        if deleted:
+            logger.info(f"Expired {deleted} abandoned upload sessions")
+        return deleted
+
+    def _sweep(self):
+        """Expire abandoned sessions unless this process did so recently"""
+        now = time.monotonic()
+        with self._lock:
+            if self._swept_at is not None and now - self._swept_at < current_app.config['UPLOAD_SESSION_SWEEP_INTERVAL']:
+                return
+            self._swept_at = now
+        try:
+            self.expire_sessions(current_app.config['UPLOAD_SESSION_TTL'])
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error expiring upload sessions: {str(e)}")
+
+    def start(self, challenge_id, user_id, original_filename, total_size=None):
+        """
+        Open a new upload session
+
+        Args:
+            challenge_id (int): ID of the challenge the build is for
+            user_id (str): ID of the user uploading
+            original_filename (str): Name of the file being uploaded
+            total_size (int): Size the client intends to send, if known
+
+        Returns:
+            UploadSession: The committed session
+        """
+        if total_size is not None and total_size > current_app.config['MAX_CONTENT_LENGTH']:
+            raise ChunkedUploadError("File is larger than the maximum upload size", 413)
+        self._sweep()
+        session = UploadSession(challenge_id, user_id, original_filename, total_size)
+        db.session.add(session)
+        db.session.commit()
+        open(self._temp_path(session), 'wb').close()
+        return session
+
+    def write_chunk(self, session, number, data, checksum):
+        """
+        Append a chunk to an upload
+
+        Re-sending the most recently accepted chunk is acknowledged without
+        writing it again, so clients can safely retry after a dropped
+        connection.
+
+        Args:
+            session (UploadSession): Open upload session
+            number (int): Chunk number, starting at 0
+            data (bytes): Chunk content
+            checksum (str): SHA-256 hex digest of the chunk
+
+        Returns:
+            UploadSession: The updated session
+        """
+        with self._locked(session):
+            if session.status != 'open':
+                raise ChunkedUploadError("Upload has already been finalized", 409)
+            if number == session.next_chunk - 1 and checksum == session.last_chunk_checksum:
+                db.session.commit()
+                return session
+            if number != session.next_chunk:
+                raise ChunkedUploadError(f"Expected chunk {session.next_chunk}, got chunk {number}", 409)
+            if not data:
+                raise ChunkedUploadError("Chunk is empty")
+            if chunk_checksum(data) != checksum:
+                raise ChunkedUploadError("Chunk checksum does not match its content")
+            if session.received_bytes + len(data) > current_app.config['MAX_CONTENT_LENGTH']:
+                raise ChunkedUploadError("File is larger than the maximum upload size", 413)
+
+            path = self._temp_path(session)
+            hasher = self._hasher(session, path)
+            # Drop anything left behind by an earlier write that was never acknowledged
+            with open(path, 'r+b') as partial:
+                partial.seek(session.received_bytes)
+                partial.truncate()
+                partial.write(data)
+
+            session.received_bytes += len(data)
+            session.next_chunk += 1
+            session.last_chunk_checksum = checksum
+            db.session.commit()
+            hasher.update(data)
+            self._remember(session.id, hasher, session.received_bytes)
+            return session
+
+    def finish(self, session):
+        """
+        Complete an upload and move the assembled file into the blob store
+
+        Args:
+            session (UploadSession): Open upload session
+
+        Returns:
+            tuple: (content hash, original size, stored size, blob path)
+        """
+        with self._locked(session):
+            if session.status != 'open':
+                raise ChunkedUploadError("Upload has already been finalized", 409)
+            if not session.received_bytes:
+                raise ChunkedUploadError("No chunks have been uploaded")
+            if session.total_size is not None and session.received_bytes != session.total_size:
+                raise ChunkedUploadError(
+                    f"Received {session.received_bytes} of {session.total_size} bytes"
+                )
+
+            path = self._temp_path(session)
+            content_hash = self._hasher(session, path).hexdigest()
+            stored_size, blob_path = get_blob_store().adopt(path, content_hash)
+            session.status = 'complete'
+            db.session.commit()
+        self._forget(session.id)
+        return content_hash, session.received_bytes, stored_size, blob_path
+
+    def abort(self, session):
+        """Discard an unfinished upload and its partial data"""
+        with self._locked(session):
+            if session.status != 'open':
+                raise ChunkedUploadError("Upload has already been finalized", 409)
+            path = self._temp_path(session)
+            if os.path.exists(path):
+                os.remove(path)
+            db.session.delete(session)
+            db.session.commit()
+        self._forget(session.id)
+
+
+# Shared assembler used by the upload controller
+chunk_assembler = ChunkAssembler()
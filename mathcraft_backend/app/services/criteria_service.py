@@ -0,0 +1,306 @@
+import copy
+import json
+import hashlib
+import threading
+import logging
+from app.models.challenge import Challenge
+
+# The NumPy/SciPy checkers are imported where they are used, so that
+# importing this module (every web worker does) stays cheap
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class SizeCheck:
+    """Minimum width/height/depth of the structure"""
+    name = "size_requirements"
+
+    def __init__(self, minimums):
+        self.minimums = tuple(minimums)  # (dimension, minimum) pairs
+
+    def evaluate(self, volume):
+        size = volume.size
+        return [
+            f"Build {dimension} ({size[dimension]}) is less than minimum required ({minimum})"
+            for dimension, minimum in self.minimums
+            if size[dimension] < minimum
+        ], None
+
+
+class RequiredBlocksCheck:
+    """Minimum number of blocks of each required type"""
+    name = "required_blocks"
+
+    def __init__(self, requirements):
+        self.requirements = tuple(requirements)  # (block id, minimum count) pairs
+
+    def evaluate(self, volume):
+        feedback = []
+        for block_id, min_count in self.requirements:
+            actual_count = volume.count(block_id)
+            if actual_count < min_count:
+                feedback.append(f"Not enough {block_id} blocks. Required: {min_count}, Found: {actual_count}")
+        return feedback, None
+
+
+class SymmetryCheck:
+    """Mirror or rotational symmetry of the voxel grid"""
+    name = "symmetry"
+
+    def __init__(self, options):
+        self.options = options
+
+    def evaluate(self, volume):
+        from app.services.symmetry_service import check_symmetry
+        symmetry = check_symmetry(volume, self.options)
+        if symmetry["passed"]:
+            return [], symmetry
+        return [
+            f"Build is not {symmetry['type']}ly symmetric about the {symmetry['axis']} axis: "
+            f"{symmetry['mismatched_blocks']} blocks differ from their counterpart "
+            f"(up to {symmetry['tolerance']} allowed)"
+        ], symmetry
+
+
+class StructuresCheck:
+    """Recognised geometric shapes among the build's connected components"""
+    name = "structures"
+
+    def __init__(self, structures):
+        self.structures = structures
+
+    def evaluate(self, volume):
+        from app.services.shape_service import check_structures
+        structures = check_structures(volume, self.structures)
+        return [f"Could not find a {name} in your build" for name in structures["missing"]], structures
+
+
+class FractionCheck:
+    """Equal sections or material shares showing a fraction"""
+    name = "fraction"
+
+    def __init__(self, options):
+        self.options = options
+
+    def evaluate(self, volume):
+        from app.services.fraction_service import check_fraction
+        fraction = check_fraction(volume, self.options)
+        if fraction["passed"]:
+            return [], fraction
+        return [
+            f"Could not find {fraction['denominator']} equal sections with {fraction['numerator']} "
+            f"highlighted in a different block to show {fraction['numerator']}/{fraction['denominator']}"
+        ], fraction
+
+
+class RelationshipCheck:
+    """A measured ratio such as area against perimeter"""
+    name = "math_relationship"
+
+    def __init__(self, options):
+        self.options = options
+
+    def evaluate(self, volume):
+        from app.services.relationship_service import check_math_relationship
+        relationship = check_math_relationship(volume, self.options)
+        if relationship["passed"]:
+            return [], relationship
+        measured = ", ".join(f"{name} {value}" for name, value in relationship["measurements"].items())
+        return [
+            f"The {relationship['type'].replace('_', '/')} ratio of your build is {relationship['actual']} "
+            f"({measured}), expected {relationship['expected']}"
+        ], relationship
+
+
+def criteria_digest(criteria):
+    """
+    Hash criteria independently of key order
+
+    Args:
+        criteria (dict): Challenge criteria
+
+    Returns:
+        str: BLAKE2b hex digest of the canonical JSON encoding
+    """
+    canonical = json.dumps(criteria, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=32).hexdigest()
+
+
+class ValidationPlan:
+    """
+    Immutable, pre-compiled form of a challenge's criteria
+
+    Attributes:
+        key (tuple): (challenge id, updated_at) the plan was compiled from
+        criteria (dict): Private copy of the raw criteria (for the external service)
+        criteria_hash (str): Digest of the criteria, used to key cached results
+        checks (tuple): Check objects in evaluation order
+    """
+
+    def __init__(self, key, criteria, checks):
+        self.key = key
+        self.criteria = criteria
+        self.criteria_hash = criteria_digest(criteria)
+        self.checks = tuple(checks)
+
+    def __repr__(self):
+        return f'<ValidationPlan {self.key} with {len(self.checks)} checks>'
+
+
+def compile_criteria(criteria):
+    """
+    Turn a raw criteria dict into an ordered list of checks
+
+    Criteria are validated here, once per challenge version, so malformed
+    criteria fail at compile time instead of on every upload.
+
+    Args:
+        criteria (dict): Challenge criteria
+
+    Returns:
+        list: Check objects in evaluation order
+    """
+    checks = []
+    if "size_requirements" in criteria:
+        size_req = criteria["size_requirements"]
+        checks.append(SizeCheck(
+            (dimension, size_req[f"min_{dimension}"])
+            for dimension in ("width", "height", "depth")
+            if f"min_{dimension}" in size_req
+        ))
+    if "required_blocks" in criteria:
+        checks.append(RequiredBlocksCheck(
+            (block["id"], block.get("min_count", 1)) for block in criteria["required_blocks"]
+        ))
+    if "symmetry" in criteria:
+        checks.append(SymmetryCheck(dict(criteria["symmetry"])))
+    if "structures" in criteria:
+        from app.services.shape_service import SHAPE_NAMES
+        structures = [dict(structure) for structure in criteria["structures"]]
+        for structure in structures:
+            if structure["name"] not in SHAPE_NAMES:
+                raise ValueError(f"Unknown structure shape: {structure['name']}")
+        checks.append(StructuresCheck(structures))
+    if "fraction" in criteria:
+        fraction = dict(criteria["fraction"])
+        if not 0 < int(fraction["numerator"]) < int(fraction["denominator"]):
+            raise ValueError(f"Unsupported fraction: {fraction['numerator']}/{fraction['denominator']}")
+        checks.append(FractionCheck(fraction))
+    if "math_relationship" in criteria:
+        from app.services.relationship_service import RELATIONSHIP_EVALUATORS
+        relationship = dict(criteria["math_relationship"])
+        if relationship.get("type") not in RELATIONSHIP_EVALUATORS:
+            raise ValueError(f"Unknown math relationship type: {relationship.get('type')}")
+        relationship["ratio"] = float(relationship["ratio"])
+        checks.append(RelationshipCheck(relationship))
+    return checks
+
+
+def compile_plan(challenge):
+    """
+    Compile a challenge into a validation plan
+
+    Args:
+        challenge (Challenge): The challenge to compile
+
+    Returns:
+        ValidationPlan: Plan keyed by the challenge id and version
+    """
+    criteria = copy.deepcopy(challenge.criteria or {})
+    return ValidationPlan((challenge.id, challenge.updated_at), criteria, compile_criteria(criteria))
+
+
+class PlanCache:
+    """
+    In-process cache of validation plans
+
+    One plan is kept per challenge, tagged with the ``(id, updated_at)`` it was
+    compiled from. Before a cached plan is returned, the challenge's current
+    ``updated_at`` is read by primary key, so a challenge changed or deleted
+    through another worker process is recompiled (or reported missing)
+    rather than validated against stale criteria. A hit therefore costs one
+    single-column lookup instead of loading and compiling the challenge.
+    The challenge controller still calls ``invalidate`` after its own
+    commits so this process drops the old plan straight away.
+    """
+
+    def __init__(self):
+        self._plans = {}
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, challenge_id):
+        """
+        Return the plan for a challenge, compiling it on a miss
+
+        Args:
+            challenge_id: ID of the challenge
+
+        Returns:
+            ValidationPlan: The plan, or None if the challenge does not exist
+        """
+        try:
+            challenge_id = int(challenge_id)
+        except (TypeError, ValueError):
+            return None
+
+        version = Challenge.query.with_entities(Challenge.updated_at).filter_by(id=challenge_id).first()
+        if version is None:
+            # Deleted, possibly through another worker
+            self.invalidate(challenge_id)
+            return None
+
+        with self._lock:
+            plan = self._plans.get(challenge_id)
+            if plan is not None and plan.key[1] == version.updated_at:
+                self.hits += 1
+                return plan
+            self.misses += 1
+            generation = self._generation
+
+        challenge = Challenge.query.get(challenge_id)
+        if not challenge:
+            return None
+        plan = compile_plan(challenge)
+        logger.info(f"Compiled validation plan for challenge {challenge_id}")
+
+        with self._lock:
+            # Don't cache a plan read before a concurrent update was invalidated
+            if generation == self._generation:
+                self._plans[challenge_id] = plan
+        return plan
+
+    def invalidate(self, challenge_id):
+        """Drop the cached plan of a challenge"""
+        with self._lock:
+            self._generation += 1
+            self._plans.pop(int(challenge_id), None)
+
+    def clear(self):
+        """Drop every cached plan"""
+        with self._lock:
+            self._generation += 1
+            self._plans.clear()
+
+    def stats(self):
+        """
+        Hit/miss counters for monitoring
+
+        Returns:
+            dict: Cache size, hits, misses and hit ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._plans),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Shared cache used by the upload path and invalidated by the challenge controller
+plan_cache = PlanCache()
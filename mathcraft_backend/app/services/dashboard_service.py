@@ -0,0 +1,76 @@
+import logging
+from sqlalchemy.orm import load_only, selectinload
+from app.models.challenge import Challenge
+from app.models.progress import UserProgress, Achievement
+from app.models.submission import Submission
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Submission fields shown in the dashboard's recent activity
+RECENT_SUBMISSION_FIELDS = ('id', 'challenge_id', 'original_filename', 'submitted_at', 'is_successful')
+
+
+def build_dashboard(user_id, recent_submissions):
+    """
+    Everything a student's page shows, in one document
+
+    Uses at most four SQL statements however many challenges the user has
+    worked on: the progress rows, their challenges (one ``selectinload``
+    query for all of them), the achievements, and the latest submissions
+    joined to their challenge titles. The totals are computed from the
+    progress rows already loaded.
+
+    Args:
+        user_id (str): ID of the user
+        recent_submissions (int): Number of latest submissions to include
+
+    Returns:
+        dict: Summary, progress with challenge details, achievements and recent submissions
+    """
+    progress = UserProgress.query.filter_by(user_id=user_id).options(
+        selectinload(UserProgress.challenge).options(load_only(Challenge.title, Challenge.difficulty))
+    ).order_by(UserProgress.challenge_id).all()
+
+    achievements = db.session.query(*Achievement.columns()).filter(
+        Achievement.user_id == user_id
+    ).order_by(Achievement.date_earned, Achievement.id)
+
+    submissions = db.session.query(
+        *Submission.columns(RECENT_SUBMISSION_FIELDS), Challenge.title.label('challenge_title')
+    ).outerjoin(Challenge, Submission.challenge_id == Challenge.id).filter(
+        Submission.user_id == user_id
+    ).order_by(Submission.submitted_at.desc(), Submission.id.desc()).limit(recent_submissions)
+
+    by_difficulty = {}
+    entries = []
+    for record in progress:
+        entry = record.to_dict()
+        challenge = record.challenge
+        entry['challenge'] = {
+            'id': record.challenge_id,
+            'title': challenge.title if challenge else None,
+            'difficulty': challenge.difficulty if challenge else None
+        }
+        if record.is_completed and challenge:
+            by_difficulty[challenge.difficulty] = by_difficulty.get(challenge.difficulty, 0) + 1
+        entries.append(entry)
+
+    last_activity = max((record.updated_at for record in progress if record.updated_at), default=None)
+    summary = {
+        'challenges_attempted': len(progress),
+        'challenges_completed': sum(1 for record in progress if record.is_completed),
+        'completed_by_difficulty': by_difficulty,
+        'total_score': sum(record.score or 0 for record in progress),
+        'total_attempts': sum(record.attempts or 0 for record in progress),
+        'last_activity': last_activity.isoformat() if last_activity else None
+    }
+
+    return {
+        'user_id': user_id,
+        'summary': summary,
+        'progress': entries,
+        'achievements': [achievement._asdict() for achievement in achievements],
+        'recent_submissions': [submission._asdict() for submission in submissions]
+    }
@@ -0,0 +1,91 @@
+import logging
+from sqlalchemy import event, inspect
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING / DO UPDATE
+_UPSERT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """
+    Run PRAGMA statements on every new connection of a SQLite engine
+
+    Args:
+        engine (Engine): Engine to configure; other dialects are left alone
+        pragmas (dict): Pragma name -> value, e.g. ``{"journal_mode": "WAL"}``
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    logger.info(f"SQLite pragmas: {', '.join(f'{name}={value}' for name, value in pragmas.items())}")
+
+
+def upsert_insert(model):
+    """
+    INSERT construct with ON CONFLICT support for the database in use
+
+    Args:
+        model (db.Model): Model to insert into
+
+    Returns:
+        Insert: Dialect-specific insert with ``on_conflict_do_nothing`` and ``on_conflict_do_update``
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in _UPSERT_INSERTS:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return _UPSERT_INSERTS[dialect](model)
+
+
+def upgrade_schema():
+    """
+    Bring an existing database up to date with the models
+
+    ``db.create_all`` only creates missing tables, so databases made by an
+    older version keep their old tables unchanged. This also adds the
+    columns and indexes those tables are missing. New columns must be
+    nullable or have a server default, because existing rows get no value.
+
+    Returns:
+        list: Description of every change made
+    """
+    db.create_all()
+    changes = []
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in db.metadata.sorted_tables:
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise RuntimeError(f"Cannot add required column {table.name}.{column.name} to existing rows")
+                definition = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {definition}")
+                changes.append(f"added column {table.name}.{column.name}")
+
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(connection)
+                    changes.append(f"created index {index.name}")
+
+    for change in changes:
+        logger.info(f"Schema upgrade: {change}")
+    return changes
@@ -0,0 +1,139 @@
+import numpy as np
+from app.services.voxel_service import AXIS_INDEX
+
+# Allowed relative deviation of a section's volume from an exact 1/denominator share
+SECTION_TOLERANCE = 0.05
+
+# Share of a section that must be its dominant material for the section to count as one colour
+DOMINANT_SHARE = 0.9
+
+# Allowed absolute deviation when comparing a material's share of the whole build
+SHARE_TOLERANCE = 0.03
+
+
+def material_profile(grid, axis, palette_size):
+    """
+    Count blocks of every material in each slab along an axis
+
+    Args:
+        grid (np.ndarray): Cropped voxel grid
+        axis (int): Grid axis to slice along
+        palette_size (int): Number of palette entries
+
+    Returns:
+        np.ndarray: (slices, palette_size) block counts per slab
+    """
+    slabs = np.moveaxis(grid, axis, 0)
+    profile = np.empty((slabs.shape[0], palette_size), dtype=np.int64)
+    for index, slab in enumerate(slabs):
+        profile[index] = np.bincount(slab.ravel(), minlength=palette_size)
+    return profile
+
+
+def equal_sections(profile, denominator):
+    """
+    Split slabs into ``denominator`` runs of (nearly) equal volume
+
+    Cut points are found on the cumulative sum of solid blocks per slab, so
+    the split costs one ``searchsorted`` no matter how large the build is.
+
+    Args:
+        profile (np.ndarray): Output of ``material_profile``
+        denominator (int): Number of sections wanted
+
+    Returns:
+        np.ndarray: Slab index where each section starts, or None if the slabs
+        cannot be cut into equal volumes
+    """
+    cumulative = np.cumsum(profile[:, 1:].sum(axis=1))
+    total = cumulative[-1]
+    if total == 0 or len(cumulative) < denominator:
+        return None
+    targets = total * np.arange(1, denominator) / denominator
+    ends = np.searchsorted(cumulative, targets)
+    if (np.abs(cumulative[ends] - targets) > SECTION_TOLERANCE * total / denominator).any():
+        return None
+    starts = np.concatenate(([0], ends + 1))
+    if (np.diff(starts) <= 0).any() or starts[-1] >= len(cumulative):
+        return None
+    return starts
+
+
+def _section_split(volume, grid, numerator, denominator):
+    """Find an axis along which the build is cut into equal, single-material sections"""
+    for axis_name, axis in AXIS_INDEX.items():
+        profile = material_profile(grid, axis, len(volume.palette))
+        starts = equal_sections(profile, denominator)
+        if starts is None:
+            continue
+        sections = np.add.reduceat(profile, starts, axis=0)[:, 1:]
+        section_totals = sections.sum(axis=1)
+        dominant = sections.argmax(axis=1)
+        if (sections[np.arange(len(sections)), dominant] < DOMINANT_SHARE * section_totals).any():
+            continue
+        materials, section_counts = np.unique(dominant, return_counts=True)
+        if len(materials) < 2:
+            continue
+        matches = materials[section_counts == numerator]
+        if not len(matches):
+            continue
+        return {
+            "axis": axis_name,
+            "highlighted": volume.palette[matches[0] + 1],
+            "sections": [
+                {"block": volume.palette[m + 1], "blocks": int(t)}
+                for m, t in zip(dominant, section_totals)
+            ]
+        }
+    return None
+
+
+def check_fraction(volume, fraction_criteria):
+    """
+    Evaluate the ``fraction`` criterion of a challenge
+
+    The build passes when it can be cut along one axis into ``denominator``
+    equal-volume sections of which ``numerator`` share a highlight material.
+    Unless ``representation`` is ``"clear"``, a build where one material makes
+    up numerator/denominator of all blocks is also accepted.
+
+    Args:
+        volume (BuildVolume): Parsed build
+        fraction_criteria (dict): ``numerator``, ``denominator`` and optional
+            ``representation``
+
+    Returns:
+        dict: Result with pass/fail and how the fraction was recognised
+    """
+    numerator = int(fraction_criteria["numerator"])
+    denominator = int(fraction_criteria["denominator"])
+    if denominator <= 0 or not 0 < numerator < denominator:
+        raise ValueError(f"Unsupported fraction: {numerator}/{denominator}")
+
+    result = {
+        "numerator": numerator,
+        "denominator": denominator,
+        "passed": False,
+        "method": None
+    }
+    bounds = volume.bounding_box()
+    if bounds is None:
+        return result
+    (y0, z0, x0), (y1, z1, x1) = bounds
+    grid = volume.grid[y0:y1, z0:z1, x0:x1]
+
+    split = _section_split(volume, grid, numerator, denominator)
+    if split is not None:
+        result.update(split, passed=True, method="sections")
+        return result
+
+    # Fall back to each material's share of the whole build
+    counts = volume.palette_counts()[1:]
+    shares = counts / counts.sum()
+    closest = int(np.argmin(np.abs(shares - numerator / denominator)))
+    result["highlighted"] = volume.palette[closest + 1]
+    result["share"] = round(float(shares[closest]), 4)
+    if fraction_criteria.get("representation") != "clear" and \
+            abs(shares[closest] - numerator / denominator) <= SHARE_TOLERANCE:
+        result.update(passed=True, method="volume_share")
+    return result
@@ -0,0 +1,255 @@
+import signal
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import Future, ProcessPoolExecutor
+from app.models.submission import Submission
+from app.models.validation_job import ValidationJob
+from app.services.result_cache_service import result_cache
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Seconds a job may overrun its deadline in C code before its worker pool is killed
+_KILL_GRACE = 5
+
+
+def _validate_with_deadline(file_path, plan, max_voxels, seconds):
+    """
+    Validate a build in a worker process, giving up after ``seconds``
+
+    A timer signal interrupts the worker's Python code (a decode stuck in a
+    loop, say) with a TimeoutError, which validate_file reports as a
+    validation error. Platforms without SIGALRM rely on the watchdog in
+    ``ValidationQueue.submit`` alone.
+    """
+    from app.services.validation_service import validate_file
+    if not seconds or not hasattr(signal, 'SIGALRM'):
+        return validate_file(file_path, plan, max_voxels)
+
+    def expire(signum, frame):
+        raise TimeoutError(f"Validation took longer than {seconds} s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return validate_file(file_path, plan, max_voxels)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class ValidationQueue:
+    """
+    Bounded queue of validation jobs run by a pool of worker processes
+
+    Parsing and validation are CPU bound, so they run in a
+    ``ProcessPoolExecutor`` with ``VALIDATION_WORKERS`` processes, leaving
+    the web workers free to answer requests. Workers receive only the blob
+    path and the compiled plan; results are written to the database by the
+    web process when a job finishes. At most ``VALIDATION_QUEUE_SIZE`` jobs
+    may be queued or running at once, and callers must ``reserve`` a slot
+    before submitting.
+
+    Every build gets ``VALIDATION_JOB_TIMEOUT`` seconds. The worker stops
+    itself when the time is up; a job still running a few seconds later
+    (stuck in C code) is failed, its slot released, and the pool's
+    processes killed so the pool is replaced. Other jobs running in that
+    pool fail with it.
+
+    Jobs live in the memory of the process that accepted the upload, so
+    jobs still queued when that process exits stay ``queued``.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._jobs = set()  # Submitted jobs whose outcome has not been stored yet
+
+    def get_executor(self, app):
+        """
+        Worker pool shared by background jobs and batch uploads, started on first use
+
+        A pool is broken for good once one of its worker processes dies
+        (killed by the OOM killer, say): every later submit raises
+        ``BrokenProcessPool``. Such a pool is shut down and replaced here.
+
+        Args:
+            app (Flask): Application whose configuration sizes the pool
+
+        Returns:
+            ProcessPoolExecutor: The worker pool
+        """
+        with self._lock:
+            if self._executor is not None and self._executor._broken:
+                logger.warning(f"Validation worker pool is broken ({self._executor._broken}); starting a new one")
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=app.config['VALIDATION_WORKERS'])
+                logger.info(f"Started {app.config['VALIDATION_WORKERS']} validation worker processes")
+            return self._executor
+
+    def reserve(self, app):
+        """
+        Claim a queue slot for one job
+
+        Args:
+            app (Flask): Application whose configuration bounds the queue
+
+        Returns:
+            bool: True if a slot was claimed, False if the queue is full
+        """
+        with self._lock:
+            if self._in_flight >= app.config['VALIDATION_QUEUE_SIZE']:
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self):
+        """Give back a slot claimed with ``reserve``"""
+        with self._lock:
+            self._in_flight -= 1
+
+    def validate(self, app, file_path, plan):
+        """
+        Validate a build in the worker pool within ``VALIDATION_JOB_TIMEOUT``
+
+        Args:
+            app (Flask): Application whose configuration sets the limits
+            file_path (str): Path to the uploaded NBT file
+            plan (ValidationPlan): Compiled criteria of the challenge
+
+        Returns:
+            Future: Resolves to the validation result
+        """
+        return self.get_executor(app).submit(
+            _validate_with_deadline, file_path, plan, app.config['MAX_BUILD_VOXELS'],
+            app.config['VALIDATION_JOB_TIMEOUT']
+        )
+
+    def submit(self, app, job_id, file_path, plan, content_hash):
+        """
+        Run a validation job in the worker pool (a slot must already be reserved)
+
+        If the job cannot be handed to the pool it is finished straight away
+        as failed, so its row does not stay ``queued``.
+
+        Args:
+            app (Flask): Application used to store the result
+            job_id (str): ID of the ValidationJob row
+            file_path (str): Path to the uploaded NBT file
+            plan (ValidationPlan): Compiled criteria of the challenge
+            content_hash (str): Digest of the file, used to cache the result
+        """
+        with self._lock:
+            self._jobs.add(job_id)
+        try:
+            future = self.validate(app, file_path, plan)
+            executor = self._executor
+        except Exception as e:
+            logger.error(f"Could not queue validation job {job_id}: {str(e)}")
+            future = Future()
+            future.set_exception(e)
+
+        timeout = app.config['VALIDATION_JOB_TIMEOUT']
+        watchdog = None
+        if timeout and not future.done():
+            watchdog = threading.Timer(timeout + _KILL_GRACE, self._expire,
+                                       args=(app, job_id, plan.criteria_hash, future, executor))
+            watchdog.daemon = True
+            watchdog.start()
+
+        def done(future):
+            if watchdog is not None:
+                watchdog.cancel()
+            self._finish(app, job_id, plan.criteria_hash, content_hash, future)
+
+        future.add_done_callback(done)
+
+    def _claim(self, job_id):
+        """Take the right to store a job's outcome, releasing its slot; False if already taken"""
+        with self._lock:
+            if job_id not in self._jobs:
+                return False
+            self._jobs.discard(job_id)
+            self._in_flight -= 1
+            return True
+
+    def _expire(self, app, job_id, criteria_hash, future, executor):
+        """Fail a job that outlived its deadline and kill the pool running it; runs on a timer thread"""
+        if future.done() or not self._claim(job_id):
+            return
+        timeout = app.config['VALIDATION_JOB_TIMEOUT']
+        logger.error(f"Validation job {job_id} did not finish within {timeout} s; restarting the worker pool")
+        self._store(app, job_id, criteria_hash, None, {
+            "success": False,
+            "error": f"Validation error: Validation took longer than {timeout} s"
+        })
+        # The pool is then broken, so get_executor starts a new one
+        for process in list((executor._processes or {}).values()):
+            process.kill()
+
+    def _finish(self, app, job_id, criteria_hash, content_hash, future):
+        """Store the outcome of a job; runs on the executor's callback thread"""
+        if not self._claim(job_id):
+            return
+        try:
+            validation_result = future.result()
+        except Exception as e:
+            validation_result = {
+                "success": False,
+                "error": f"Validation error: {str(e)}"
+            }
+        self._store(app, job_id, criteria_hash, content_hash, validation_result)
+
+    def _store(self, app, job_id, criteria_hash, content_hash, validation_result):
+        """Write a job's outcome to its submission and cache a successful result"""
+        with app.app_context():
+            try:
+                job = ValidationJob.query.get(job_id)
+                submission = Submission.query.get(job.submission_id)
+                submission.validation_result = validation_result
+                submission.criteria_hash = criteria_hash
+                job.status = 'failed' if "error" in validation_result else 'done'
+                job.error = validation_result.get("error")
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+
+                if content_hash and "error" not in validation_result:
+                    result_cache.put(content_hash, criteria_hash, validation_result)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error storing result of validation job {job_id}: {str(e)}")
+            finally:
+                db.session.remove()
+
+    def stats(self):
+        """
+        Queue occupancy for monitoring
+
+        Returns:
+            dict: Number of jobs queued or running
+        """
+        with self._lock:
+            return {"in_flight": self._in_flight}
+
+    def reset_after_fork(self):
+        """Forget the parent process's worker pool and jobs in a newly forked process"""
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._jobs = set()
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+# Shared queue used by the upload controller
+validation_queue = ValidationQueue()
@@ -0,0 +1,185 @@
+import logging
+from sqlalchemy import and_, func, or_
+from app.models.progress import UserProgress, UserStats
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Leaderboard order; matches the ix_user_stats_rank index
+RANK_ORDER = (UserStats.total_score.desc(), UserStats.user_id)
+
+
+def record_progress(user_id, score_delta, completed_delta, activity):
+    """
+    Apply a change in a user's progress to their running totals
+
+    The change is added to the current session and committed together with
+    the progress update that caused it. A user without a totals row yet
+    (a new user, or one whose progress predates the table) gets it
+    computed from all of their progress records, including the pending
+    update, rather than seeded with this one change.
+
+    Args:
+        user_id (str): ID of the user
+        score_delta (int): Change in the user's total score
+        completed_delta (int): Change in the number of completed challenges
+        activity (datetime): Time of the progress update
+    """
+    updated = UserStats.query.filter_by(user_id=user_id).update({
+        UserStats.total_score: UserStats.total_score + score_delta,
+        UserStats.challenges_completed: UserStats.challenges_completed + completed_delta,
+        UserStats.last_activity: activity
+    }, synchronize_session=False)
+    if not updated:
+        refresh_user_stats([user_id])
+
+
+def refresh_user_stats(user_ids=None):
+    """
+    Recompute users' totals from their progress records
+
+    The change is added to the current session; the caller commits it.
+
+    Args:
+        user_ids (iterable): Users to recompute, or None for every user
+
+    Returns:
+        int: Number of users whose totals were written
+    """
+    stale = UserStats.query
+    totals = db.session.query(
+        UserProgress.user_id,
+        func.coalesce(func.sum(UserProgress.score), 0),
+        func.count(UserProgress.id).filter(UserProgress.is_completed == True),
+        func.max(UserProgress.last_attempt_date)
+    )
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        stale = stale.filter(UserStats.user_id.in_(user_ids))
+        totals = totals.filter(UserProgress.user_id.in_(user_ids))
+    stale.delete()
+    stats = [UserStats(*row) for row in totals.group_by(UserProgress.user_id)]
+    db.session.add_all(stats)
+    return len(stats)
+
+
+def rebuild_user_stats():
+    """
+    Recompute every user's totals from their progress records
+
+    Returns:
+        int: Number of users on the leaderboard
+    """
+    count = refresh_user_stats()
+    db.session.commit()
+    return count
+
+
+def backfill_user_stats():
+    """
+    Fill an empty user_stats table from the progress records
+
+    Databases created before the table existed have progress but no
+    totals, so the leaderboard would be empty; this is cheap to call at
+    every startup because it does nothing once the table has rows.
+
+    Returns:
+        int: Number of users whose totals were written
+    """
+    if UserStats.query.first() is not None or UserProgress.query.first() is None:
+        return 0
+    return rebuild_user_stats()
+
+
+def _before(stats):
+    """Condition matching users ranked ahead of ``stats`` in leaderboard order"""
+    return or_(
+        UserStats.total_score > stats.total_score,
+        and_(UserStats.total_score == stats.total_score, UserStats.user_id < stats.user_id)
+    )
+
+
+def _after(total_score, user_id):
+    """Condition matching users ranked behind the given sort key in leaderboard order"""
+    return or_(
+        UserStats.total_score < total_score,
+        and_(UserStats.total_score == total_score, UserStats.user_id > user_id)
+    )
+
+
+def _ranked(rows, position):
+    """
+    Number consecutive leaderboard rows
+
+    Users with the same score share a rank, and the next score takes the
+    rank matching its position ("1, 2, 2, 4").
+
+    Args:
+        rows (list): ``UserStats`` rows in leaderboard order
+        position (int): Number of users ahead of the first row
+
+    Returns:
+        list: One dict per row with its rank
+    """
+    entries = []
+    rank = None
+    for offset, stats in enumerate(rows):
+        if offset == 0:
+            rank = 1 + (UserStats.query.filter(UserStats.total_score > stats.total_score).count() if position else 0)
+        elif stats.total_score != rows[offset - 1].total_score:
+            rank = position + offset + 1
+        entries.append(dict(stats.to_dict(), rank=rank))
+    return entries
+
+
+def top(limit, after=None):
+    """
+    One page of the leaderboard
+
+    Pages are read from the rank index starting after the last user of the
+    previous page (an index seek plus ``limit`` rows). Numbering a later
+    page counts the users ranked ahead of it on the same index, which is
+    O(rank): deep pages cost more than the first one.
+
+    Args:
+        limit (int): Number of users per page
+        after (tuple): (total_score, user_id) of the last user of the previous page
+
+    Returns:
+        tuple: (ranked entries, whether more users follow)
+    """
+    query = UserStats.query
+    position = 0
+    if after is not None:
+        query = query.filter(_after(*after))
+        position = UserStats.query.filter(~_after(*after)).count()
+    rows = query.order_by(*RANK_ORDER).limit(limit + 1).all()
+    return _ranked(rows[:limit], position), len(rows) > limit
+
+
+def around(user_id, neighbours):
+    """
+    A user's leaderboard entry with the users ranked just above and below
+
+    The user's rank is found by counting the users ahead of them on the
+    rank index, which is O(rank).
+
+    Args:
+        user_id (str): ID of the user
+        neighbours (int): Number of users to include on each side
+
+    Returns:
+        list: Ranked entries, or None if the user has no progress yet
+    """
+    stats = UserStats.query.get(user_id)
+    if stats is None:
+        return None
+    above = UserStats.query.filter(_before(stats)).order_by(
+        UserStats.total_score, UserStats.user_id.desc()
+    ).limit(neighbours).all()
+    below = UserStats.query.filter(_after(stats.total_score, stats.user_id)).order_by(
+        *RANK_ORDER
+    ).limit(neighbours).all()
+    position = UserStats.query.filter(_before(stats)).count() - len(above)
+    return _ranked(above[::-1] + [stats] + below, position)
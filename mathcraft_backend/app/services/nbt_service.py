@@ -0,0 +1,508 @@
+import gzip
+import struct
+import zlib
+import numpy as np
+
+# NBT tag type identifiers
+TAG_END = 0
+TAG_BYTE = 1
+TAG_SHORT = 2
+TAG_INT = 3
+TAG_LONG = 4
+TAG_FLOAT = 5
+TAG_DOUBLE = 6
+TAG_BYTE_ARRAY = 7
+TAG_STRING = 8
+TAG_LIST = 9
+TAG_COMPOUND = 10
+TAG_INT_ARRAY = 11
+TAG_LONG_ARRAY = 12
+
+# Fixed payload sizes and struct formats for the scalar tags
+_SCALAR_FORMATS = {
+    TAG_BYTE: '>b',
+    TAG_SHORT: '>h',
+    TAG_INT: '>i',
+    TAG_LONG: '>q',
+    TAG_FLOAT: '>f',
+    TAG_DOUBLE: '>d',
+}
+_SCALAR_SIZES = {tag: struct.calcsize(fmt) for tag, fmt in _SCALAR_FORMATS.items()}
+
+# NumPy dtypes used when list or array payloads are decoded in bulk
+_ARRAY_DTYPES = {
+    TAG_BYTE: np.dtype('>i1'),
+    TAG_SHORT: np.dtype('>i2'),
+    TAG_INT: np.dtype('>i4'),
+    TAG_LONG: np.dtype('>i8'),
+    TAG_FLOAT: np.dtype('>f4'),
+    TAG_DOUBLE: np.dtype('>f8'),
+    TAG_BYTE_ARRAY: np.dtype('>i1'),
+    TAG_INT_ARRAY: np.dtype('>i4'),
+    TAG_LONG_ARRAY: np.dtype('>i8'),
+}
+
+# Block ids that count as empty space in a structure
+AIR_BLOCK_IDS = frozenset({'minecraft:air', 'minecraft:cave_air', 'minecraft:void_air'})
+
+_READ_CHUNK_SIZE = 1 << 20  # 1 MiB of decompressed data per refill
+_MIN_BLOCK_BATCH = 1 << 10  # Block records matched per vectorized batch,
+_MAX_BLOCK_BATCH = 1 << 16  # growing while records keep the same layout
+
+
+class NBTFormatError(ValueError):
+    """Raised when a file is not a well-formed NBT structure"""
+
+
+class _ZlibReader:
+    """File-like wrapper that inflates a zlib stream with bounded output per read"""
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self._decompressor = zlib.decompressobj()
+        self._eof = False
+
+    def read(self, size):
+        chunks = []
+        remaining = size
+        while remaining > 0 and not self._eof:
+            if self._decompressor.unconsumed_tail:
+                data = self._decompressor.decompress(self._decompressor.unconsumed_tail, remaining)
+            else:
+                compressed = self._fileobj.read(64 * 1024)
+                if not compressed:
+                    data = self._decompressor.flush()
+                    self._eof = True
+                else:
+                    data = self._decompressor.decompress(compressed, remaining)
+            if self._decompressor.eof:
+                self._eof = True
+            chunks.append(data)
+            remaining -= len(data)
+        return b''.join(chunks)
+
+
+class _ByteStream:
+    """
+    Small read-ahead buffer over a decompressed stream
+
+    Only a window of the decompressed data is held in memory at any time, so
+    peak memory is bounded by the refill size rather than the file size.
+    """
+
+    def __init__(self, raw, chunk_size=_READ_CHUNK_SIZE):
+        self._raw = raw
+        self._chunk_size = chunk_size
+        self._buf = bytearray()
+        self._pos = 0
+
+    def _fill(self, size):
+        """Make sure at least ``size`` bytes are buffered; returns False at EOF"""
+        if len(self._buf) - self._pos >= size:
+            return True
+        if self._pos:
+            del self._buf[:self._pos]
+            self._pos = 0
+        while len(self._buf) < size:
+            chunk = self._raw.read(max(self._chunk_size, size - len(self._buf)))
+            if not chunk:
+                return False
+            self._buf += chunk
+        return True
+
+    def read(self, size):
+        if not self._fill(size):
+            raise NBTFormatError("Unexpected end of NBT data")
+        data = bytes(self._buf[self._pos:self._pos + size])
+        self._pos += size
+        return data
+
+    def unpack(self, fmt, size):
+        if not self._fill(size):
+            raise NBTFormatError("Unexpected end of NBT data")
+        value = struct.unpack_from(fmt, self._buf, self._pos)[0]
+        self._pos += size
+        return value
+
+    def peek_available(self, size):
+        """Return up to ``size`` buffered bytes without consuming them"""
+        self._fill(size)
+        return bytes(self._buf[self._pos:self._pos + size])
+
+    def skip(self, size):
+        if size < 0:
+            raise NBTFormatError("Negative NBT payload length")
+        buffered = len(self._buf) - self._pos
+        if size <= buffered:
+            self._pos += size
+            return
+        # Drop the buffer and discard the rest straight from the raw stream
+        size -= buffered
+        self._buf = bytearray()
+        self._pos = 0
+        while size > 0:
+            chunk = self._raw.read(min(self._chunk_size, size))
+            if not chunk:
+                raise NBTFormatError("Unexpected end of NBT data")
+            size -= len(chunk)
+
+    def read_into(self, out):
+        """Fill a writable uint8 buffer without staging the whole payload in memory"""
+        offset = 0
+        total = len(out)
+        while offset < total:
+            if len(self._buf) == self._pos and not self._fill(1):
+                raise NBTFormatError("Unexpected end of NBT data")
+            take = min(total - offset, len(self._buf) - self._pos)
+            out[offset:offset + take] = np.frombuffer(self._buf, dtype=np.uint8, count=take, offset=self._pos)
+            self._pos += take
+            offset += take
+
+
+class StructureData:
+    """Decoded contents of a structure ``.nbt`` file kept as flat NumPy arrays"""
+
+    def __init__(self, size, palette, states, positions, data_version=None, entity_count=0):
+        self.size = size  # (x, y, z) extents of the structure
+        self.palette = palette  # Block id for each palette index
+        self.states = states  # int32 palette index per block
+        self.positions = positions  # (n, 3) int32 x/y/z per block
+        self.data_version = data_version
+        self.entity_count = entity_count
+
+    def __repr__(self):
+        return f'<StructureData {self.size} with {len(self.states)} blocks>'
+
+
+class StructureReader:
+    """
+    Streaming decoder for Minecraft structure files
+
+    The root compound is walked tag by tag. Keys the validators do not need
+    (entities, tile entity data) are skipped without building Python objects,
+    and the large ``blocks`` list is decoded in vectorized batches straight
+    into NumPy arrays.
+    """
+
+    def __init__(self, stream, max_blocks=None):
+        self._stream = stream
+        self._max_blocks = max_blocks  # Largest list or array decoded into memory
+
+    def _read_length(self):
+        """Read the signed length of an array or list, rejecting negative values"""
+        length = self._stream.unpack('>i', 4)
+        if length < 0:
+            raise NBTFormatError("Negative array or list length")
+        return length
+
+    def _check_allocation(self, length):
+        """Refuse to allocate arrays for more entries than a build may hold"""
+        if self._max_blocks is not None and length > self._max_blocks:
+            raise NBTFormatError(f"List of {length} entries exceeds {self._max_blocks} blocks")
+
+    def _read_tag_type(self):
+        return self._stream.unpack('>B', 1)
+
+    def _read_string(self):
+        length = self._stream.unpack('>H', 2)
+        return self._stream.read(length).decode('utf-8', errors='replace')
+
+    def _read_array(self, dtype, length):
+        """Decode ``length`` big-endian items straight into a native-endian array"""
+        self._check_allocation(length)
+        out = np.empty(length, dtype=dtype)
+        self._stream.read_into(out.view(np.uint8))
+        return out.astype(dtype.newbyteorder('='))
+
+    def read_payload(self, tag_type):
+        """Decode a payload into plain Python values (or arrays for bulk types)"""
+        if tag_type in _SCALAR_FORMATS:
+            return self._stream.unpack(_SCALAR_FORMATS[tag_type], _SCALAR_SIZES[tag_type])
+        if tag_type == TAG_STRING:
+            return self._read_string()
+        if tag_type in (TAG_BYTE_ARRAY, TAG_INT_ARRAY, TAG_LONG_ARRAY):
+            return self._read_array(_ARRAY_DTYPES[tag_type], self._read_length())
+        if tag_type == TAG_LIST:
+            item_type = self._read_tag_type()
+            length = self._read_length()
+            if item_type in _SCALAR_FORMATS:
+                return self._read_array(_ARRAY_DTYPES[item_type], length)
+            return [self.read_payload(item_type) for _ in range(length)]
+        if tag_type == TAG_COMPOUND:
+            compound = {}
+            while True:
+                child_type = self._read_tag_type()
+                if child_type == TAG_END:
+                    return compound
+                name = self._read_string()
+                compound[name] = self.read_payload(child_type)
+        raise NBTFormatError(f"Unknown NBT tag type {tag_type}")
+
+    def skip_payload(self, tag_type):
+        """Advance past a payload without materialising it"""
+        if tag_type in _SCALAR_SIZES:
+            self._stream.skip(_SCALAR_SIZES[tag_type])
+        elif tag_type == TAG_STRING:
+            self._stream.skip(self._stream.unpack('>H', 2))
+        elif tag_type in (TAG_BYTE_ARRAY, TAG_INT_ARRAY, TAG_LONG_ARRAY):
+            self._stream.skip(self._read_length() * _ARRAY_DTYPES[tag_type].itemsize)
+        elif tag_type == TAG_LIST:
+            item_type = self._read_tag_type()
+            length = self._read_length()
+            if item_type in _SCALAR_SIZES:
+                self._stream.skip(length * _SCALAR_SIZES[item_type])
+            else:
+                for _ in range(length):
+                    self.skip_payload(item_type)
+        elif tag_type == TAG_COMPOUND:
+            while True:
+                child_type = self._read_tag_type()
+                if child_type == TAG_END:
+                    return
+                self._stream.skip(self._stream.unpack('>H', 2))
+                self.skip_payload(child_type)
+        elif tag_type != TAG_END:
+            raise NBTFormatError(f"Unknown NBT tag type {tag_type}")
+
+    def _read_palette(self, tag_type):
+        """Read a palette list keeping only each entry's ``Name``"""
+        if tag_type != TAG_LIST:
+            raise NBTFormatError("Structure palette must be a list")
+        item_type = self._read_tag_type()
+        length = self._read_length()
+        if length > 0 and item_type != TAG_COMPOUND:
+            raise NBTFormatError("Structure palette entries must be compounds")
+        palette = []
+        for _ in range(length):
+            name = None
+            while True:
+                child_type = self._read_tag_type()
+                if child_type == TAG_END:
+                    break
+                key = self._read_string()
+                if key == 'Name' and child_type == TAG_STRING:
+                    name = self._read_string()
+                else:
+                    self.skip_payload(child_type)
+            palette.append(name or 'minecraft:air')
+        return palette
+
+    def _read_palettes(self, tag_type):
+        """Read the first of several random palettes and skip the rest"""
+        if tag_type != TAG_LIST:
+            raise NBTFormatError("Structure palettes must be a list")
+        item_type = self._read_tag_type()
+        length = self._read_length()
+        if length == 0:
+            return []
+        palette = self._read_palette(item_type)
+        for _ in range(length - 1):
+            self.skip_payload(item_type)
+        return palette
+
+    def _read_block_record(self):
+        """
+        Decode one entry of the ``blocks`` list the slow way
+
+        Returns:
+            tuple: (state, (x, y, z), key_order) where key_order is None if the
+            record carries anything other than ``pos`` and ``state``
+        """
+        state = 0
+        pos = (0, 0, 0)
+        keys = []
+        simple = True
+        while True:
+            child_type = self._read_tag_type()
+            if child_type == TAG_END:
+                break
+            key = self._read_string()
+            if key == 'state' and child_type == TAG_INT:
+                state = self._stream.unpack('>i', 4)
+                keys.append(key)
+            elif key == 'pos' and child_type == TAG_LIST:
+                item_type = self._read_tag_type()
+                length = self._stream.unpack('>i', 4)
+                if item_type != TAG_INT or length != 3:
+                    raise NBTFormatError("Block position must be a list of three ints")
+                pos = struct.unpack('>3i', self._stream.read(12))
+                keys.append(key)
+            else:
+                # Tile entity data ("nbt") and anything unexpected is skipped
+                self.skip_payload(child_type)
+                simple = False
+        return state, pos, (tuple(keys) if simple and len(keys) == 2 else None)
+
+    @staticmethod
+    def _block_template(key_order):
+        """
+        Build the byte layout of a plain ``{pos, state}`` record
+
+        Returns:
+            tuple: (template bytes with zeroed values, mask of the constant
+            bytes, state offset, pos offset)
+        """
+        template = bytearray()
+        constant = bytearray()
+        offsets = {}
+        for key in key_order:
+            if key == 'pos':
+                header = struct.pack('>BH3sBi', TAG_LIST, 3, b'pos', TAG_INT, 3)
+                value_size = 12
+            else:
+                header = struct.pack('>BH5s', TAG_INT, 5, b'state')
+                value_size = 4
+            offsets[key] = len(template) + len(header)
+            template += header + bytes(value_size)
+            constant += b'\xff' * len(header) + bytes(value_size)
+        template.append(TAG_END)
+        constant.append(0xff)
+        return (np.frombuffer(bytes(template), dtype=np.uint8), np.frombuffer(bytes(constant), dtype=np.uint8),
+                offsets['state'], offsets['pos'])
+
+    def _read_blocks(self, tag_type):
+        """Decode the ``blocks`` list into state and position arrays"""
+        if tag_type != TAG_LIST:
+            raise NBTFormatError("Structure blocks must be a list")
+        item_type = self._read_tag_type()
+        length = self._read_length()
+        self._check_allocation(length)
+        states = np.empty(length, dtype=np.int32)
+        positions = np.empty((length, 3), dtype=np.int32)
+        if length and item_type != TAG_COMPOUND:
+            raise NBTFormatError("Structure block entries must be compounds")
+
+        template = None
+        batch_size = _MIN_BLOCK_BATCH
+        index = 0
+        while index < length:
+            matched = 0
+            if template is not None:
+                template_bytes, mask, state_offset, pos_offset = template
+                record_length = len(template_bytes)
+                batch = min(length - index, batch_size)
+                raw = self._stream.peek_available(batch * record_length)
+                batch = len(raw) // record_length
+                if batch:
+                    records = np.frombuffer(raw, dtype=np.uint8, count=batch * record_length)
+                    records = records.reshape(batch, record_length)
+                    # The first differing constant byte marks the first record with another layout
+                    mismatch = (records & mask) != template_bytes
+                    first = int(mismatch.argmax())
+                    matched = first // record_length if mismatch.flat[first] else batch
+                # Grow the batch while records keep matching, shrink it after a miss
+                if matched == batch:
+                    batch_size = min(batch_size * 2, _MAX_BLOCK_BATCH)
+                else:
+                    batch_size = _MIN_BLOCK_BATCH
+                if matched:
+                    records = records[:matched]
+                    states[index:index + matched] = np.ascontiguousarray(
+                        records[:, state_offset:state_offset + 4]).view('>i4')[:, 0]
+                    positions[index:index + matched] = np.ascontiguousarray(
+                        records[:, pos_offset:pos_offset + 12]).view('>i4')
+                    self._stream.skip(matched * record_length)
+                    index += matched
+                    continue
+
+            # Records that do not fit the fast-path layout are decoded one at a time
+            state, pos, key_order = self._read_block_record()
+            states[index] = state
+            positions[index] = pos
+            index += 1
+            if template is None and key_order is not None:
+                template = self._block_template(key_order)
+        return states, positions
+
+    def read_structure(self):
+        """
+        Decode the root compound of a structure file
+
+        Returns:
+            StructureData: The decoded structure
+        """
+        if self._read_tag_type() != TAG_COMPOUND:
+            raise NBTFormatError("NBT root tag must be a compound")
+        self._read_string()  # Root name is unused
+
+        size = (0, 0, 0)
+        palette = []
+        states = np.empty(0, dtype=np.int32)
+        positions = np.empty((0, 3), dtype=np.int32)
+        data_version = None
+        entity_count = 0
+
+        while True:
+            tag_type = self._read_tag_type()
+            if tag_type == TAG_END:
+                break
+            key = self._read_string()
+            if key == 'size':
+                values = self.read_payload(tag_type)
+                if len(values) != 3:
+                    raise NBTFormatError("Structure size must have three components")
+                size = tuple(int(v) for v in values)
+            elif key == 'palette':
+                palette = self._read_palette(tag_type)
+            elif key == 'palettes':
+                palette = self._read_palettes(tag_type)
+            elif key == 'blocks':
+                states, positions = self._read_blocks(tag_type)
+            elif key == 'DataVersion' and tag_type == TAG_INT:
+                data_version = self.read_payload(tag_type)
+            elif key == 'entities' and tag_type == TAG_LIST:
+                # Only the number of entities is kept; their payloads are skipped
+                item_type = self._read_tag_type()
+                entity_count = self._read_length()
+                for _ in range(entity_count):
+                    self.skip_payload(item_type)
+            else:
+                self.skip_payload(tag_type)
+
+        if len(states) and (states.min() < 0 or states.max() >= len(palette)):
+            raise NBTFormatError("Block state index outside of the palette")
+        return StructureData(size, palette, states, positions, data_version, entity_count)
+
+
+def open_nbt_stream(fileobj):
+    """
+    Wrap a binary file object in a decompressing byte stream
+
+    gzip, zlib and uncompressed NBT data are detected from the first bytes.
+
+    Args:
+        fileobj: Binary file object positioned at the start of the data
+
+    Returns:
+        _ByteStream: Buffered stream over the decompressed NBT data
+    """
+    header = fileobj.read(2)
+    fileobj.seek(-len(header), 1)
+    if header[:2] == b'\x1f\x8b':
+        raw = gzip.GzipFile(fileobj=fileobj, mode='rb')
+    elif len(header) == 2 and header[0] & 0x0f == 8 and (header[0] << 8 | header[1]) % 31 == 0:
+        raw = _ZlibReader(fileobj)
+    elif header[:1] == bytes([TAG_COMPOUND]):
+        raw = fileobj
+    else:
+        raise NBTFormatError("Unrecognised NBT file header")
+    return _ByteStream(raw)
+
+
+def read_structure_file(file_path, max_blocks=None):
+    """
+    Decode a Minecraft structure ``.nbt`` file
+
+    Args:
+        file_path (str): Path to the NBT file
+        max_blocks (int): Most entries a list or array may declare before
+            it is decoded into memory (None for no limit)
+
+    Returns:
+        StructureData: The decoded structure
+    """
+    try:
+        with open(file_path, 'rb') as fileobj:
+            return StructureReader(open_nbt_stream(fileobj), max_blocks).read_structure()
+    except (OSError, EOFError, zlib.error) as e:
+        raise NBTFormatError(f"Could not read NBT data: {e}") from e
@@ -0,0 +1,99 @@
+import json
+import base64
+from datetime import datetime
+
+
+class PaginationError(ValueError):
+    """Raised for malformed pagination parameters"""
+
+
+def encode_cursor(*values):
+    """
+    Build an opaque cursor from the sort key of the last row of a page
+
+    Args:
+        *values: Sort key values; datetimes are supported
+
+    Returns:
+        str: URL-safe cursor string
+    """
+    encoded = [{"dt": value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(encoded, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, *types):
+    """
+    Recover the sort key stored in a cursor
+
+    Args:
+        cursor (str): Cursor from ``encode_cursor``
+        *types: Expected type of each value, e.g. ``datetime, int``
+
+    Returns:
+        list: Sort key values
+
+    Raises:
+        PaginationError: If the cursor is malformed or holds values of the wrong type
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        values = [datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value for value in values]
+    except (ValueError, TypeError, KeyError):
+        raise PaginationError("Invalid cursor")
+    # bool is an int subclass but never a valid sort key
+    if any(isinstance(value, bool) or not isinstance(value, expected) for value, expected in zip(values, types)):
+        raise PaginationError("Invalid cursor")
+    return values
+
+
+def parse_limit(value, default, maximum):
+    """
+    Read a page size from a query parameter
+
+    Args:
+        value (str): Raw parameter value, or None
+        default (int): Page size when the parameter is missing
+        maximum (int): Largest page size allowed
+
+    Returns:
+        int: Page size between 1 and ``maximum``
+
+    Raises:
+        PaginationError: If the value is not a positive integer
+    """
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be at least 1")
+    return min(limit, maximum)
+
+
+def parse_fields(value, allowed):
+    """
+    Read a comma-separated field selection
+
+    Args:
+        value (str): Raw parameter value, or None for every field
+        allowed (iterable): Field names that may be selected
+
+    Returns:
+        list: Selected field names, or None for every field
+
+    Raises:
+        PaginationError: If an unknown field is requested
+    """
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise PaginationError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
@@ -0,0 +1,179 @@
+import logging
+from datetime import datetime
+from sqlalchemy import tuple_
+from flask import current_app
+from app.models.challenge import Challenge
+from app.models.progress import UserProgress
+from app.services.leaderboard_service import refresh_user_stats
+from app.services.ranking_service import leaderboards
+from app.services.achievement_service import achievement_engine
+from app.services.database_service import upsert_insert
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Progress fields a sync record may set, with their validators
+SYNC_FIELDS = {
+    'attempts': lambda value: isinstance(value, int) and not isinstance(value, bool) and value >= 0,
+    'score': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'is_completed': lambda value: isinstance(value, bool),
+    'last_attempt_date': lambda value: isinstance(value, str)
+}
+
+
+class ProgressSyncError(ValueError):
+    """Raised when a bulk progress request cannot be applied"""
+
+
+def parse_records(data):
+    """
+    Validate the records of a bulk progress request
+
+    Later records for the same user and challenge replace earlier ones.
+
+    Args:
+        data (dict): Request body, ``{"records": [...]}``
+
+    Returns:
+        dict: (user_id, challenge_id) -> fields to set
+
+    Raises:
+        ProgressSyncError: If the body or any record is invalid
+    """
+    records = data.get('records') if isinstance(data, dict) else None
+    if not isinstance(records, list) or not records:
+        raise ProgressSyncError("Request body must contain a non-empty 'records' list")
+    max_records = current_app.config['PROGRESS_SYNC_MAX_RECORDS']
+    if len(records) > max_records:
+        raise ProgressSyncError(f"At most {max_records} records can be sent at once")
+
+    parsed = {}
+    for position, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ProgressSyncError(f"Record {position} is not an object")
+        user_id = record.get('user_id')
+        challenge_id = record.get('challenge_id')
+        if not isinstance(user_id, str) or not 0 < len(user_id) <= 50:
+            raise ProgressSyncError(f"Record {position} has an invalid user_id")
+        if not isinstance(challenge_id, int) or isinstance(challenge_id, bool):
+            raise ProgressSyncError(f"Record {position} has an invalid challenge_id")
+
+        fields = {}
+        for field, valid in SYNC_FIELDS.items():
+            if field in record:
+                if not valid(record[field]):
+                    raise ProgressSyncError(f"Record {position} has an invalid {field}")
+                fields[field] = record[field]
+        if 'last_attempt_date' in fields:
+            try:
+                fields['last_attempt_date'] = datetime.fromisoformat(fields['last_attempt_date'])
+            except ValueError:
+                raise ProgressSyncError(f"Record {position} has an invalid last_attempt_date")
+        parsed[(user_id, challenge_id)] = fields
+
+    challenge_ids = {challenge_id for _, challenge_id in parsed}
+    known = {challenge_id for challenge_id, in db.session.query(Challenge.id).filter(Challenge.id.in_(challenge_ids))}
+    unknown = sorted(challenge_ids - known)
+    if unknown:
+        raise ProgressSyncError(f"Unknown challenge IDs: {', '.join(str(challenge_id) for challenge_id in unknown)}")
+    return parsed
+
+
+def _upsert(rows, fields, now):
+    """
+    Insert or update a batch of progress rows in one statement
+
+    Args:
+        rows (list): Complete column values for each row, as for a new record
+        fields (tuple): Fields the records set; only these change on existing rows
+        now (datetime): Time of the sync
+    """
+    statement = upsert_insert(UserProgress).values(rows)
+    changes = {field: statement.excluded[field] for field in fields}
+    changes['updated_at'] = now
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['user_id', 'challenge_id'],
+        set_=changes
+    ))
+
+
+def apply_progress(records):
+    """
+    Apply validated progress records
+
+    Records are written in batches of ``PROGRESS_SYNC_BATCH_SIZE`` with one
+    ``INSERT ... ON CONFLICT DO UPDATE`` per batch (per combination of
+    fields sent, usually just one), relying on the unique_user_challenge
+    constraint. User totals are then recomputed for the users touched, all
+    in one transaction, before leaderboards and achievements are updated.
+
+    Args:
+        records (dict): Output of ``parse_records``
+
+    Returns:
+        dict: Summary of the sync
+    """
+    now = datetime.utcnow()
+    keys = list(records)
+    batch_size = current_app.config['PROGRESS_SYNC_BATCH_SIZE']
+    previous = {}
+    try:
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+
+            # Current values, for the leaderboard and achievement deltas
+            existing = db.session.query(
+                UserProgress.user_id, UserProgress.challenge_id, UserProgress.score,
+                UserProgress.is_completed, UserProgress.updated_at
+            ).filter(tuple_(UserProgress.user_id, UserProgress.challenge_id).in_(batch))
+            for user_id, challenge_id, score, is_completed, updated_at in existing:
+                previous[(user_id, challenge_id)] = (score or 0, bool(is_completed), updated_at)
+
+            groups = {}
+            for key in batch:
+                fields = records[key]
+                row = {
+                    'user_id': key[0], 'challenge_id': key[1], 'attempts': 0, 'score': 0,
+                    'is_completed': False, 'last_attempt_date': now, 'created_at': now, 'updated_at': now
+                }
+                row.update(fields)
+                groups.setdefault(tuple(sorted(fields)), []).append(row)
+            for fields, rows in groups.items():
+                _upsert(rows, fields, now)
+
+        user_ids = {user_id for user_id, _ in keys}
+        refresh_user_stats(user_ids)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Derived state held in memory, for the users touched only
+    changes = {}
+    for key in keys:
+        user_id, challenge_id = key
+        old_score, was_completed, old_updated_at = previous.get(key, (0, False, None))
+        fields = records[key]
+        new_score = fields.get('score', old_score)
+        is_completed = fields.get('is_completed', was_completed)
+        leaderboards.record(user_id, challenge_id, old_score, old_updated_at, new_score, now)
+        completed, score_delta = changes.get(user_id, (0, 0))
+        changes[user_id] = (completed + int(is_completed and not was_completed), score_delta + new_score - old_score)
+
+    try:
+        unlocked = achievement_engine.process_many({
+            user_id: (None, completed, score_delta) for user_id, (completed, score_delta) in changes.items()
+        })
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error unlocking achievements after bulk progress update: {str(e)}")
+        unlocked = {}
+
+    return {
+        "records": len(keys),
+        "created": len(keys) - len(previous),
+        "updated": len(previous),
+        "users": len(changes),
+        "achievements_unlocked": unlocked
+    }
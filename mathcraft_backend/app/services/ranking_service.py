@@ -0,0 +1,366 @@
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sortedcontainers import SortedList
+from sqlalchemy import Integer, case, func, select, type_coerce
+from app.models.progress import UserProgress
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Leaderboards summed over the progress updated since the start of the current period
+WINDOWS = ('weekly', 'monthly')
+
+# Users are numbered as they are first seen; the number fills the low bits of a ranking key
+_INDEX_BITS = 32
+_INDEX_MASK = (1 << _INDEX_BITS) - 1
+
+# How long before a rebuild starts a progress write may have been stamped
+# and still be committed and recorded after it (flush to commit)
+_RECORD_SLACK = timedelta(minutes=5)
+
+
+def period_start(window, now):
+    """
+    Start of the calendar period a windowed leaderboard covers
+
+    Args:
+        window (str): 'weekly' (weeks start on Monday) or 'monthly'
+        now (datetime): Current UTC time
+
+    Returns:
+        datetime: Midnight UTC at the start of the period
+    """
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window == 'weekly':
+        return midnight - timedelta(days=midnight.weekday())
+    return midnight.replace(day=1)
+
+
+class Ranking:
+    """
+    Scores of a set of users kept in rank order
+
+    Each user is stored as one integer key, the negated score in the high
+    bits and the user's number in the low bits, so a ``SortedList`` of plain
+    ints gives the order (highest score first) and rank and top-K lookups
+    take O(log n).
+    """
+
+    def __init__(self, scores=None):
+        self._scores = dict(scores or {})
+        self._keys = SortedList((-score << _INDEX_BITS) | index for index, score in self._scores.items())
+
+    @staticmethod
+    def _key(index, score):
+        return (-score << _INDEX_BITS) | index
+
+    def __len__(self):
+        return len(self._keys)
+
+    def score(self, index):
+        return self._scores.get(index)
+
+    def set(self, index, score):
+        """Set a user's score, adding the user if needed"""
+        old = self._scores.get(index)
+        if old == score:
+            return
+        if old is not None:
+            self._keys.remove(self._key(index, old))
+        self._scores[index] = score
+        self._keys.add(self._key(index, score))
+
+    def add(self, index, delta):
+        """Add to a user's score, starting from 0"""
+        self.set(index, self._scores.get(index, 0) + delta)
+
+    def rank(self, score):
+        """Rank of a score; users with the same score share a rank"""
+        return self._keys.bisect_left(-score << _INDEX_BITS) + 1
+
+    def position(self, index):
+        """Number of users ordered ahead of a user"""
+        return self._keys.index(self._key(index, self._scores[index]))
+
+    def slice(self, start, stop):
+        """
+        Users between two positions in rank order
+
+        Returns:
+            list: (user number, score, rank) tuples
+        """
+        entries = []
+        for key in self._keys.islice(max(start, 0), stop):
+            score = -(key >> _INDEX_BITS)
+            entries.append((key & _INDEX_MASK, score, self.rank(score)))
+        return entries
+
+    def position_after(self, score, index):
+        """Position just after the given sort key, whether or not it is still present"""
+        return self._keys.bisect_right(self._key(index, score))
+
+
+class Leaderboards:
+    """
+    In-memory weekly, monthly and per-challenge leaderboards
+
+    The rankings are built from ``UserProgress`` on first use (or at
+    startup), updated by every progress write in this process, and rebuilt
+    when a new week or month starts or when ``LEADERBOARD_REBUILD_INTERVAL``
+    seconds have passed, which also picks up writes made by other worker
+    processes. Reads never query the database.
+
+    Only the very first build makes a request wait. Later rebuilds run on
+    one background thread while requests keep reading the previous
+    rankings; progress recorded in the meantime is replayed onto the new
+    rankings when they are swapped in, except for writes the rebuild
+    already read. Those are recognised by their ``updated_at``: the
+    rebuild keeps the timestamps of the rows written since shortly before
+    it started, and an update that is not newer than the row it read is
+    skipped, since window totals are sums and would count it twice.
+
+    Every worker process holds its own copy. Measured with
+    app/scripts/bench_leaderboard.py, that is roughly 100 MiB per million
+    progress rows (about 500 MiB for 100,000 users x 50 challenges), and
+    up to twice as much while a rebuild is in progress, since the old
+    rankings are kept until the new ones are ready.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._users = []
+        self._index = {}
+        self._windows = {}
+        self._challenges = {}
+        self._periods = {}
+        self._built_at = None
+        self._pending = None  # Progress recorded while a rebuild is reading the database
+
+    def _number(self, user_id):
+        index = self._index.get(user_id)
+        if index is None:
+            index = self._index[user_id] = len(self._users)
+            self._users.append(user_id)
+        return index
+
+    def rebuild(self, chunk_size=10000):
+        """
+        Rebuild every ranking from the progress table
+
+        The new rankings are built without holding the read lock and swapped
+        in at the end, so leaderboard requests are served throughout once a
+        first build exists.
+
+        Args:
+            chunk_size (int): Rows fetched from the database at a time
+
+        Returns:
+            int: Number of progress rows read
+        """
+        with self._rebuild_lock:
+            return self._rebuild(chunk_size)
+
+    def _rebuild(self, chunk_size=10000):
+        # Progress recorded from here on may or may not be in the rows read below
+        with self._lock:
+            self._pending = []
+        try:
+            periods, users, index, windows, challenges, seen, count = self._load(
+                chunk_size, datetime.utcnow() - _RECORD_SLACK
+            )
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self._users, self._index = users, index
+            self._windows, self._challenges = windows, challenges
+            self._periods = periods
+            self._built_at = time.monotonic()
+            pending, self._pending = self._pending, None
+            for user_id, challenge_id, old_score, old_updated_at, new_score, updated_at in pending:
+                read = seen.get((index.get(user_id), challenge_id))
+                if read is None or read < updated_at:
+                    self._apply(user_id, challenge_id, old_score, old_updated_at, new_score)
+        logger.info(f"Rebuilt leaderboards from {count} progress records for {len(users)} users")
+        return count
+
+    def _load(self, chunk_size, recent):
+        """
+        Read the progress table into new rankings, without touching the current ones
+
+        Args:
+            chunk_size (int): Rows fetched from the database at a time
+            recent (datetime): Rows updated since then have their
+                ``updated_at`` returned in ``seen``
+
+        Returns:
+            tuple: (periods, users, index, windows, challenges, seen, count),
+            where ``seen`` maps (user number, challenge_id) to the
+            ``updated_at`` read for recently updated rows
+        """
+        now = datetime.utcnow()
+        periods = {window: period_start(window, now) for window in WINDOWS}
+        users, index = [], {}
+        windows = {window: {} for window in WINDOWS}
+        challenges = {}
+        seen = {}
+
+        # Window membership is worked out by the database, which avoids
+        # turning millions of stored timestamps into datetime objects
+        starts = list(periods.values())
+        statement = select(
+            UserProgress.user_id,
+            UserProgress.challenge_id,
+            func.coalesce(UserProgress.score, 0),
+            case((UserProgress.updated_at >= recent, UserProgress.updated_at), else_=None),
+            *(type_coerce(UserProgress.updated_at >= start, Integer) for start in starts)
+        )
+        result = db.session.connection().execution_options(yield_per=chunk_size).execute(statement)
+        totals_by_window = [windows[window] for window in periods]
+        count = 0
+        for rows in result.partitions():
+            for user_id, challenge_id, score, updated_at, *in_window in rows:
+                number = index.get(user_id)
+                if number is None:
+                    number = index[user_id] = len(users)
+                    users.append(user_id)
+                challenges.setdefault(challenge_id, {})[number] = score
+                if updated_at is not None:
+                    seen[(number, challenge_id)] = updated_at
+                for totals, member in zip(totals_by_window, in_window):
+                    if member:
+                        totals[number] = totals.get(number, 0) + score
+            count += len(rows)
+
+        windows = {window: Ranking(totals) for window, totals in windows.items()}
+        challenges = {challenge_id: Ranking(scores) for challenge_id, scores in challenges.items()}
+        return periods, users, index, windows, challenges, seen, count
+
+    def _stale(self, interval):
+        if self._built_at is None:
+            return True
+        if interval and time.monotonic() - self._built_at > interval:
+            return True
+        now = datetime.utcnow()
+        return any(period_start(window, now) != start for window, start in self._periods.items())
+
+    def ensure_current(self, interval=None):
+        """
+        Build the rankings if they were never built, or start a background rebuild if they are out of date
+
+        Args:
+            interval (int): Seconds after which the rankings are rebuilt
+        """
+        if not self._stale(interval):
+            return
+        if self._built_at is None:
+            with self._rebuild_lock:
+                # Another request may have built them while this one waited
+                if self._built_at is None:
+                    self._rebuild()
+            return
+        if not self._rebuild_lock.acquire(blocking=False):
+            # A rebuild is already running; serve the current rankings
+            return
+        if not self._stale(interval):
+            self._rebuild_lock.release()
+            return
+        app = current_app._get_current_object()
+        threading.Thread(target=self._background_rebuild, args=(app,),
+                         name='leaderboard-rebuild', daemon=True).start()
+
+    def _background_rebuild(self, app):
+        """Rebuild on a background thread; releases the rebuild lock taken by ``ensure_current``"""
+        try:
+            with app.app_context():
+                self._rebuild()
+        except Exception as e:
+            logger.error(f"Error rebuilding leaderboards: {str(e)}")
+        finally:
+            self._rebuild_lock.release()
+
+    def record(self, user_id, challenge_id, old_score, old_updated_at, new_score, updated_at):
+        """
+        Apply a committed progress update
+
+        Args:
+            user_id (str): ID of the user
+            challenge_id (int): ID of the challenge
+            old_score (int): Score before the update (0 for a new record)
+            old_updated_at (datetime): Previous update time, or None for a new record
+            new_score (int): Score after the update
+            updated_at (datetime): Update time stored with the new score
+        """
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((user_id, challenge_id, old_score, old_updated_at, new_score, updated_at))
+            if self._built_at is not None:
+                # Before the first build, the build reads this update from the database
+                self._apply(user_id, challenge_id, old_score, old_updated_at, new_score)
+
+    def _apply(self, user_id, challenge_id, old_score, old_updated_at, new_score):
+        """Apply a progress update to the current rankings; the caller holds the lock"""
+        number = self._number(user_id)
+        self._challenges.setdefault(challenge_id, Ranking()).set(number, new_score)
+        for window, start in self._periods.items():
+            counted = old_score if old_updated_at is not None and old_updated_at >= start else 0
+            self._windows[window].add(number, new_score - counted)
+
+    def _ranking(self, window=None, challenge_id=None):
+        if challenge_id is not None:
+            return self._challenges.get(challenge_id) or Ranking()
+        return self._windows[window]
+
+    def _entries(self, ranking, start, stop):
+        return [
+            {"user_id": self._users[number], "score": score, "rank": rank}
+            for number, score, rank in ranking.slice(start, stop)
+        ]
+
+    def top(self, limit, after=None, window=None, challenge_id=None):
+        """
+        One page of a leaderboard
+
+        Args:
+            limit (int): Number of users per page
+            after (tuple): (score, user_id) of the last user of the previous page
+            window (str): 'weekly' or 'monthly'
+            challenge_id (int): Challenge whose leaderboard to read instead
+
+        Returns:
+            tuple: (ranked entries, whether more users follow)
+        """
+        with self._lock:
+            ranking = self._ranking(window, challenge_id)
+            start = 0
+            if after is not None:
+                score, user_id = after
+                number = self._index.get(user_id, _INDEX_MASK)
+                start = ranking.position_after(score, number)
+            return self._entries(ranking, start, start + limit), start + limit < len(ranking)
+
+    def around(self, user_id, neighbours, window=None, challenge_id=None):
+        """
+        A user's entry with the users ranked just above and below
+
+        Returns:
+            list: Ranked entries, or None if the user is not on the leaderboard
+        """
+        with self._lock:
+            ranking = self._ranking(window, challenge_id)
+            number = self._index.get(user_id)
+            if number is None or ranking.score(number) is None:
+                return None
+            position = ranking.position(number)
+            return self._entries(ranking, position - neighbours, position + neighbours + 1)
+
+
+# Shared leaderboards used by the progress controller
+leaderboards = Leaderboards()
@@ -0,0 +1,105 @@
+import math
+import numpy as np
+
+# Default relative tolerance when comparing a measured ratio with the expected one
+DEFAULT_RATIO_TOLERANCE = 0.01
+
+# Evaluators for ``math_relationship`` criteria, keyed by relationship type
+RELATIONSHIP_EVALUATORS = {}
+
+
+def register_relationship(relationship_type):
+    """
+    Register an evaluator for a ``math_relationship`` type
+
+    An evaluator takes ``(volume, criteria)`` and returns a tuple of the
+    measured value and a dict of the measurements behind it.
+
+    Args:
+        relationship_type (str): Value of ``math_relationship.type`` handled
+    """
+    def decorator(evaluator):
+        RELATIONSHIP_EVALUATORS[relationship_type] = evaluator
+        return evaluator
+    return decorator
+
+
+def _exposed_faces(mask):
+    """Count faces between filled and empty cells along every axis of a boolean array"""
+    padded = np.pad(mask, 1)
+    return sum(
+        int(np.count_nonzero(np.diff(padded, axis=axis)))
+        for axis in range(padded.ndim)
+    )
+
+
+def footprint(volume):
+    """Boolean (depth, width) projection of the build onto the ground, cropped to the build"""
+    bounds = volume.bounding_box()
+    if bounds is None:
+        return np.zeros((0, 0), dtype=bool)
+    (y0, z0, x0), (y1, z1, x1) = bounds
+    return (volume.grid[y0:y1, z0:z1, x0:x1] != 0).any(axis=0)
+
+
+@register_relationship('area_perimeter')
+def area_perimeter(volume, criteria):
+    """Footprint area divided by footprint perimeter"""
+    ground = footprint(volume)
+    area = int(np.count_nonzero(ground))
+    perimeter = _exposed_faces(ground)
+    return (area / perimeter if perimeter else 0.0), {"area": area, "perimeter": perimeter}
+
+
+@register_relationship('volume_surface_area')
+def volume_surface_area(volume, criteria):
+    """Number of blocks divided by the number of exposed block faces"""
+    bounds = volume.bounding_box()
+    if bounds is None:
+        return 0.0, {"volume": 0, "surface_area": 0}
+    (y0, z0, x0), (y1, z1, x1) = bounds
+    solid = volume.solid[y0:y1, z0:z1, x0:x1]
+    block_count = int(volume.palette_counts()[1:].sum())
+    surface_area = _exposed_faces(solid)
+    return block_count / surface_area, {"volume": block_count, "surface_area": surface_area}
+
+
+@register_relationship('aspect_ratio')
+def aspect_ratio(volume, criteria):
+    """Ratio of two bounding box dimensions (width to depth unless ``dimensions`` says otherwise)"""
+    first, second = criteria.get("dimensions", ("width", "depth"))
+    bounds = volume.bounding_box()
+    if bounds is None:
+        return 0.0, {first: 0, second: 0}
+    (y0, z0, x0), (y1, z1, x1) = bounds
+    extents = {"width": x1 - x0, "height": y1 - y0, "depth": z1 - z0}
+    return extents[first] / extents[second], {first: extents[first], second: extents[second]}
+
+
+def check_math_relationship(volume, relationship_criteria):
+    """
+    Evaluate the ``math_relationship`` criterion of a challenge
+
+    Args:
+        volume (BuildVolume): Parsed build
+        relationship_criteria (dict): ``type`` and expected ``ratio``, with an
+            optional relative ``tolerance``
+
+    Returns:
+        dict: Expected and measured ratio, the measurements and pass/fail
+    """
+    relationship_type = relationship_criteria.get("type")
+    evaluator = RELATIONSHIP_EVALUATORS.get(relationship_type)
+    if evaluator is None:
+        raise ValueError(f"Unknown math relationship type: {relationship_type}")
+
+    expected = float(relationship_criteria["ratio"])
+    actual, measurements = evaluator(volume, relationship_criteria)
+    tolerance = relationship_criteria.get("tolerance", DEFAULT_RATIO_TOLERANCE)
+    return {
+        "type": relationship_type,
+        "expected": expected,
+        "actual": round(actual, 4),
+        "measurements": measurements,
+        "passed": math.isclose(actual, expected, rel_tol=tolerance)
+    }
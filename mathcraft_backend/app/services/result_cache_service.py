@@ -0,0 +1,113 @@
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app.models.validation_result import ValidationResult
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Number of results kept in memory when RESULT_CACHE_SIZE is not configured
+DEFAULT_CACHE_SIZE = 1024
+
+
+class ResultCache:
+    """
+    Validation results memoised by ``(content_hash, criteria_hash)``
+
+    Results live in a bounded in-process LRU backed by the
+    ``validation_results`` table, so they survive restarts and are shared
+    between worker processes. Identical files validated against identical
+    criteria always produce the same result, so entries never go stale; a
+    change to a challenge's criteria simply produces a new criteria hash.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, content_hash, criteria_hash):
+        """
+        Look up a cached result
+
+        Args:
+            content_hash (str): Digest of the uploaded file
+            criteria_hash (str): Digest of the challenge criteria
+
+        Returns:
+            dict: Copy of the cached validation result, or None
+        """
+        key = (content_hash, criteria_hash)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+
+        row = ValidationResult.query.filter_by(content_hash=content_hash, criteria_hash=criteria_hash).first()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, row.result)
+        return copy.deepcopy(row.result)
+
+    def put(self, content_hash, criteria_hash, result):
+        """
+        Store a validation result in memory and in the database
+
+        Args:
+            content_hash (str): Digest of the uploaded file
+            criteria_hash (str): Digest of the challenge criteria
+            result (dict): Validation result to memoise
+        """
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._remember((content_hash, criteria_hash), result)
+
+        try:
+            db.session.add(ValidationResult(content_hash, criteria_hash, result))
+            db.session.commit()
+        except IntegrityError:
+            # Another request stored the same result first
+            db.session.rollback()
+
+    def _remember(self, key, result):
+        """Insert into the LRU and evict the least recently used entries (caller holds the lock)"""
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        max_entries = current_app.config.get('RESULT_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+        while len(self._entries) > max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every in-memory entry (the database table is left alone)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Hit/miss counters for monitoring
+
+        Returns:
+            dict: In-memory size, hits, misses and hit ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Shared cache used by the upload path
+result_cache = ResultCache()
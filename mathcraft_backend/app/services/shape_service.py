@@ -0,0 +1,213 @@
+import numpy as np
+from scipy import ndimage
+
+# Shapes the classifier can recognise, matching the names used in challenge criteria
+SHAPE_NAMES = ('cube', 'cuboid', 'pyramid', 'cylinder')
+
+# Share of a bounding box face that must be filled for the face to count as closed
+FACE_COVERAGE = 0.95
+
+# Fill ratio range of one layer of a (possibly hollow) cylinder inside its square footprint
+CYLINDER_LAYER_FILL = (0.45, 0.92)
+
+# Only the largest components are classified, which bounds the per-slice profile arrays
+MAX_CLASSIFIED_COMPONENTS = 10000
+
+# Number of recognised shapes listed individually in the validation details
+MAX_REPORTED_SHAPES = 50
+
+
+class ComponentStats:
+    """Per-component measurements of a labelled build, stored as parallel arrays"""
+
+    def __init__(self, labels, sizes, lower, upper, profiles):
+        self.labels = labels  # Component label of each row
+        self.sizes = sizes  # Number of voxels in each component
+        self.lower = lower  # (m, 3) inclusive y/z/x bounding box minimum
+        self.upper = upper  # (m, 3) exclusive y/z/x bounding box maximum
+        self.profiles = profiles  # Per-axis (slices, m) cross-section areas
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def dims(self):
+        """(m, 3) bounding box height/depth/width"""
+        return self.upper - self.lower
+
+    @property
+    def fill_ratios(self):
+        return self.sizes / np.prod(self.dims, axis=1)
+
+    def face_areas(self, axis):
+        """Cross-section areas at the lower and upper bounding box face along an axis"""
+        rows = np.arange(len(self))
+        profile = self.profiles[axis]
+        return profile[self.lower[:, axis], rows], profile[self.upper[:, axis] - 1, rows]
+
+
+def label_components(solid):
+    """
+    Label face-connected components of a solid mask
+
+    Args:
+        solid (np.ndarray): Boolean (height, depth, width) mask
+
+    Returns:
+        tuple: (int32 label array, number of components)
+    """
+    return ndimage.label(solid)
+
+
+def measure_components(labels, count, min_extent=2):
+    """
+    Measure bounding boxes, sizes and per-slice cross-sections of components
+
+    Cross-section areas are computed with one ``np.bincount`` per slice along
+    each axis, so the work is a few passes over the grid regardless of how
+    many components there are.
+
+    Args:
+        labels (np.ndarray): Label array from ``label_components``
+        count (int): Number of components
+        min_extent (int): Components thinner than this along any axis are skipped
+
+    Returns:
+        ComponentStats: Measurements for the classified components
+    """
+    boxes = ndimage.find_objects(labels)
+    lower = np.array([[s.start for s in box] for box in boxes], dtype=np.int64).reshape(-1, 3)
+    upper = np.array([[s.stop for s in box] for box in boxes], dtype=np.int64).reshape(-1, 3)
+
+    candidates = np.flatnonzero(((upper - lower) >= min_extent).all(axis=1))
+    if len(candidates) > MAX_CLASSIFIED_COMPONENTS:
+        box_volumes = np.prod(upper[candidates] - lower[candidates], axis=1)
+        largest = np.argsort(box_volumes, kind='stable')[::-1][:MAX_CLASSIFIED_COMPONENTS]
+        candidates = np.sort(candidates[largest])
+
+    # Map component labels onto dense rows 1..m so the profile arrays stay small
+    rows = np.zeros(count + 1, dtype=np.int32)
+    rows[candidates + 1] = np.arange(1, len(candidates) + 1, dtype=np.int32)
+    dense = rows[labels]
+    profiles = []
+    for axis in range(3):
+        # One transposed copy keeps every slice contiguous for bincount
+        slices = dense if axis == 0 else np.ascontiguousarray(np.moveaxis(dense, axis, 0))
+        profile = np.zeros((slices.shape[0], len(candidates)), dtype=np.int32)
+        for index, layer in enumerate(slices):
+            profile[index] = np.bincount(layer.ravel(), minlength=len(candidates) + 1)[1:]
+        profiles.append(profile)
+
+    sizes = profiles[0].sum(axis=0)
+    return ComponentStats(candidates + 1, sizes, lower[candidates], upper[candidates], profiles)
+
+
+def classify_components(stats):
+    """
+    Classify every measured component at once
+
+    Args:
+        stats (ComponentStats): Output of ``measure_components``
+
+    Returns:
+        np.ndarray: Index into ``SHAPE_NAMES`` per component, -1 for irregular components
+    """
+    shapes = np.full(len(stats), -1, dtype=np.int8)
+    if not len(stats):
+        return shapes
+
+    height, depth, width = stats.dims.T
+    closed = np.ones(len(stats), dtype=bool)
+    for axis in range(3):
+        face_size = np.prod(np.delete(stats.dims, axis, axis=1), axis=1)
+        for face in stats.face_areas(axis):
+            closed &= face >= FACE_COVERAGE * face_size
+
+    # Horizontal layer areas from the bottom of each bounding box to its top
+    layers = stats.profiles[0]
+    steps = np.diff(layers, axis=0)
+    step_rows = np.arange(len(steps))[:, None]
+    inside = (step_rows >= stats.lower[:, 0]) & (step_rows < stats.upper[:, 0] - 1)
+    growing = ((steps > 0) & inside).any(axis=0)
+    changing = ((steps != 0) & inside).any(axis=0)
+    bottom, top = stats.face_areas(0)
+    square_base = depth == width
+
+    is_cube = closed & (height == depth) & (depth == width)
+    is_cuboid = closed & ~is_cube
+    is_pyramid = (~closed & square_base & ~growing & (bottom > top) & (top <= 4)
+                  & (bottom >= FACE_COVERAGE * depth * width))
+    layer_fill = bottom / (depth * width)
+    is_cylinder = (~closed & square_base & (width >= 3) & ~changing
+                   & (layer_fill >= CYLINDER_LAYER_FILL[0]) & (layer_fill <= CYLINDER_LAYER_FILL[1]))
+
+    # Later assignments take precedence over earlier ones
+    for name, mask in (('cylinder', is_cylinder), ('pyramid', is_pyramid), ('cuboid', is_cuboid), ('cube', is_cube)):
+        shapes[mask] = SHAPE_NAMES.index(name)
+    return shapes
+
+
+def detect_shapes(volume):
+    """
+    Label the build's components and recognise geometric shapes
+
+    Args:
+        volume (BuildVolume): Parsed build
+
+    Returns:
+        dict: Component count, shape counts and the largest recognised shapes
+    """
+    bounds = volume.bounding_box()
+    if bounds is None:
+        return {"components": 0, "shape_counts": dict.fromkeys(SHAPE_NAMES, 0), "shapes": []}
+
+    # Work on the build's bounding box only; origins are shifted back when reported
+    (y0, z0, x0), (y1, z1, x1) = bounds
+    labels, count = label_components(volume.solid[y0:y1, z0:z1, x0:x1])
+    stats = measure_components(labels, count)
+    shapes = classify_components(stats)
+
+    recognised = np.flatnonzero(shapes >= 0)
+    recognised = recognised[np.argsort(stats.sizes[recognised], kind='stable')[::-1][:MAX_REPORTED_SHAPES]]
+    lower = stats.lower + (y0, z0, x0)
+    dims = stats.dims
+    fill_ratios = stats.fill_ratios
+    found = []
+    for row in recognised:
+        found.append({
+            "name": SHAPE_NAMES[shapes[row]],
+            "blocks": int(stats.sizes[row]),
+            "size": {"width": int(dims[row, 2]), "height": int(dims[row, 0]), "depth": int(dims[row, 1])},
+            "origin": {"x": int(lower[row, 2]), "y": int(lower[row, 0]), "z": int(lower[row, 1])},
+            "fill_ratio": round(float(fill_ratios[row]), 3)
+        })
+    shape_counts = np.bincount(shapes[shapes >= 0], minlength=len(SHAPE_NAMES))
+    return {
+        "components": int(count),
+        "shape_counts": dict(zip(SHAPE_NAMES, shape_counts.tolist())),
+        "shapes": found
+    }
+
+
+def check_structures(volume, structure_criteria):
+    """
+    Evaluate the ``structures`` criterion of a challenge
+
+    Args:
+        volume (BuildVolume): Parsed build
+        structure_criteria (list): Entries like ``{"name": "cube", "required": True}``
+            with an optional ``min_count`` (default 1)
+
+    Returns:
+        dict: Detected shapes plus the names of required shapes that are missing
+    """
+    result = detect_shapes(volume)
+    result["missing"] = []
+    for structure in structure_criteria:
+        name = structure["name"]
+        if name not in SHAPE_NAMES:
+            raise ValueError(f"Unknown structure shape: {name}")
+        if structure.get("required", True) and result["shape_counts"][name] < structure.get("min_count", 1):
+            result["missing"].append(name)
+    result["passed"] = not result["missing"]
+    return result
@@ -0,0 +1,249 @@
+import os
+import re
+import gzip
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+from datetime import datetime
+from flask import current_app
+from app.models.blob import Blob
+from app.services.database_service import upsert_insert
+from app import db
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Bytes read from an upload stream at a time
+CHUNK_SIZE = 64 * 1024
+
+# First byte of an uncompressed NBT file (a TAG_Compound root)
+_RAW_NBT_MARKER = b'\x0a'
+
+# Public name of a stored blob: its content hash plus the upload extension
+BLOB_NAME = re.compile(r'^([0-9a-f]{64})\.nbt$')
+
+
+def content_hasher():
+    """Hash object used to address uploaded content (BLAKE2b, 256-bit digest)"""
+    return hashlib.blake2b(digest_size=32)
+
+
+def save_stream(stream, file_path):
+    """
+    Copy a stream to disk, hashing the bytes on the way
+
+    Args:
+        stream: Readable binary file object, e.g. ``FileStorage.stream``
+        file_path (str): Destination path
+
+    Returns:
+        tuple: (content hash hex digest, number of bytes written)
+    """
+    hasher = content_hasher()
+    size = 0
+    with open(file_path, 'wb') as destination:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            destination.write(chunk)
+            size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+class BlobStore:
+    """
+    Content-addressed store for uploaded files
+
+    Every distinct content is stored once, at ``<root>/<h[:2]>/<h[2:4]>/<h>``,
+    so no directory grows beyond a few hundred entries. Uncompressed NBT is
+    gzipped at rest (stored with a ``.gz`` suffix); files that are already
+    compressed are kept verbatim. Blobs only ever appear through an atomic
+    rename of a fully written temporary file.
+
+    A blob's modification time is refreshed whenever an upload reuses it,
+    and ``delete`` leaves recently used blobs alone, so garbage collection
+    cannot remove a blob between an upload finding it and the upload's
+    reference being committed.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def _base_path(self, content_hash):
+        return os.path.join(self.root, content_hash[:2], content_hash[2:4], content_hash)
+
+    def path_for(self, content_hash):
+        """
+        Locate a stored blob
+
+        Args:
+            content_hash (str): Digest of the original content
+
+        Returns:
+            str: Path of the blob on disk, or None if it is not stored
+        """
+        base = self._base_path(content_hash)
+        for path in (base, base + '.gz'):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def save(self, stream):
+        """
+        Store the content of a stream unless identical content is already stored
+
+        Args:
+            stream: Readable binary file object
+
+        Returns:
+            tuple: (content hash, original size, stored size, blob path)
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        os.close(fd)
+        try:
+            content_hash, size = save_stream(stream, tmp_path)
+            return (content_hash, size) + self.adopt(tmp_path, content_hash)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def temp_path(self, name):
+        """Path for a file being assembled in the store's temporary directory"""
+        return os.path.join(self.tmp_dir, name)
+
+    def adopt(self, tmp_path, content_hash):
+        """
+        Turn a fully written temporary file into a blob
+
+        The file is renamed into place, not copied. If identical content is
+        already stored, the blob's modification time is refreshed and the
+        temporary file deleted; if the blob was removed in the meantime, the
+        temporary file takes its place.
+
+        Args:
+            tmp_path (str): File inside the store's temporary directory
+            content_hash (str): Digest of the file's content
+
+        Returns:
+            tuple: (stored size, blob path)
+        """
+        path = self.path_for(content_hash)
+        if path is not None:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                path = None
+        if path is None:
+            path = self._publish(tmp_path, content_hash)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return os.path.getsize(path), path
+
+    def _publish(self, tmp_path, content_hash):
+        """Move a fully written temporary file into place, compressing raw NBT first"""
+        base = self._base_path(content_hash)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        with open(tmp_path, 'rb') as source:
+            compress = source.read(1) == _RAW_NBT_MARKER
+        if not compress:
+            os.replace(tmp_path, base)
+            return base
+
+        fd, gz_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with open(tmp_path, 'rb') as source, os.fdopen(fd, 'wb') as raw, \
+                    gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0) as destination:
+                shutil.copyfileobj(source, destination, CHUNK_SIZE)
+            os.replace(gz_path, base + '.gz')
+            os.remove(tmp_path)
+        finally:
+            if os.path.exists(gz_path):
+                os.remove(gz_path)
+        return base + '.gz'
+
+    def open(self, content_hash):
+        """
+        Open a blob for reading its original bytes
+
+        Args:
+            content_hash (str): Digest of the original content
+
+        Returns:
+            file: Binary file object, or None if the blob is not stored
+        """
+        path = self.path_for(content_hash)
+        if path is None:
+            return None
+        return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+    def delete(self, content_hash, min_age=0):
+        """
+        Remove a blob from disk unless an upload used it recently
+
+        The blob is first moved out of place, so an upload reusing it either
+        refreshed its modification time before the move (and it is put
+        back) or finds it gone and stores its own copy.
+
+        Args:
+            content_hash (str): Digest of the original content
+            min_age (float): Seconds since the blob was last stored or reused
+                before it may be removed
+
+        Returns:
+            bool: True if the blob is no longer stored
+        """
+        path = self.path_for(content_hash)
+        if path is None:
+            return True
+        fd, trash_path = tempfile.mkstemp(dir=self.tmp_dir)
+        os.close(fd)
+        try:
+            os.replace(path, trash_path)
+        except FileNotFoundError:
+            os.remove(trash_path)
+            return True
+        if time.time() - os.path.getmtime(trash_path) < min_age:
+            os.replace(trash_path, path)
+            return False
+        os.remove(trash_path)
+        return True
+
+
+def get_blob_store():
+    """Blob store rooted at the configured ``BLOB_FOLDER``"""
+    return BlobStore(current_app.config['BLOB_FOLDER'])
+
+
+def blob_name(content_hash):
+    """Name under which a blob is referenced from ``Submission.file_path``"""
+    return f"{content_hash}.nbt"
+
+
+def add_reference(content_hash, size, stored_size, count=1):
+    """
+    Count more submissions pointing at a blob
+
+    A single ``INSERT ... ON CONFLICT DO UPDATE`` creates the row or adds
+    to its count, so two first uploads of the same content cannot both try
+    to insert it. The statement runs in the current transaction and is
+    committed together with the submissions that hold the references.
+
+    Args:
+        content_hash (str): Digest of the blob content
+        size (int): Original size in bytes
+        stored_size (int): Size on disk
+        count (int): Number of new references
+    """
+    statement = upsert_insert(Blob).values(
+        content_hash=content_hash, size=size, stored_size=stored_size, refcount=count, created_at=datetime.utcnow()
+    )
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['content_hash'],
+        set_={'refcount': Blob.refcount + statement.excluded.refcount}
+    ))
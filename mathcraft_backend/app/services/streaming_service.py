@@ -0,0 +1,84 @@
+import logging
+from itertools import islice
+from flask import Response, current_app, request, stream_with_context
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson')
+
+
+def wants_ndjson():
+    """Check if the client's Accept header prefers NDJSON over a JSON document"""
+    best = request.accept_mimetypes.best_match(('application/json',) + NDJSON_MIMETYPES)
+    return best in NDJSON_MIMETYPES
+
+
+def stream_query(query, serialize, envelope=None, key=None, headers=None):
+    """
+    Stream the rows of a query as JSON or NDJSON, chosen by the Accept header
+
+    Rows are fetched from a server-side cursor in ``STREAM_CHUNK_SIZE``
+    batches and written as soon as each batch is serialised, so memory use
+    does not grow with the number of rows. The query is executed and its
+    first batch serialised before the response is returned, so errors at
+    that point still reach the caller's error handling (and a 500 status);
+    only a failure later in the stream truncates the body.
+
+    As JSON the response is a plain array, or, with an ``envelope``, that
+    object with the array added under ``key``. As NDJSON the envelope (if
+    any) is the first line, followed by one line per row.
+
+    Args:
+        query (Query): Query to stream; it must already be ordered
+        serialize (callable): Turns a row into a JSON-serialisable value
+        envelope (dict): Fields to send ahead of the rows
+        key (str): Name of the row array inside the envelope
+        headers (dict): Extra response headers
+
+    Returns:
+        Response: Streaming response
+    """
+    app = current_app._get_current_object()
+    dumps = app.json.dumps
+    chunk_size = app.config['STREAM_CHUNK_SIZE']
+    ndjson = wants_ndjson()
+
+    if ndjson:
+        opening, separator, closing = '', '\n', '\n'
+        if envelope is not None:
+            opening = dumps(envelope) + '\n'
+    elif envelope is not None:
+        head = dumps(envelope)[:-1]
+        opening = f'{head}{", " if envelope else ""}{dumps(key)}: ['
+        separator, closing = ', ', ']}'
+    else:
+        opening, separator, closing = '[', ', ', ']'
+
+    rows = iter(query.yield_per(chunk_size))
+    first = [dumps(serialize(row)) for row in islice(rows, chunk_size)]
+
+    def generate():
+        yield opening
+        wrote_rows = bool(first)
+        if first:
+            yield separator.join(first)
+        batch = []
+        try:
+            for row in rows:
+                batch.append(dumps(serialize(row)))
+                if len(batch) >= chunk_size:
+                    yield (separator if wrote_rows else '') + separator.join(batch)
+                    wrote_rows = True
+                    batch = []
+            if batch:
+                yield (separator if wrote_rows else '') + separator.join(batch)
+                wrote_rows = True
+        except Exception as e:
+            # The status line has already been sent; the client sees a truncated body
+            logger.error(f"Error while streaming response: {str(e)}")
+            return
+        yield closing if wrote_rows or not ndjson else ''
+
+    mimetype = NDJSON_MIMETYPES[0] if ndjson else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers=headers)
@@ -0,0 +1,156 @@
+import numpy as np
+from app.services.voxel_service import AXIS_INDEX
+
+AXES = ('x', 'y', 'z')
+
+# Plane of rotation for a rotation about each coordinate axis
+ROTATION_PLANES = {'y': (1, 2), 'x': (0, 1), 'z': (0, 2)}
+
+# Share of blocks that may differ from their counterpart when no tolerance is given
+DEFAULT_TOLERANCE_RATIO = 0.02
+
+
+def _crop(volume):
+    """
+    View of the grid trimmed to the build's bounding box
+
+    Mirroring the trimmed grid compares each block with its counterpart
+    across the build's own centre, not the centre of the structure file.
+    Builds with fewer than 256 block types are narrowed to uint8 so each
+    comparison touches half the memory.
+    """
+    bounds = volume.bounding_box()
+    if bounds is None:
+        return None
+    (y0, z0, x0), (y1, z1, x1) = bounds
+    grid = volume.grid[y0:y1, z0:z1, x0:x1]
+    if len(volume.palette) <= 256:
+        grid = grid.astype(np.uint8)
+    return grid
+
+
+def _mismatched_blocks(grid, transformed, solid=None):
+    """Number of solid voxels whose transformed counterpart holds a different block"""
+    different = grid != transformed
+    different &= (grid != 0) if solid is None else solid
+    return int(np.count_nonzero(different))
+
+
+def mirror_mismatches(grid, axis, solid=None):
+    """
+    Compare a grid with its mirror image along one axis
+
+    Args:
+        grid (np.ndarray): Cropped voxel grid
+        axis (str): Coordinate to mirror ('x', 'y' or 'z')
+        solid (np.ndarray): Optional precomputed ``grid != 0`` mask
+
+    Returns:
+        int: Number of solid blocks that differ from their mirror image
+    """
+    return _mismatched_blocks(grid, np.flip(grid, axis=AXIS_INDEX[axis]), solid)
+
+
+def rotation_mismatches(grid, axis, angle, solid=None):
+    """
+    Compare a grid with itself rotated about one axis
+
+    Args:
+        grid (np.ndarray): Cropped voxel grid
+        axis (str): Coordinate axis of rotation ('x', 'y' or 'z')
+        angle (int): 90 or 180 degrees
+        solid (np.ndarray): Optional precomputed ``grid != 0`` mask
+
+    Returns:
+        int: Number of solid blocks that differ from their rotated position,
+        or None if the footprint cannot map onto itself at that angle
+    """
+    plane = ROTATION_PLANES[axis]
+    if angle == 180:
+        return _mismatched_blocks(grid, np.flip(grid, axis=plane), solid)
+    if angle == 90:
+        if grid.shape[plane[0]] != grid.shape[plane[1]]:
+            return None
+        return _mismatched_blocks(grid, np.rot90(grid, k=1, axes=plane), solid)
+    raise ValueError(f"Unsupported rotation angle: {angle}")
+
+
+def _score(mismatched, solid_count):
+    return round(1 - mismatched / solid_count, 4) if solid_count else 0.0
+
+
+def axis_scores(volume):
+    """
+    Bilateral symmetry score for every axis
+
+    Args:
+        volume (BuildVolume): Parsed build
+
+    Returns:
+        dict: Share of blocks matching their mirror image, keyed by axis
+    """
+    grid = _crop(volume)
+    solid_count = int(volume.palette_counts()[1:].sum())
+    if grid is None:
+        return {axis: 0.0 for axis in AXES}
+    solid = grid != 0
+    return {axis: _score(mirror_mismatches(grid, axis, solid), solid_count) for axis in AXES}
+
+
+def check_symmetry(volume, symmetry_criteria):
+    """
+    Evaluate the ``symmetry`` criterion of a challenge
+
+    Criteria keys:
+        type: 'bilateral' (mirror, the default) or 'rotational'
+        axis: 'x', 'y' or 'z' - the mirrored coordinate, or the axis of rotation
+        angle: 90 or 180 for rotational symmetry (default 180)
+        tolerance: Number of blocks allowed to differ from their counterpart
+            (default 2% of the build)
+
+    Args:
+        volume (BuildVolume): Parsed build
+        symmetry_criteria (dict): The challenge's symmetry criterion
+
+    Returns:
+        dict: Result with pass/fail, score, mismatch count and per-axis scores
+    """
+    symmetry_type = symmetry_criteria.get("type", "bilateral")
+    axis = symmetry_criteria.get("axis", "y" if symmetry_type == "rotational" else "x")
+    if axis not in AXIS_INDEX:
+        raise ValueError(f"Unknown symmetry axis: {axis}")
+
+    solid_count = int(volume.palette_counts()[1:].sum())
+    tolerance = symmetry_criteria.get("tolerance", int(solid_count * DEFAULT_TOLERANCE_RATIO))
+    result = {
+        "type": symmetry_type,
+        "axis": axis,
+        "passed": False,
+        "score": 0.0,
+        "mismatched_blocks": solid_count,
+        "tolerance": tolerance,
+        "axis_scores": {a: 0.0 for a in AXES}
+    }
+    grid = _crop(volume)
+    if grid is None:
+        return result
+
+    solid = grid != 0
+    mirrored = {a: mirror_mismatches(grid, a, solid) for a in AXES}
+    result["axis_scores"] = {a: _score(mirrored[a], solid_count) for a in AXES}
+
+    if symmetry_type == "bilateral":
+        mismatched = mirrored[axis]
+    elif symmetry_type == "rotational":
+        angle = int(symmetry_criteria.get("angle", 180))
+        result["angle"] = angle
+        mismatched = rotation_mismatches(grid, axis, angle, solid)
+        if mismatched is None:
+            return result
+    else:
+        raise ValueError(f"Unknown symmetry type: {symmetry_type}")
+
+    result["mismatched_blocks"] = mismatched
+    result["score"] = _score(mismatched, solid_count)
+    result["passed"] = mismatched <= tolerance
+    return result
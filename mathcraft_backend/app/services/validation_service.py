@@ -1,53 +1,43 @@
 import os
 import json
+import math
 import logging
-import requests
+import numpy as np
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from flask import current_app
-from app.models.challenge import Challenge
+from app.services.nbt_service import read_structure_file
+from app.services.voxel_service import BuildVolume
+from app.services.symmetry_service import axis_scores
+from app.services.criteria_service import plan_cache
+from app.services.result_cache_service import result_cache
+from app.services.ai_client_service import CircuitOpenError, ExternalValidationError, get_validation_client
+from app.services.ai_batch_service import get_validation_batcher
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Placeholder for actual NBT parsing library
-# In a real implementation, you would use a library like NBTLib or pynbt
 class NBTParser:
-    """Placeholder class for NBT file parsing functionality"""
+    """Parses Minecraft structure files into the data used by the validators"""
     
     @staticmethod
-    def parse_file(file_path):
+    def parse_file(file_path, max_voxels=None):
         """
         Parse a Minecraft NBT file
         
         Args:
             file_path (str): Path to the NBT file
+            max_voxels (int): Largest structure volume accepted
             
         Returns:
-            dict: Structured data extracted from the NBT file
+            BuildVolume: Voxel grid and palette of the build
+            
+        Raises:
+            NBTFormatError: If the file is not a valid structure file
         """
         logger.info(f"Parsing NBT file: {file_path}")
         
-        # This is a placeholder implementation
-        # In a real app, you would use a proper NBT parser library
-        
-        # For now, we'll return a simple mock structure with some key attributes
-        # that might be found in a Minecraft build
-        return {
-            "size": {
-                "width": 10,
-                "height": 5,
-                "depth": 10
-            },
-            "blocks": [
-                {"id": "minecraft:stone", "count": 20},
-                {"id": "minecraft:oak_planks", "count": 15},
-                {"id": "minecraft:glass", "count": 10}
-            ],
-            "entities": [],
-            "metadata": {
-                "name": os.path.basename(file_path),
-                "created_at": "2025-05-04T12:00:00Z"
-            }
-        }
+        structure = read_structure_file(file_path, max_voxels)
+        return BuildVolume.from_structure(structure, {"name": os.path.basename(file_path)}, max_voxels)
 
 def validate_minecraft_build(file_path, challenge_id):
     """
@@ -60,28 +50,79 @@ def validate_minecraft_build(file_path, challenge_id):
     Returns:
         dict: Validation results including success status and feedback
     """
+    validation_result, _ = validate_upload(file_path, challenge_id)
+    return validation_result
+
+def validate_upload(file_path, challenge_id, content_hash=None):
+    """
+    Validate an uploaded build, reusing the result of an identical earlier upload
+    
+    Args:
+        file_path (str): Path to the uploaded NBT file
+        challenge_id: ID of the challenge to validate against
+        content_hash (str): Digest of the file; when given, results are
+            memoised by content and criteria
+        
+    Returns:
+        tuple: (validation results, criteria hash or None if the challenge was not found)
+    """
     try:
-        # Get the challenge criteria
-        challenge = Challenge.query.get(challenge_id)
-        if not challenge:
+        # Get the compiled challenge criteria (cached per challenge version)
+        plan = plan_cache.get(challenge_id)
+        if not plan:
             return {
                 "success": False,
                 "error": f"Challenge with ID {challenge_id} not found"
-            }
+            }, None
+        
+        # An identical file checked against identical criteria needs no parsing
+        if content_hash:
+            cached = result_cache.get(content_hash, plan.criteria_hash)
+            if cached is not None:
+                logger.info(f"Reusing validation result for {content_hash[:12]} on challenge {challenge_id}")
+                return cached, plan.criteria_hash
         
         # Parse the NBT file
-        nbt_data = NBTParser.parse_file(file_path)
+        volume = NBTParser.parse_file(file_path, current_app.config['MAX_BUILD_VOXELS'])
         
         # For demonstration/testing, we can do a simple validation here
         # In the real app, you would call the AI validation service
         
         # Check if we should use the external AI validation service
         if current_app.config.get('USE_EXTERNAL_AI_VALIDATION', False):
-            return call_external_validation_service(nbt_data, challenge.criteria)
+            validation_result = call_external_validation_service(volume, plan)
+        else:
+            # Otherwise use our simple validation logic
+            validation_result = perform_local_validation(volume, plan)
         
-        # Otherwise use our simple validation logic
-        return perform_local_validation(nbt_data, challenge.criteria)
+        # Failed service calls and local fallbacks are retried on the next upload instead of being cached
+        if content_hash and "error" not in validation_result and not validation_result.get("fallback"):
+            result_cache.put(content_hash, plan.criteria_hash, validation_result)
+        return validation_result, plan.criteria_hash
         
+    except Exception as e:
+        logger.error(f"Error validating Minecraft build: {str(e)}")
+        return {
+            "success": False,
+            "error": f"Validation error: {str(e)}"
+        }, None
+
+def validate_file(file_path, plan, max_voxels=None):
+    """
+    Parse and validate a build locally against a compiled plan
+    
+    Needs no application context, so it can run in a worker process.
+    
+    Args:
+        file_path (str): Path to the uploaded NBT file
+        plan (ValidationPlan): Compiled criteria of the challenge
+        max_voxels (int): Largest structure volume accepted (MAX_BUILD_VOXELS)
+        
+    Returns:
+        dict: Validation results including success status and feedback
+    """
+    try:
+        return perform_local_validation(NBTParser.parse_file(file_path, max_voxels), plan)
     except Exception as e:
         logger.error(f"Error validating Minecraft build: {str(e)}")
         return {
@@ -89,13 +130,13 @@ def validate_minecraft_build(file_path, challenge_id):
             "error": f"Validation error: {str(e)}"
         }
 
-def perform_local_validation(nbt_data, criteria):
+def perform_local_validation(volume, plan):
     """
     Perform basic validation locally without calling external AI service
     
     Args:
-        nbt_data (dict): Parsed NBT data
-        criteria (dict): Challenge criteria
+        volume (BuildVolume): Parsed build
+        plan (ValidationPlan): Compiled criteria of the challenge
         
     Returns:
         dict: Validation results
@@ -110,39 +151,14 @@ def perform_local_validation(nbt_data, criteria):
         "details": {}
     }
     
-    # Example validation: Check if the build meets size requirements
-    if "size_requirements" in criteria:
-        size_req = criteria["size_requirements"]
-        actual_size = nbt_data["size"]
-        
-        # Check width
-        if "min_width" in size_req and actual_size["width"] < size_req["min_width"]:
+    # Run the pre-compiled checks in criteria order
+    for check in plan.checks:
+        feedback, details = check.evaluate(volume)
+        if details is not None:
+            validation_results["details"][check.name] = details
+        if feedback:
             validation_results["success"] = False
-            validation_results["feedback"].append(
-                f"Build width ({actual_size['width']}) is less than minimum required ({size_req['min_width']})"
-            )
-        
-        # Check height
-        if "min_height" in size_req and actual_size["height"] < size_req["min_height"]:
-            validation_results["success"] = False
-            validation_results["feedback"].append(
-                f"Build height ({actual_size['height']}) is less than minimum required ({size_req['min_height']})"
-            )
-    
-    # Example validation: Check if required blocks are present
-    if "required_blocks" in criteria:
-        block_counts = {block["id"]: block["count"] for block in nbt_data["blocks"]}
-        
-        for required_block in criteria["required_blocks"]:
-            block_id = required_block["id"]
-            min_count = required_block.get("min_count", 1)
-            
-            if block_id not in block_counts or block_counts[block_id] < min_count:
-                validation_results["success"] = False
-                actual_count = block_counts.get(block_id, 0)
-                validation_results["feedback"].append(
-                    f"Not enough {block_id} blocks. Required: {min_count}, Found: {actual_count}"
-                )
+            validation_results["feedback"].extend(feedback)
     
     # Calculate a score based on how well the criteria are met
     # This is a simple scoring mechanism - in a real app, this would be more nuanced
@@ -155,98 +171,121 @@ def perform_local_validation(nbt_data, criteria):
         # This is simplified - in a real app, different criteria might have different weights
         validation_results["score"] = max(0, 100 - (len(validation_results["feedback"]) * 20))
     
-    validation_results["details"] = {
-        "analyzed_blocks": nbt_data["blocks"],
-        "build_size": nbt_data["size"]
-    }
+    summary = volume.to_dict()
+    validation_results["details"].update({
+        "analyzed_blocks": summary["blocks"],
+        "build_size": summary["size"]
+    })
     
     return validation_results
 
-def call_external_validation_service(nbt_data, criteria):
+def call_external_validation_service(volume, plan):
     """
     Call an external AI validation service to validate the build
     
+    If the service cannot be used (circuit breaker open, timeouts, errors),
+    the build is validated locally instead and the result is marked with
+    ``"fallback": True``.
+    
     Args:
-        nbt_data (dict): Parsed NBT data
-        criteria (dict): Challenge criteria
+        volume (BuildVolume): Parsed build
+        plan (ValidationPlan): Compiled criteria of the challenge
         
     Returns:
-        dict: Validation results from the external service
+        dict: Validation results from the external service, or the local fallback
     """
+    app = current_app._get_current_object()
+    
     try:
-        # Get the validation service URL from configuration
-        validation_url = current_app.config.get(
-            'AI_VALIDATION_SERVICE_URL', 
-            'http://localhost:5000/api/validate'
-        )
+        # Coalesce builds into compact multipart batches
+        if app.config['AI_VALIDATION_BATCHING']:
+            batcher = get_validation_batcher(app)
+            future = batcher.submit(volume, plan)
+            try:
+                return future.result(timeout=batcher.max_wait())
+            except FutureTimeoutError:
+                # Keeps the build out of a batch that has not been sent yet
+                future.cancel()
+                raise
         
-        # Prepare the payload
         payload = {
-            "nbt_data": nbt_data,
-            "criteria": criteria
+            "nbt_data": volume.to_dict(),
+            "criteria": plan.criteria
         }
-        
-        # Make the request to the external service
-        response = requests.post(
-            validation_url,
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=30  # 30 second timeout
-        )
-        
-        # Check if the request was successful
-        if response.status_code == 200:
-            return response.json()
-        else:
-            logger.error(f"External validation service error: {response.status_code} - {response.text}")
-            return {
-                "success": False,
-                "error": f"External validation service error: {response.status_code}",
-                "message": "Unable to validate build using external service. Using fallback validation."
-            }
-            
-    except requests.RequestException as e:
+        return get_validation_client(app).post(payload)
+    except CircuitOpenError as e:
+        reason = str(e)
+    except ExternalValidationError as e:
         logger.error(f"Error calling external validation service: {str(e)}")
-        # Fall back to local validation
-        return {
-            "success": False,
-            "error": f"Unable to reach external validation service: {str(e)}",
-            "message": "Using fallback validation instead."
-        }
+        reason = str(e)
+    except FutureTimeoutError:
+        logger.error("Timed out waiting for a batched external validation result")
+        reason = "External validation service did not answer in time"
+    
+    # Fall back to local validation
+    validation_result = perform_local_validation(volume, plan)
+    validation_result["fallback"] = True
+    validation_result["message"] = f"{reason}. Validated locally instead."
+    return validation_result
 
-def analyze_math_concepts(nbt_data):
+def analyze_math_concepts(volume):
     """
     Analyze the mathematical concepts present in a Minecraft build
     
     Args:
-        nbt_data (dict): Parsed NBT data
+        volume (BuildVolume): Parsed build
         
     Returns:
         dict: Analysis of mathematical concepts
     """
-    # This is a placeholder implementation
-    # In a real app, this would use AI to identify mathematical concepts
+    concepts = []
+    bounds = volume.bounding_box()
+    if bounds is None:
+        return {"concepts": concepts, "educational_value": "low", "complexity": "low"}
+    
+    # All measurements come from the shared voxel grid and its palette counts
+    (y0, z0, x0), (y1, z1, x1) = bounds
+    height, depth, width = y1 - y0, z1 - z0, x1 - x0
+    counts = volume.palette_counts()
+    solid_count = int(counts[1:].sum())
+    fill_ratio = solid_count / (width * height * depth)
+    concepts.append({
+        "name": "Geometry",
+        "confidence": round(fill_ratio, 2),
+        "details": f"{solid_count} blocks fill {fill_ratio:.0%} of the {width}x{height}x{depth} bounding box"
+    })
+    
+    divisor = math.gcd(width, math.gcd(height, depth))
+    if divisor > 1 or len({width, height, depth}) < 3:
+        concepts.append({
+            "name": "Ratios",
+            "confidence": 0.8 if divisor > 1 else 0.6,
+            "details": f"The build's dimensions {width}:{height}:{depth} simplify to "
+                       f"{width // divisor}:{height // divisor}:{depth // divisor}"
+        })
     
-    # For now, we'll return some mock data
+    symmetry_scores = axis_scores(volume)
+    best_axis = max(symmetry_scores, key=symmetry_scores.get)
+    if symmetry_scores[best_axis] >= 0.5:
+        concepts.append({
+            "name": "Symmetry",
+            "confidence": symmetry_scores[best_axis],
+            "details": f"{symmetry_scores[best_axis]:.0%} of blocks match their mirror image across the {best_axis} axis"
+        })
+    
+    block_types = int(np.count_nonzero(counts[1:]))
+    if block_types > 1:
+        largest_share = counts[1:].max() / solid_count
+        concepts.append({
+            "name": "Fractions",
+            "confidence": 0.5,
+            "details": f"The build uses {block_types} block types; the most common makes up "
+                       f"{largest_share:.0%} of all blocks"
+        })
+    
+    complexity = "low" if block_types <= 2 else "medium" if block_types <= 5 else "high"
     return {
-        "concepts": [
-            {
-                "name": "Geometry",
-                "confidence": 0.85,
-                "details": "The build appears to use geometric shapes and patterns"
-            },
-            {
-                "name": "Symmetry",
-                "confidence": 0.75,
-                "details": "The build shows bilateral symmetry along the x-axis"
-            },
-            {
-                "name": "Ratios",
-                "confidence": 0.6,
-                "details": "The build uses consistent ratios in its dimensions"
-            }
-        ],
-        "educational_value": "high",
-        "complexity": "medium"
+        "concepts": concepts,
+        "educational_value": "high" if len(concepts) >= 3 else "medium",
+        "complexity": complexity
     }
-
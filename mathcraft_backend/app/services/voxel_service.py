@@ -0,0 +1,201 @@
+import numpy as np
+from app.services.nbt_service import AIR_BLOCK_IDS, NBTFormatError
+
+AIR = 'minecraft:air'
+
+# Axis of the (height, depth, width) voxel grid for each Minecraft coordinate
+AXIS_INDEX = {'y': 0, 'z': 1, 'x': 2}
+
+# Colour prefixes used by dyed block families (wool, concrete, terracotta, ...)
+DYE_COLOURS = (
+    'white', 'orange', 'magenta', 'light_blue', 'yellow', 'lime', 'pink', 'gray',
+    'light_gray', 'cyan', 'purple', 'blue', 'brown', 'green', 'red', 'black',
+)
+
+_MAX_PALETTE_SIZE = np.iinfo(np.uint16).max + 1
+
+
+class BuildVolume:
+    """
+    Dense voxel representation of a build
+
+    ``grid`` is a ``(height, depth, width)`` uint16 array of palette indices,
+    i.e. indexed as ``grid[y, z, x]``. Palette index 0 is always air, and
+    every other palette entry is a distinct block id.
+    """
+
+    def __init__(self, grid, palette, metadata=None):
+        if palette[0] != AIR:
+            raise ValueError("Palette index 0 must be air")
+        self.grid = grid
+        self.palette = palette
+        self.metadata = metadata or {}
+        self._counts = None
+        self._bounds = None
+        self._palette_index = {block_id: index for index, block_id in enumerate(palette)}
+
+    def __repr__(self):
+        return f'<BuildVolume {self.width}x{self.height}x{self.depth} with {len(self.palette) - 1} block types>'
+
+    @classmethod
+    def from_structure(cls, structure, metadata=None, max_voxels=None):
+        """
+        Build a volume from decoded structure data
+
+        Block states that share an id (e.g. stairs facing different ways) are
+        merged into one palette entry, and all air variants map to index 0.
+
+        Args:
+            structure (StructureData): Output of the NBT decoder
+            metadata (dict): Extra information to keep with the volume
+            max_voxels (int): Largest volume to allocate; the size tag is
+                untrusted, so a tiny file could otherwise declare a huge grid
+
+        Returns:
+            BuildVolume: The voxel grid for the structure
+
+        Raises:
+            NBTFormatError: If the structure is malformed or larger than ``max_voxels``
+        """
+        width, height, depth = structure.size
+        if min(structure.size) < 0:
+            raise NBTFormatError("Structure size must not be negative")
+        if max_voxels is not None and width * height * depth > max_voxels:
+            raise NBTFormatError(
+                f"Structure is too large: {width}x{height}x{depth} exceeds {max_voxels} blocks"
+            )
+
+        palette = [AIR]
+        index_by_id = {AIR: 0}
+        lookup = np.zeros(max(len(structure.palette), 1), dtype=np.uint16)
+        for state, block_id in enumerate(structure.palette):
+            if block_id in AIR_BLOCK_IDS:
+                continue
+            if block_id not in index_by_id:
+                if len(palette) >= _MAX_PALETTE_SIZE:
+                    raise NBTFormatError("Structure uses too many distinct block types")
+                index_by_id[block_id] = len(palette)
+                palette.append(block_id)
+            lookup[state] = index_by_id[block_id]
+
+        grid = np.zeros((height, depth, width), dtype=np.uint16)
+        positions = structure.positions
+        if len(positions):
+            if positions.min() < 0 or (positions.max(axis=0) >= (width, height, depth)).any():
+                raise NBTFormatError("Block position outside of the structure size")
+            grid[positions[:, 1], positions[:, 2], positions[:, 0]] = lookup[structure.states]
+
+        metadata = dict(metadata or {})
+        metadata.setdefault('data_version', structure.data_version)
+        metadata.setdefault('entity_count', structure.entity_count)
+        return cls(grid, palette, metadata)
+
+    @property
+    def height(self):
+        return self.grid.shape[0]
+
+    @property
+    def depth(self):
+        return self.grid.shape[1]
+
+    @property
+    def width(self):
+        return self.grid.shape[2]
+
+    @property
+    def size(self):
+        """Structure size in the shape used by challenge criteria"""
+        return {
+            "width": self.width,
+            "height": self.height,
+            "depth": self.depth
+        }
+
+    @property
+    def solid(self):
+        """Boolean mask of non-air voxels"""
+        return self.grid != 0
+
+    def index_of(self, block_id):
+        """Palette index of a block id, or None if the build does not use it"""
+        return self._palette_index.get(block_id)
+
+    def palette_counts(self):
+        """
+        Count voxels per palette index
+
+        Returns:
+            np.ndarray: Number of voxels for each palette entry (air included)
+        """
+        if self._counts is None:
+            self._counts = np.bincount(self.grid.ravel(), minlength=len(self.palette))
+        return self._counts
+
+    def block_counts(self):
+        """
+        Count non-air blocks by id
+
+        Returns:
+            dict: Mapping of block id to number of blocks
+        """
+        counts = self.palette_counts()
+        return {
+            self.palette[index]: int(counts[index])
+            for index in np.flatnonzero(counts[1:]) + 1
+        }
+
+    def matching_indices(self, block_id):
+        """
+        Palette indices that satisfy a block id from challenge criteria
+
+        Besides an exact match, a colourless family id such as
+        ``minecraft:wool`` matches every dyed variant (``minecraft:red_wool``).
+
+        Args:
+            block_id (str): Block id from the challenge criteria
+
+        Returns:
+            list: Matching palette indices
+        """
+        namespace, _, name = block_id.rpartition(':')
+        prefix = f'{namespace}:' if namespace else ''
+        candidates = [block_id] + [f'{prefix}{colour}_{name}' for colour in DYE_COLOURS]
+        return [self._palette_index[c] for c in candidates if c in self._palette_index]
+
+    def count(self, block_id):
+        """Number of blocks matching a criteria block id"""
+        counts = self.palette_counts()
+        return int(sum(counts[index] for index in self.matching_indices(block_id)))
+
+    def bounding_box(self):
+        """
+        Tight bounding box of the non-air voxels
+
+        Returns:
+            tuple: ((y0, z0, x0), (y1, z1, x1)) with exclusive upper bounds,
+            or None for an empty build
+        """
+        if self._bounds is None:
+            solid = self.solid
+            bounds = []
+            for axis in range(3):
+                other = tuple(a for a in range(3) if a != axis)
+                occupied = np.flatnonzero(solid.any(axis=other))
+                if not len(occupied):
+                    self._bounds = ()
+                    break
+                bounds.append((int(occupied[0]), int(occupied[-1]) + 1))
+            else:
+                self._bounds = (tuple(b[0] for b in bounds), tuple(b[1] for b in bounds))
+        return self._bounds or None
+
+    def to_dict(self):
+        """Convert the volume summary to a dictionary for JSON serialization"""
+        return {
+            "size": self.size,
+            "blocks": [
+                {"id": block_id, "count": count}
+                for block_id, count in sorted(self.block_counts().items())
+            ],
+            "metadata": self.metadata
+        }
@@ -0,0 +1,15 @@
+"""
+Gunicorn settings for the MathCraft API
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', '4'))
+timeout = int(os.getenv('WORKER_TIMEOUT', '60'))
+
+# Create the app once in the master and fork it into the workers, which then
+# share its imported modules; wsgi.reset_after_fork runs in each new worker
+preload_app = True
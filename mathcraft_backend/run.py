@@ -1,6 +1,9 @@
 import os
 import logging
 from app import create_app, db
+from app.services.database_service import upgrade_schema
+from app.services.ranking_service import leaderboards
+from app.services.leaderboard_service import backfill_user_stats
 from flask import url_for
 
 # Configure logging
@@ -11,11 +14,20 @@ logger = logging.getLogger(__name__)
 # Create Flask application instance using environment variable or default to development
 app = create_app(os.getenv('FLASK_ENV', 'dev'))
 
-# Create database tables if they don't exist during application startup
+# Create database tables if they don't exist, and add columns and indexes
+# that older databases are missing, during application startup
 with app.app_context():
-    db.create_all()
+    upgrade_schema()
     logger.info("Database tables initialized")
     
+    # Compute the leaderboard totals if this database predates the user_stats table
+    backfilled = backfill_user_stats()
+    if backfilled:
+        logger.info(f"Backfilled leaderboard totals for {backfilled} users")
+    
+    # Load the in-memory leaderboards before the first request needs them
+    leaderboards.rebuild()
+    
     # Print all registered routes for debugging purposes
     logger.debug("Registered Routes:")
     for rule in app.url_map.iter_rules():
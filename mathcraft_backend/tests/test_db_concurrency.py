@@ -0,0 +1,30 @@
+"""
+Parallel writers against a scratch SQLite database with the production pragmas
+
+Runs the workload of app/scripts/db_concurrency_check.py at a smaller size:
+several worker processes write progress (single and bulk updates) while a
+slow reader streams submissions, and no request may fail with "database is
+locked" or any other server error.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the backend and its scripts to the path so we can import app and the check
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/scripts')))
+
+import db_concurrency_check as check
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="the workers are forked processes")
+
+
+def test_parallel_writers_with_production_pragmas(tmp_path):
+    name = check.make_config('concurrency-test', f"sqlite:///{tmp_path / 'concurrency.db'}", tuned=True)
+    check.prepare(name)
+
+    failures, _ = check.run(name, workers=4, requests=25)
+
+    assert failures == []
@@ -0,0 +1,77 @@
+"""
+WSGI entry point for production servers
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Unlike run.py this module has no side effects beyond creating the app: it
+runs no schema DDL (create the tables with app/scripts/init_db.py when
+deploying), does not rebuild the in-memory leaderboards (each worker builds
+them on the first request that needs them) and does not log the URL map.
+The NumPy validation stack and the HTTP client are imported on first use,
+so a new worker is ready to serve requests quickly.
+
+The app can be created once in a pre-fork server's master process
+(``preload_app``); every forked worker then disposes of the inherited
+database connections and per-process state, see ``reset_after_fork``.
+"""
+
+import os
+import time
+import logging
+
+started = time.perf_counter()
+
+from app import create_app, db
+from app.services.job_service import validation_queue
+from app.services.ai_client_service import reset_validation_clients
+from app.services.ai_batch_service import reset_validation_batchers
+
+imported = time.perf_counter()
+
+# Configure logging
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'),
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def reset_after_fork(app):
+    """
+    Drop state a forked worker must not share with its parent
+
+    Pooled database connections (and their SQLite file handles) belong to
+    the parent; ``dispose(close=False)`` forgets them without closing them
+    under the parent's feet. The validation worker pool, the external
+    validation clients and the batchers (with their threads) are recreated
+    on first use in the child.
+
+    Args:
+        app (Flask): The application created before the fork
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    validation_queue.reset_after_fork()
+    reset_validation_clients()
+    reset_validation_batchers()
+
+
+def create_production_app(config_name=None):
+    """
+    Factory for WSGI servers: the app, with its state reset in every forked worker
+
+    Args:
+        config_name (str): Name of the configuration to use (default: FLASK_ENV, or prod)
+
+    Returns:
+        Flask: The configured Flask application instance
+    """
+    app = create_app(config_name or os.getenv('FLASK_ENV', 'prod'))
+    os.register_at_fork(after_in_child=lambda: reset_after_fork(app))
+    return app
+
+
+app = create_production_app()
+
+ready = time.perf_counter()
+logger.info(f"Application ready in {(ready - started) * 1000:.0f} ms "
+            f"(imports {(imported - started) * 1000:.0f} ms, app factory {(ready - imported) * 1000:.0f} ms)")